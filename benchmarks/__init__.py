@@ -0,0 +1,6 @@
+"""Benchmarks for the zet-cli hot paths.
+
+Each module can be run on its own, for example:
+
+    python -m benchmarks.bench_frontmatter
+"""
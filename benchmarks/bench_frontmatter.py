@@ -0,0 +1,78 @@
+"""Front-matter parser benchmark.
+
+Compares `zet.frontmatter.parse` against the previous
+implementation of `Zet.metadata`, which read the whole
+file and used `ast.literal_eval` for lists.
+
+    python -m benchmarks.bench_frontmatter
+"""
+import argparse
+import ast
+import os
+import tempfile
+import timeit
+from typing import Dict
+
+from zet.frontmatter import parse
+
+HEADER = """---
+path: '/2022/6/sample-title-20220601120100'
+title: 'sample title'
+date: '20220601120100'
+category: 'sample'
+tags: ['test', 'test1', 'some longer tag']
+links: ['/zets/2022/6/20220601120000/other-20220601120000.md']
+---
+"""
+
+
+def legacy_parse(path: str) -> Dict:
+    """The previous `Zet.metadata` implementation."""
+    metadata = {}
+    with open(path, "r") as file:
+        delimeter = file.readline()
+        for line in file.readlines()[0:]:
+            if line.startswith(delimeter):
+                break
+            else:
+                name, value = line.partition(": ")[::2]
+                if "[" not in value:
+                    metadata[name.strip()] = value.rstrip().split("\'")[1]
+                else:
+                    value_list = ast.literal_eval(value.rstrip())
+                    metadata[name.strip()] = value_list
+    return metadata
+
+
+def write_zet(folder: str, name: str, body_bytes: int) -> str:
+    """Writes a zet with a body of roughly `body_bytes`."""
+    path = os.path.join(folder, name)
+    line = "some log output that goes on for a while, line after line\n"
+    with open(path, "w") as file:
+        file.write(HEADER)
+        file.write(line * max(1, body_bytes // len(line)))
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--number", type=int, default=200, help="Parses per timing.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        files = {
+            "small (1 KB)": write_zet(folder, "small.md", 1024),
+            "huge (8 MB)": write_zet(folder, "huge.md", 8 * 1024 * 1024),
+        }
+
+        print(f"{'file':<16}{'legacy (ms)':>14}{'streaming (ms)':>16}{'speedup':>10}")
+        for name, path in files.items():
+            assert parse(path) == legacy_parse(path)
+            number = args.number if "small" in name else max(1, args.number // 20)
+            legacy = min(timeit.repeat(lambda: legacy_parse(path), number=number, repeat=3)) / number
+            streaming = min(timeit.repeat(lambda: parse(path), number=number, repeat=3)) / number
+            print(f"{name:<16}{legacy * 1000:>14.4f}{streaming * 1000:>16.4f}{legacy / streaming:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
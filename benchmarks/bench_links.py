@@ -0,0 +1,97 @@
+"""Link editing benchmark.
+
+Links a hub zet to a batch of other zets, comparing the
+previous `Zet.add_link`, which rewrote the whole file with
+`fileinput` for every link, against one `Zet.update_links`
+call for the batch. The cost of `update_links` should stay
+flat as the batch grows.
+
+The benchmark zets are removed from the backlink index
+afterward.
+
+    python -m benchmarks.bench_links
+"""
+import argparse
+import ast
+import fileinput
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from zet.backlinks import BacklinkIndex
+from zet.settings import get_settings
+from zet.zet import Zet
+
+HEADER = """---
+path: '/2022/6/hub-20220601120100'
+title: 'hub'
+date: '20220601120100'
+category: 'sample'
+tags: ['test']
+links: []
+---
+"""
+
+
+def legacy_add_link(path: str, link_path: str) -> None:
+    """The previous `Zet.add_link` file rewrite."""
+    for line in fileinput.input(path, inplace=True):
+        if line.startswith("links"):
+            name, value = line.partition(": ")[::2]
+            value_list = ast.literal_eval(value.rstrip())
+            value_list.append(link_path)
+            print(f"links: {value_list}")
+        else:
+            print(line, end="")
+
+
+def write_hub(folder: str, name: str, body_bytes: int) -> str:
+    """Writes a hub zet with a body of roughly `body_bytes`."""
+    path = os.path.join(folder, name)
+    line = "some notes that go on for a while, line after line\n"
+    with open(path, "w") as file:
+        file.write(HEADER)
+        file.write(line * max(1, body_bytes // len(line)))
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--body", type=int, default=64 * 1024, help="Hub body size in bytes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 500], help="Batch sizes.")
+    args = parser.parse_args()
+
+    hubs = []
+    with tempfile.TemporaryDirectory() as folder:
+        # opens the backlink index before anything is timed
+        warm_up = write_hub(folder, "warm-up.md", args.body)
+        hubs.append(warm_up)
+        Zet(warm_up).update_links(add=[os.path.join(folder, "target.md")])
+
+        print(f"{'links':>8}{'per link (ms)':>16}{'batched (ms)':>16}{'speedup':>10}")
+        for size in args.sizes:
+            links = [os.path.join(folder, f"target-{number}.md") for number in range(size)]
+
+            legacy_hub = write_hub(folder, f"legacy-{size}.md", args.body)
+            start = time.perf_counter()
+            for link in links:
+                legacy_add_link(legacy_hub, link)
+            legacy = time.perf_counter() - start
+
+            hub = write_hub(folder, f"hub-{size}.md", args.body)
+            hubs.append(hub)
+            start = time.perf_counter()
+            Zet(hub).update_links(add=links)
+            batched = time.perf_counter() - start
+
+            assert Zet(hub).metadata["links"] == Zet(legacy_hub).metadata["links"]
+            print(f"{size:>8}{legacy * 1000:>16.2f}{batched * 1000:>16.2f}{legacy / batched:>9.1f}x")
+
+    index_path = Path(get_settings().install_path / ".env/backlinks.db")
+    with BacklinkIndex(index_path) as index:
+        index.remove_sources(hubs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""CLI startup benchmark.
+
+Times `zet --help` and a few commands' `--help` in fresh
+processes, and uses `python -X importtime` to list the
+slowest imports of `zet.main`. Fails if startup goes over
+the budget or imports a module that should only be loaded
+by the command that needs it.
+
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence, Tuple
+
+# wall time budget for `zet --help`
+BUDGET_MS = 40.0
+
+# modules that only specific commands need
+LAZY_MODULES = (
+    "ein",
+    "sqlite3",
+    "inspect",
+    "subprocess",
+    "concurrent.futures",
+    "zet.db",
+    "zet.zet",
+    "zet.search",
+    "zet.git_commands",
+    "zet.daemon",
+    "zet.export",
+    "zet.link_graph",
+)
+
+
+def wall_time(command: Sequence[str], repeat: int) -> float:
+    """Fastest of `repeat` runs of a command, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """`(self, cumulative)` import time of every module, in microseconds."""
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        check=True,
+        text=True,
+    ).stderr
+
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="Runs per timing.")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, help="Budget for `zet --help` in ms.")
+    args = parser.parse_args()
+
+    zet = shutil.which("zet") or "zet"
+    failures: List[str] = []
+
+    baseline = wall_time([sys.executable, "-c", "pass"], args.repeat)
+    print(f"{'command':<24}{'wall (ms)':>12}")
+    print(f"{'python -c pass':<24}{baseline:>12.1f}")
+    for command in (["--help"], ["list", "--help"], ["create", "--help"], ["sync", "--help"]):
+        elapsed = wall_time([zet, *command], args.repeat)
+        print(f"{'zet ' + ' '.join(command):<24}{elapsed:>12.1f}")
+        if command == ["--help"] and elapsed > args.budget:
+            failures.append(f"`zet --help` took {elapsed:.1f} ms, budget is {args.budget:.1f} ms")
+
+    times = import_times("zet.main")
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    print(f"\n{'import':<32}{'self (ms)':>12}{'cumulative (ms)':>18}")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{name:<32}{self_us / 1000:>12.2f}{cumulative_us / 1000:>18.2f}")
+
+    for module in LAZY_MODULES:
+        if module in times:
+            failures.append(f"`import zet.main` imports {module}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Synthetic Zettelkasten generator.
+
+Writes a repo of zets in the real `<year>/<month>/<id>/`
+layout, with the front matter of the default template. The
+same seed and options always write the same repo, so timings
+from different runs and machines compare like for like.
+
+Tags follow a Zipf distribution, a few tags are on most
+zets and most tags are rare, as in real notes. Links point
+back at earlier zets, with a bias toward recent ones. Body
+sizes vary around the mean, and a share of the zets get an
+image next to them.
+
+    python -m benchmarks.generator /tmp/zets --count 10000
+"""
+import argparse
+import datetime
+import itertools
+import os
+import random
+import time
+from typing import List
+
+from zet.ids import ID_FORMAT, id_folders
+
+CATEGORIES = ("journal", "reference", "project", "idea", "meeting", "reading", "howto", "log")
+
+WORDS = (
+    "graph note link index query cache tree file repo sync search tag title "
+    "metadata parser template commit branch merge daemon socket thread process "
+    "memory disk latency throughput benchmark profile allocation string list "
+    "the a of and to in is that for on with as by at from this be are or"
+).split()
+
+# smallest valid PNG, attachments only need to exist
+PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    """Cumulative Zipf weights of `count` ranks."""
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def write_body(rng: random.Random, title: str, size: int) -> str:
+    """Markdown body of roughly `size` bytes."""
+    lines = [f"# {title}", ""]
+    length = 0
+    while length < size:
+        line = " ".join(rng.choices(WORDS, k=12))
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def generate_repo(folder: str,
+                  count: int,
+                  seed: int = 0,
+                  tag_count: int = 200,
+                  tag_skew: float = 1.1,
+                  tags_per_zet: int = 3,
+                  links_per_zet: float = 2.0,
+                  body_bytes: int = 1024,
+                  attachment_ratio: float = 0.05,
+                  start: str = "20200101000000",
+                  days: int = 3 * 365) -> List[str]:
+    """Writes a repo of synthetic zets.
+
+    Params:
+        folder (str): The repo folder, created if needed.
+        count (int): Number of zets.
+        seed (int): Random seed. Defaults to 0.
+        tag_count (int): Number of distinct tags. Defaults to 200.
+        tag_skew (float): Zipf exponent of tag use, higher
+            makes popular tags more popular. Defaults to 1.1.
+        tags_per_zet (int): Most tags a zet has. Defaults to 3.
+        links_per_zet (float): Mean links per zet. Defaults to 2.
+        body_bytes (int): Mean body size. Defaults to 1024.
+        attachment_ratio (float): Share of zets with an image.
+            Defaults to 0.05.
+        start (str): Timestamp of the first zet.
+            Defaults to 2020-01-01.
+        days (int): Days the zets are spread over.
+            Defaults to three years.
+
+    Returns:
+        paths (List[str]): Paths of the zets, oldest first.
+    """
+    rng = random.Random(seed)
+    tags = [f"tag-{rank:04d}" for rank in range(tag_count)]
+    tag_weights = zipf_weights(tag_count, tag_skew)
+    first = datetime.datetime.strptime(start, ID_FORMAT)
+    step = max(1, days * 86400 // max(1, count))
+
+    paths: List[str] = []
+    made_folders = set()
+    for number in range(count):
+        zet_id = (first + datetime.timedelta(seconds=number * step)).strftime(ID_FORMAT)
+        zet_year, zet_month = id_folders(zet_id)
+
+        title = " ".join(rng.choices(WORDS[:40], k=3)) + f" {number}"
+        clean_title = title.replace(" ", "-")
+        zet_folder = os.path.join(folder, zet_year, zet_month, zet_id)
+        month_folder = os.path.dirname(zet_folder)
+        if month_folder not in made_folders:
+            os.makedirs(month_folder, exist_ok=True)
+            made_folders.add(month_folder)
+        os.mkdir(zet_folder)
+
+        zet_tags = sorted(set(rng.choices(tags, cum_weights=tag_weights, k=rng.randint(1, tags_per_zet))))
+        link_count = min(len(paths), int(rng.expovariate(1 / links_per_zet))) if links_per_zet else 0
+        # recent zets are linked more often
+        links = sorted({paths[len(paths) - 1 - int(rng.triangular(0, len(paths), 0))] for _ in range(link_count)})
+
+        path = os.path.join(zet_folder, f"{clean_title}-{zet_id}.md")
+        with open(path, "w") as file:
+            file.write(
+                "---\n"
+                f"path: '/{zet_year}/{zet_month}/{clean_title}-{zet_id}'\n"
+                f"title: '{title}'\n"
+                f"date: '{zet_id}'\n"
+                f"category: '{rng.choice(CATEGORIES)}'\n"
+                f"tags: {zet_tags}\n"
+                f"links: {links}\n"
+                "---\n\n"
+            )
+            file.write(write_body(rng, title, int(rng.lognormvariate(0, 0.5) * body_bytes)))
+
+        if rng.random() < attachment_ratio:
+            with open(os.path.join(zet_folder, "image.png"), "wb") as file:
+                file.write(PNG)
+
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Repo folder to write.")
+    parser.add_argument("-n", "--count", type=int, default=10000, help="Number of zets.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument("--tags", type=int, default=200, help="Number of distinct tags.")
+    parser.add_argument("--tag-skew", type=float, default=1.1, help="Zipf exponent of tag use.")
+    parser.add_argument("--links", type=float, default=2.0, help="Mean links per zet.")
+    parser.add_argument("--body", type=int, default=1024, help="Mean body size in bytes.")
+    parser.add_argument("--attachments", type=float, default=0.05, help="Share of zets with an image.")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    paths = generate_repo(
+        args.folder,
+        args.count,
+        seed=args.seed,
+        tag_count=args.tags,
+        tag_skew=args.tag_skew,
+        links_per_zet=args.links,
+        body_bytes=args.body,
+        attachment_ratio=args.attachments,
+    )
+    print(f"Wrote {len(paths)} zets to {args.folder} in {time.perf_counter() - start_time:0.2f} seconds")
+
+
+if __name__ == "__main__":
+    main()
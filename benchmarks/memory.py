@@ -0,0 +1,89 @@
+"""Memory of zet metadata held in memory, dicts against records.
+
+Builds the front matter of `--count` synthetic zets, with the
+tag and link distributions of `benchmarks.generator`, parses
+each one as `zet sync` does, and measures with `tracemalloc`
+what it costs to keep every zet's metadata as the parsed dict
+and as a `ZetRecord`. No files are written.
+
+    python -m benchmarks.memory --count 1000000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, Tuple
+
+from zet.frontmatter import parse_lines
+from zet.record import ZetRecord
+
+from .generator import CATEGORIES, WORDS, zipf_weights
+
+REPO = "zets"
+
+
+def front_matter(count: int, seed: int, tag_count: int = 200, links_per_zet: float = 2.0) -> Iterator[Tuple[str, List[str]]]:
+    """Path and front matter lines of synthetic zets."""
+    rng = random.Random(seed)
+    tags = [f"tag-{rank:04d}" for rank in range(tag_count)]
+    tag_weights = zipf_weights(tag_count, 1.1)
+    paths: List[str] = []
+    for number in range(count):
+        zet_id = f"2021{number:010d}"
+        title = " ".join(rng.choices(WORDS[:40], k=3)) + f" {number}"
+        clean_title = title.replace(" ", "-")
+        path = f"/home/user/zet/zets/2021/1/{zet_id}/{clean_title}-{zet_id}.md"
+        zet_tags = sorted(set(rng.choices(tags, cum_weights=tag_weights, k=rng.randint(1, 3))))
+        link_count = min(len(paths), int(rng.expovariate(1 / links_per_zet)))
+        links = sorted({paths[len(paths) - 1 - int(rng.triangular(0, len(paths), 0))] for _ in range(link_count)})
+        paths.append(path)
+        yield path, [
+            "---\n",
+            f"path: '/2021/1/{clean_title}-{zet_id}'\n",
+            f"title: '{title}'\n",
+            f"date: '{zet_id}'\n",
+            f"category: '{rng.choice(CATEGORIES)}'\n",
+            f"tags: {zet_tags}\n",
+            f"links: {links}\n",
+            "---\n",
+        ]
+
+
+def measure(build: Callable[[], list]) -> Tuple[int, float]:
+    """Bytes still allocated by what `build` returns, and its seconds."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size, seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--count", type=int, default=1000000, help="Number of zets.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    # the lines are made up front, only the kept metadata is measured
+    zets = list(front_matter(args.count, args.seed))
+
+    dict_size, dict_seconds = measure(lambda: [parse_lines(lines) for _, lines in zets])
+    record_size, record_seconds = measure(
+        lambda: [ZetRecord.from_metadata(path, REPO, parse_lines(lines)) for path, lines in zets]
+    )
+
+    print(f"{args.count} zets")
+    print(f"  {'':<10}{'MiB':>10}{'bytes/zet':>12}{'seconds':>10}")
+    for name, size, seconds in (("dicts", dict_size, dict_seconds), ("records", record_size, record_seconds)):
+        print(f"  {name:<10}{size / 2 ** 20:>10.1f}{size / args.count:>12.0f}{seconds:>10.2f}")
+    print(f"  records use {record_size / dict_size:.0%} of the memory of dicts")
+
+
+if __name__ == "__main__":
+    main()
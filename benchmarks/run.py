@@ -0,0 +1,196 @@
+"""Scaling benchmark of the hot paths.
+
+For each size a synthetic repo is written with
+`benchmarks.generator`, in a fresh install under a temporary
+home folder, and every hot path is timed against it:
+listing, metadata parsing, full and incremental syncs,
+search, tag filters, creating zets, and bulk imports.
+Each size runs in its own process so caches don't carry over.
+
+Results are saved as JSON. Pass an earlier result file as
+`--baseline` to compare, any benchmark that got slower than
+the threshold is reported and the run fails.
+
+    python -m benchmarks.run --sizes 10000 100000 --output results.json
+    python -m benchmarks.run --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# slower than baseline by this factor is a regression
+THRESHOLD = 1.25
+
+# differences smaller than this are noise, in seconds
+MIN_DIFFERENCE = 0.005
+
+
+def timed(func: Callable, repeat: int = 1) -> float:
+    """Fastest of `repeat` calls of a function, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_size(size: int, seed: int, sample: int) -> Dict[str, float]:
+    """Times every hot path against a repo of `size` zets.
+
+    Runs in a worker process with its own home folder, the
+    install is created on first use of the settings.
+    """
+    from zet.backlinks import list_backlinks
+    from zet.db import Db
+    from zet.repo import Repo
+    from zet.search import search_zets
+    from zet.settings import get_settings
+    from zet.tags import filter_zets
+    from zet.zet import Zet, bulk_import_zets, metadata_cache
+
+    from .generator import generate_repo
+
+    settings = get_settings()
+    repo_path = settings.get_default_repo_path()
+    os.makedirs(repo_path, exist_ok=True)
+
+    timings = {}
+    paths: List[str] = []
+    timings["generate"] = timed(lambda: paths.extend(generate_repo(repo_path, size, seed=seed)))
+    rng = random.Random(seed)
+    sampled = rng.sample(paths, min(sample, len(paths)))
+
+    timings["list_zets"] = timed(lambda: Repo().list_zets())
+    timings["list_zets_limit_100"] = timed(lambda: Repo().list_zets(limit=100), repeat=5)
+    timings["list_zets_one_month"] = timed(lambda: Repo().list_zets(since="2021-06", until="2021-06"), repeat=5)
+    timings[f"metadata_{len(sampled)}"] = timed(lambda: [Zet(path).metadata for path in sampled])
+
+    timings["sync_full"] = timed(lambda: Db().sync_db(full=True))
+    timings["sync_unchanged"] = timed(lambda: Db().sync_db(), repeat=3)
+    for path in paths[::100]:
+        with open(path, "a") as file:
+            file.write("edited\n")
+    timings["sync_1_percent"] = timed(lambda: Db().sync_db())
+
+    timings["search"] = timed(lambda: search_zets("graph cache"), repeat=5)
+    timings["search_prefix"] = timed(lambda: search_zets("lat*"), repeat=5)
+    timings["filter_common_tag"] = timed(lambda: filter_zets(tag=["tag-0000"]), repeat=5)
+    timings["filter_rare_tags"] = timed(lambda: filter_zets(any_tag=["tag-0150", "tag-0199"]), repeat=5)
+    timings["backlinks"] = timed(lambda: list_backlinks(paths[-1]), repeat=5)
+
+    timings["create_100"] = timed(lambda: [Zet().create("bench title", "bench", "bench, tags") for _ in range(100)], repeat=3)
+
+    with tempfile.TemporaryDirectory() as import_folder:
+        for number in range(1000):
+            with open(os.path.join(import_folder, f"note {number}.md"), "w") as file:
+                file.write("# imported\n")
+        timings["bulk_import_1000"] = timed(lambda: bulk_import_zets(import_folder), repeat=3)
+
+    metadata_cache.save()
+    return timings
+
+
+def run_worker(size: int, seed: int, sample: int) -> Dict[str, float]:
+    """Runs one size in a fresh process and home folder."""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, ZET_NO_DAEMON="1")
+        env.pop("ZET_STAGE", None)
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", str(size),
+             "--seed", str(seed), "--sample", str(sample)],
+            env=env,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE,
+            check=True,
+            text=True,
+        ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def git_revision() -> str:
+    """Commit being benchmarked, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    """Prints the change from a baseline and lists regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<24}{'size':>10}{'baseline (s)':>14}{'now (s)':>12}{'ratio':>8}")
+    for size, timings in results["sizes"].items():
+        for name, seconds in timings.items():
+            before = baseline.get("sizes", {}).get(size, {}).get(name)
+            if before is None or name == "generate":
+                continue
+            ratio = seconds / before if before else float("inf")
+            regressed = ratio > threshold and seconds - before > MIN_DIFFERENCE
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{name:<24}{size:>10}{before:>14.4f}{seconds:>12.4f}{ratio:>8.2f}{flag}")
+            if regressed:
+                regressions.append(f"{name} at {size} zets: {before:.4f}s -> {seconds:.4f}s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Repo sizes, in zets.")
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed.")
+    parser.add_argument("--sample", type=int, default=1000, help="Zets read by the metadata benchmark.")
+    parser.add_argument("-o", "--output", help="Save the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against an earlier results file.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="Slowdown that counts as a regression.")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        print(json.dumps(run_size(args.worker, args.seed, args.sample)))
+        return 0
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": args.seed,
+        },
+        "sizes": {},
+    }
+    for size in args.sizes:
+        timings = run_worker(size, args.seed, args.sample)
+        results["sizes"][str(size)] = timings
+        print(f"\n{size} zets")
+        for name, seconds in timings.items():
+            print(f"  {name:<24}{seconds:>10.4f} s")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(json.load(file), results, args.threshold)
+        for regression in regressions:
+            print(f"FAIL: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
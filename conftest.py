@@ -6,6 +6,7 @@ from typing import Dict, List, Union
 
 import pytest
 
+from src.zet.changes import record_changes
 from src.zet.git_commands import git_add_zets, git_init_zets
 from src.zet.repo import Repo
 from src.zet.settings import Settings
@@ -103,5 +104,7 @@ def zet_git_repo_changes(zet_settings: Settings, zet_git_repo) -> str:
     new_file = open(new_file_path, "w")
     new_file.writelines(["some text", "some other text"])
     new_file.close()
+    # journaled like a file the CLI wrote
+    record_changes([new_file_path])
     git_add_zets(zet_settings.get_default_repo())
 
@@ -25,5 +25,5 @@ setuptools.setup(
     entry_points={
         "console_scripts": ["zet=zet.main:main"]
     },
-    python_requires=">=3.6",
+    python_requires=">=3.7",
 )
@@ -0,0 +1,169 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+from .settings import get_settings
+
+settings = get_settings()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    target TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (target, source)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_links_source
+    ON links(source);
+"""
+
+
+class BacklinkIndex:
+    """Reverse index of zet links.
+
+    Links are stored in each zet as a list of outgoing
+    paths. This index maps every link target back to the
+    zets that link to it, so finding what points at a zet
+    is a single index lookup instead of a scan of every zet.
+
+    The index is a SQLite database next to the zets DB. It's
+    kept up to date by `Db.sync_db` and by `Zet.add_link` and
+    `Zet.delete_link`.
+    """
+
+    def __init__(self, index_path: Path) -> None:
+        """Opens or creates the index.
+
+        Params:
+            index_path (Path): Path to the index database.
+
+        Returns:
+            None
+        """
+        self.index_path = index_path
+        self.created = not index_path.exists()
+        self._connection = sqlite3.connect(index_path.as_posix())
+        self._connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "BacklinkIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def backlinks(self, target: str) -> List[str]:
+        """Zets that link to a zet.
+
+        Params:
+            target (str): Path to a zet.
+
+        Returns:
+            sources (List[str]): Paths of the linking zets.
+        """
+        rows = self._connection.execute("SELECT source FROM links WHERE target = ? ORDER BY source", (target,))
+        return [source for source, in rows]
+
+    def add(self, source: str, targets: Iterable[str]) -> None:
+        """Adds links from a zet.
+
+        Params:
+            source (str): Path to the linking zet.
+            targets (Iterable[str]): Paths it links to.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO links (target, source) VALUES (?, ?)",
+                [(target, source) for target in targets],
+            )
+
+    def remove(self, source: str, targets: Iterable[str]) -> None:
+        """Removes links from a zet.
+
+        Params:
+            source (str): Path to the linking zet.
+            targets (Iterable[str]): Paths it no longer links to.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM links WHERE target = ? AND source = ?",
+                [(target, source) for target in targets],
+            )
+
+    def set_links(self, source: str, targets: Iterable[str]) -> None:
+        """Replaces every link from a zet.
+
+        Params:
+            source (str): Path to the linking zet.
+            targets (Iterable[str]): Every path it links to.
+
+        Returns:
+            None
+        """
+        self.set_many([(source, targets)])
+
+    def set_many(self, items: Iterable[Tuple[str, Iterable[str]]]) -> None:
+        """Replaces every link from many zets in one transaction.
+
+        Params:
+            items (Iterable[Tuple[str, Iterable[str]]]): Path to
+                each linking zet, with every path it links to.
+
+        Returns:
+            None
+        """
+        sources = []
+        links = []
+        for source, targets in items:
+            sources.append((source,))
+            links.extend((target, source) for target in targets)
+
+        with self._connection:
+            self._connection.executemany("DELETE FROM links WHERE source = ?", sources)
+            self._connection.executemany("INSERT OR IGNORE INTO links (target, source) VALUES (?, ?)", links)
+
+    def remove_sources(self, sources: Iterable[str]) -> None:
+        """Removes every link from some zets, for deleted zets.
+
+        Params:
+            sources (Iterable[str]): Paths to the linking zets.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            self._connection.executemany("DELETE FROM links WHERE source = ?", [(source,) for source in sources])
+
+    def clear(self) -> None:
+        """Removes every link."""
+        with self._connection:
+            self._connection.execute("DELETE FROM links")
+        self.created = False
+
+    def close(self) -> None:
+        """Closes the index database."""
+        self._connection.close()
+
+
+def list_backlinks(path: str, full_path: bool = False) -> List[str]:
+    """Lists the zets that link to a zet.
+
+    Params:
+        path (str): Path to a zet.
+        full_path (bool): Determines if full file paths will
+            be provided. Defaults to False.
+
+    Returns:
+        zets (List[str]): List of linking zets.
+    """
+    with BacklinkIndex(Path(settings.install_path / ".env/backlinks.db")) as index:
+        sources = index.backlinks(os.path.abspath(os.path.expanduser(path)))
+    if full_path:
+        return sources
+    return [os.path.basename(source) for source in sources]
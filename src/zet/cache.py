@@ -0,0 +1,213 @@
+import atexit
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .metrics import inc
+
+
+class MetadataCache:
+    """On-disk cache of parsed zet metadata.
+
+    Parsing the metadata of a zet means opening the file
+    and reading every line of the header. Most zets don't
+    change between calls, so the parsed metadata is stored
+    next to the DB and keyed by the zet path.
+
+    Each entry is validated by the `(st_mtime_ns, st_size)` of
+    the file. If either changes the zet is parsed again, otherwise
+    the file is never opened.
+
+    The cache is written back to disk when the process exits,
+    or when `save()` is called.
+    """
+
+    # batches with fewer misses than this are parsed in-process,
+    # starting a process pool costs more than it saves
+    parallel_threshold = 512
+
+    def __init__(self, cache_path: Path) -> None:
+        """The cache is a JSON file stored in the environment path.
+
+        Params:
+            cache_path (Path): Path to the cache file. It
+                doesn't need to exist yet.
+
+        Returns:
+            None
+        """
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._dirty = False
+        atexit.register(self.save)
+
+    @property
+    def entries(self) -> Dict:
+        """Cache entries, loaded from disk on first use.
+
+        Each entry is `path: [st_mtime_ns, st_size, metadata]`.
+        A missing or unreadable cache file starts an empty cache.
+        """
+        if self._entries is None:
+            try:
+                with self.cache_path.open("r") as file:
+                    self._entries = json.load(file)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, path: str, loader: Callable[[str], Dict]) -> Dict:
+        """Get the metadata of a zet.
+
+        Params:
+            path (str): Path to a zet file.
+            loader (Callable[[str], Dict]): Parses the metadata
+                of a zet when the cache entry is missing or stale.
+
+        Returns:
+            metadata (Dict): A copy of the metadata, callers
+                are free to change it.
+
+        Raises:
+            FileNotFoundError
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.discard(path)
+            raise
+
+        entry = self.entries.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            self.hits += 1
+            inc("metadata_cache_hits_total")
+            metadata = entry[2]
+        else:
+            self.misses += 1
+            inc("metadata_cache_misses_total")
+            inc("files_opened_total")
+            metadata = loader(path)
+            self.entries[path] = [stat.st_mtime_ns, stat.st_size, metadata]
+            self._dirty = True
+
+        return self._copy(metadata)
+
+    def get_many(self,
+                 paths: Iterable[str],
+                 loader: Callable[[str], Dict],
+                 stats: Optional[Dict[str, List[int]]] = None,
+                 workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Get the metadata of many zets at once.
+
+        Cache misses are parsed in a process pool sized to the
+        available cores, so the loader must be a module-level
+        function. Zets that no longer exist are left out.
+
+        Params:
+            paths (Iterable[str]): Paths to zet files.
+            loader (Callable[[str], Dict]): Parses the metadata
+                of a zet when the cache entry is missing or stale.
+            stats (Optional[Dict[str, List[int]]]): Known
+                `[st_mtime_ns, st_size]` of each path, saves a
+                stat call per zet. Defaults to None.
+            workers (Optional[int]): Number of processes. Defaults
+                to the number of cores.
+
+        Returns:
+            metadata (Dict[str, Dict]): A copy of the metadata
+                of each zet, by path.
+        """
+        results = {}
+        misses = []
+        hits = self.hits
+        for path in paths:
+            if stats and path in stats:
+                mtime_ns, size = stats[path]
+            else:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    self.discard(path)
+                    continue
+                mtime_ns, size = stat.st_mtime_ns, stat.st_size
+
+            entry = self.entries.get(path)
+            if entry and entry[0] == mtime_ns and entry[1] == size:
+                self.hits += 1
+                results[path] = self._copy(entry[2])
+            else:
+                misses.append((path, mtime_ns, size))
+
+        inc("metadata_cache_hits_total", self.hits - hits)
+        if not misses:
+            return results
+
+        miss_paths = [path for path, _, _ in misses]
+        workers = workers or os.cpu_count() or 1
+        if workers > 1 and len(misses) >= self.parallel_threshold:
+            # imported here, process pools are slow to import
+            # and most calls only have a few misses
+            from concurrent.futures import ProcessPoolExecutor
+
+            chunksize = max(1, len(misses) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parsed = list(executor.map(loader, miss_paths, chunksize=chunksize))
+        else:
+            parsed = [loader(path) for path in miss_paths]
+
+        self.misses += len(misses)
+        inc("metadata_cache_misses_total", len(misses))
+        inc("files_opened_total", len(misses))
+        for (path, mtime_ns, size), metadata in zip(misses, parsed):
+            self.entries[path] = [mtime_ns, size, metadata]
+            results[path] = self._copy(metadata)
+        self._dirty = True
+
+        return results
+
+    def discard(self, path: str) -> None:
+        """Removes a zet from the cache."""
+        if self.entries.pop(path, None) is not None:
+            self._dirty = True
+
+    def clear(self) -> None:
+        """Removes every entry and resets the counters."""
+        self._entries = {}
+        self._dirty = True
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss, and entry counts."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+        }
+
+    def save(self) -> None:
+        """Writes the cache to disk if anything changed.
+
+        The file is written to a temporary path then moved
+        over the cache, so a crash never leaves a partial file.
+        Nothing is written if the environment folder is gone.
+        """
+        if not self._dirty or not self.cache_path.parent.exists():
+            return
+
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        with tmp_path.open("w") as file:
+            json.dump(self._entries, file)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    @staticmethod
+    def _copy(metadata: Dict) -> Dict:
+        """Copies metadata so cached lists can't be changed."""
+        return {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in metadata.items()
+        }
@@ -0,0 +1,160 @@
+"""Journal of the zets the CLI has changed.
+
+`git add .` makes git stat every file in a repo and hash any
+that look changed, which takes seconds on large repos. The
+CLI already knows which zets it touched, so those are kept in
+a journal and `zet add` stages only them.
+
+Zets are recorded when they're created or imported, when
+their links are edited, and when `zet sync` or `zet watch`
+finds them added, changed, or deleted. Each repo has its own
+journal, `~/zet/.env/changes/<repo>`, of NUL separated paths
+relative to the repo folder. Recording appends to the file,
+so it's cheap enough to do on every write.
+"""
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .repo import get_repo_resolver
+from .settings import get_settings
+
+settings = get_settings()
+
+
+class ChangeJournal:
+    """Changed zet paths of each repo, waiting to be staged.
+
+    A repo without a journal hasn't been staged with the
+    journal yet, so its changes aren't known. Once staged,
+    the repo keeps an empty journal until something changes.
+
+    Staging takes the journal by renaming it, new changes go
+    to a new journal while git runs. If staging fails the
+    taken paths are put back.
+    """
+
+    def __init__(self, journal_folder: Path) -> None:
+        """Journals are files in the environment path.
+
+        Params:
+            journal_folder (Path): Folder of the journals. It
+                doesn't need to exist yet.
+
+        Returns:
+            None
+        """
+        self.journal_folder = journal_folder
+
+    def record(self, paths: Iterable[str]) -> None:
+        """Records changed files.
+
+        Params:
+            paths (Iterable[str]): Paths of changed files.
+                Paths outside every repo are skipped.
+
+        Returns:
+            None
+        """
+        resolver = get_repo_resolver()
+        changed: Dict[str, List[str]] = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            repo_name = resolver.resolve(path)
+            if repo_name is not None:
+                changed.setdefault(repo_name, []).append(
+                    os.path.relpath(path, settings.get_repo_path(repo_name))
+                )
+        if not changed:
+            return
+
+        os.makedirs(self.journal_folder, exist_ok=True)
+        for repo_name, repo_paths in changed.items():
+            with open(self._path(repo_name), "ab") as file:
+                file.write(b"".join(os.fsencode(path) + b"\0" for path in repo_paths))
+
+    def take(self, repo_name: str) -> Optional[List[str]]:
+        """Takes the changes of a repo for staging.
+
+        Finish with `done()` after staging, or `restore()`
+        if staging failed.
+
+        Params:
+            repo_name (str): A zet repo name.
+
+        Returns:
+            paths (Optional[List[str]]): Changed paths, relative to
+                the repo folder and without duplicates, or None if
+                the repo has no journal.
+        """
+        journal_path = self._path(repo_name)
+        taken_path = self._path(repo_name, ".staging")
+        claimed_path = self._path(repo_name, ".claimed")
+        try:
+            os.replace(journal_path, claimed_path)
+        except FileNotFoundError:
+            if not taken_path.exists():
+                return None
+        else:
+            # changes left by staging that never finished come first
+            with open(claimed_path, "rb") as claimed, open(taken_path, "ab") as taken:
+                taken.write(claimed.read())
+            os.remove(claimed_path)
+
+        with open(taken_path, "rb") as file:
+            paths = [os.fsdecode(path) for path in file.read().split(b"\0") if path]
+        return list(dict.fromkeys(paths))
+
+    def done(self, repo_name: str) -> None:
+        """Drops the taken changes of a repo after staging.
+
+        Also starts the journal of a repo that didn't have one.
+
+        Params:
+            repo_name (str): A zet repo name.
+
+        Returns:
+            None
+        """
+        os.makedirs(self.journal_folder, exist_ok=True)
+        open(self._path(repo_name), "ab").close()
+        try:
+            os.remove(self._path(repo_name, ".staging"))
+        except FileNotFoundError:
+            pass
+
+    def restore(self, repo_name: str) -> None:
+        """Puts the taken changes of a repo back in its journal.
+
+        Params:
+            repo_name (str): A zet repo name.
+
+        Returns:
+            None
+        """
+        taken_path = self._path(repo_name, ".staging")
+        try:
+            with open(taken_path, "rb") as taken, open(self._path(repo_name), "ab") as journal:
+                journal.write(taken.read())
+        except FileNotFoundError:
+            return
+        os.remove(taken_path)
+
+    def _path(self, repo_name: str, suffix: str = "") -> Path:
+        """Path to the journal of a repo."""
+        return self.journal_folder / (repo_name + suffix)
+
+
+change_journal = ChangeJournal(Path(settings.install_path / ".env/changes"))
+
+
+def record_changes(paths: Iterable[str]) -> None:
+    """Records changed zets in the journal of their repo.
+
+    Params:
+        paths (Iterable[str]): Paths of changed files.
+
+    Returns:
+        None
+    """
+    change_journal.record(paths)
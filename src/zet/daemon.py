@@ -0,0 +1,280 @@
+"""Resident process that answers CLI commands over a socket.
+
+Every `zet` command starts an interpreter, imports its modules,
+and reads its indexes before doing any work. `zet daemon` does
+that once and then serves commands over a Unix domain socket,
+`~/zet/.env/zet.sock`. While it runs, `zet` forwards read and
+sync commands to it and prints the reply, and falls back to
+running them itself when it isn't running.
+
+The protocol is one JSON object per line. A request is
+
+    {"op": "run", "argv": ["search", "graph"], "cwd": "/home/me"}
+
+and the reply is
+
+    {"status": 0, "stdout": "...", "stderr": ""}
+
+Editor integrations can talk to the socket directly to skip
+starting an interpreter at all. `{"op": "ping"}` checks that
+the daemon is up and `{"op": "stop"}` shuts it down.
+
+Requests are served one at a time, so commands never race
+each other over the indexes.
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .settings import get_settings
+
+settings = get_settings()
+
+# commands that can run in the daemon, every other command
+# needs the terminal (an editor, git prompts) or runs forever
+DAEMON_COMMANDS = frozenset(("list", "search", "backlinks", "graph", "link", "sync", "stats"))
+
+
+class DaemonNotRunningException(Exception):
+    """No daemon is listening on the socket."""
+    pass
+
+
+def socket_path() -> Path:
+    """Path to the daemon socket of this install."""
+    return Path(settings.install_path / ".env/zet.sock")
+
+
+def request(message: Dict, path: Optional[Path] = None, timeout: Optional[float] = None) -> Dict:
+    """Sends one request to the daemon.
+
+    Params:
+        message (Dict): The request.
+        path (Optional[Path]): Socket path. Defaults to
+            the socket of this install.
+        timeout (Optional[float]): Seconds to wait for the
+            reply. Defaults to waiting until it's done.
+
+    Returns:
+        reply (Dict): The reply.
+
+    Raises:
+        DaemonNotRunningException
+    """
+    path = path or socket_path()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            client.connect(path.as_posix())
+        except (FileNotFoundError, ConnectionRefusedError) as error:
+            raise DaemonNotRunningException(f"No daemon at {path}") from error
+
+        client.settimeout(timeout)
+        try:
+            client.sendall(json.dumps(message).encode() + b"\n")
+            with client.makefile("rb") as reader:
+                line = reader.readline()
+        except (BrokenPipeError, ConnectionResetError):
+            # the daemon stopped while this request was queued
+            line = b""
+    finally:
+        client.close()
+
+    if not line:
+        raise DaemonNotRunningException(f"Daemon at {path} closed the connection")
+    return json.loads(line)
+
+
+def forward(argv: Sequence[str]) -> Optional[int]:
+    """Runs a command in the daemon, if one is running.
+
+    Params:
+        argv (Sequence[str]): Command line arguments, without
+            the program name.
+
+    Returns:
+        status (Optional[int]): Exit status of the command,
+            or None if it wasn't forwarded.
+    """
+    try:
+        reply = request({"op": "run", "argv": list(argv), "cwd": os.getcwd()})
+    except DaemonNotRunningException:
+        return None
+
+    sys.stdout.write(reply["stdout"])
+    sys.stderr.write(reply["stderr"])
+    return reply["status"]
+
+
+def run_command(argv: List[str], cwd: str) -> Dict:
+    """Runs a command in this process, capturing its output.
+
+    Params:
+        argv (List[str]): Command line arguments.
+        cwd (str): Working directory of the caller, relative
+            paths in the arguments are resolved from it.
+
+    Returns:
+        reply (Dict): Exit status, stdout, and stderr.
+    """
+    from .main import main
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    previous_cwd = os.getcwd()
+    status = 0
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                status = main(argv, use_daemon=False)
+            except SystemExit as error:
+                # argparse errors and `--help`
+                if isinstance(error.code, int) or error.code is None:
+                    status = error.code or 0
+                else:
+                    print(error.code, file=sys.stderr)
+                    status = 1
+            except Exception:
+                traceback.print_exc()
+                status = 1
+    except OSError as error:
+        print(error, file=stderr)
+        status = 1
+    finally:
+        os.chdir(previous_cwd)
+
+    return {"status": status, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def handle(message: Dict) -> Dict:
+    """Answers one request.
+
+    Params:
+        message (Dict): The request.
+
+    Returns:
+        reply (Dict): The reply.
+    """
+    op = message.get("op", "run")
+    if op == "ping":
+        return {"status": 0, "stdout": "", "stderr": "", "pid": os.getpid()}
+    if op == "stop":
+        return {"status": 0, "stdout": "Daemon stopped\n", "stderr": ""}
+    if op != "run":
+        return {"status": 2, "stdout": "", "stderr": f"Unknown op: {op}\n"}
+
+    argv = [str(arg) for arg in message.get("argv", [])]
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    if command not in DAEMON_COMMANDS:
+        return {"status": 2, "stdout": "", "stderr": f"Command can't run in the daemon: {command}\n"}
+    return run_command(argv, message.get("cwd") or os.getcwd())
+
+
+def warm_up() -> None:
+    """Imports every daemon command and loads what they share."""
+    from .main import load_function
+    from .repo import get_repo_resolver
+
+    for command in DAEMON_COMMANDS:
+        load_function(command)
+    get_repo_resolver()
+
+
+def serve(path: Optional[Path] = None) -> None:
+    """Serves requests until a stop request.
+
+    Params:
+        path (Optional[Path]): Socket path. Defaults to
+            the socket of this install.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: Another daemon is already running.
+    """
+    path = path or socket_path()
+    try:
+        request({"op": "ping"}, path, timeout=1.0)
+    except DaemonNotRunningException:
+        pass
+    else:
+        raise RuntimeError(f"A daemon is already running at {path}")
+
+    # a socket left behind by a daemon that was killed
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        server.bind(path.as_posix())
+        os.chmod(path, 0o600)
+        server.listen(16)
+
+        running = True
+        while running:
+            connection, _ = server.accept()
+            # a client that never sends its request can't stall the daemon
+            connection.settimeout(5.0)
+            with connection, connection.makefile("rwb") as stream:
+                try:
+                    line = stream.readline()
+                except socket.timeout:
+                    continue
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    message = None
+                if not isinstance(message, dict):
+                    reply = {"status": 2, "stdout": "", "stderr": "Request isn't a JSON object\n"}
+                else:
+                    reply = handle(message)
+                    running = message.get("op") != "stop"
+                stream.write(json.dumps(reply).encode() + b"\n")
+                with contextlib.suppress(BrokenPipeError):
+                    stream.flush()
+    finally:
+        # unlinked first, so new clients don't queue on a closing socket
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        server.close()
+
+
+def run_daemon(stop: bool = False) -> None:
+    """Starts the daemon in the foreground, or stops a running one.
+
+    Params:
+        stop (bool): Stop the running daemon. Defaults to False.
+
+    Returns:
+        None
+    """
+    if stop:
+        try:
+            print(request({"op": "stop"}, timeout=5.0)["stdout"], end="")
+        except DaemonNotRunningException:
+            print("No daemon is running")
+        return
+
+    from .metrics import metrics
+
+    # the daemon always counts, `zet stats --metrics` reads them live
+    metrics.enable()
+
+    start_time = time.perf_counter()
+    warm_up()
+    print(f"Serving on {socket_path()}, loaded in {time.perf_counter() - start_time:0.4f} seconds")
+    sys.stdout.flush()
+    try:
+        serve()
+    except KeyboardInterrupt:
+        pass
@@ -1,16 +1,33 @@
+import json
+import os
+import sqlite3
 import time
 from pathlib import Path
-from typing import List, Union
+from stat import S_ISREG
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from ein.edge import Edge
 from ein.graph import Graph
 from ein.node import Node
 
-from .repo import Repo
-from .settings import Settings
-from .zet import Zet
+from . import frontmatter
+from .backlinks import BacklinkIndex
+from .changes import record_changes
+from .link_graph import LinkGraph
+from .metrics import inc, observe
+from .record import ZetRecord
+from .repo import Repo, get_repo_resolver, is_zet_path
+from .search import SearchIndex
+from .settings import get_settings
+from .tags import TagIndex
+from .timings import span
+from .zet import metadata_cache
 
-settings = Settings()
+settings = get_settings()
+
+# link graph built by `load_link_graph()`, with the
+# `(st_mtime_ns, st_size)` of the DB it was built from
+_link_graph_cache: Dict[str, Tuple[Tuple[int, int], LinkGraph]] = {}
 
 
 class Db:
@@ -19,33 +36,80 @@ class Db:
     This stores a searchable representation of the categories,
     tags, and other metadata associated with each note file.
     Synchronizing the DB is recommended if anything has changed
-    in the DB other than additions to a repo.
+    in the repos since the last sync.
 
     The DB will always store **all** zets from every repo, ensuring
     that every note is available for linking and searching.
     """
 
     def __init__(self) -> None:
-        """The DB is a file stored in the environment path."""
+        """The DB is a file stored in the environment path.
+
+        A manifest of every indexed zet and its file stats
+        is stored alongside it for incremental syncs, along
+        with the full-text search, tag, and backlink indexes.
+        """
         self.db_path = Path(settings.install_path / ".env/zets.db")
-        self.db = Graph(db_path=self.db_path.as_posix())
+        self.manifest_path = Path(settings.install_path / ".env/manifest.json")
+        with span("ein load"):
+            self.db = Graph(db_path=self.db_path.as_posix())
+        self.search_index = SearchIndex(Path(settings.install_path / ".env/search.db"))
+        self.tag_index = TagIndex(Path(settings.install_path / ".env/tags.db"))
+        self.backlink_index = BacklinkIndex(Path(settings.install_path / ".env/backlinks.db"))
 
-    def sync_db(self) -> None:
+    def sync_db(self, full: bool = False) -> None:
         """Synchronize the DB with fresh data.
 
-        Creates a new database that has all data from every
+        By default only the zets that were added, changed, or
+        deleted since the last sync are re-indexed. Changes are
+        found by comparing each zet's file stats against the
+        manifest written by the previous sync.
+
+        A full sync creates a new database that has all data from every
         repository. The zets are converted to nodes based on their
         metadata and the links within each zet are converted to edges
-        to connect nodes.
+        to connect nodes. This happens automatically if there is no
+        manifest yet.
+
+        The full-text search, tag, and backlink indexes are
+        updated with the same changes.
 
-        Calling this is best used when the repos have had some updates
-        separate from just additions. The database doesn't support updates
-        or deletions to avoid complexity. It's often easier to just recreate
-        the DB from scratch.
+        Params:
+            full (bool): Rebuild the DB from scratch. Defaults to False.
+
+        Returns:
+            None
         """
         # db creation start time
         start_time = time.perf_counter()
 
+        manifest = self._load_manifest()
+        if full or manifest is None:
+            manifest = self._rebuild_db()
+            action = "Created"
+        else:
+            manifest = self._update_db(manifest)
+            action = "Updated"
+
+        with span("index save"):
+            self._save_manifest(manifest)
+            self.tag_index.save()
+
+            # keep parsed metadata for the next sync
+            metadata_cache.save()
+
+        # db creation end time
+        end_time = time.perf_counter()
+        observe("sync_seconds", end_time - start_time, mode="full" if action == "Created" else "incremental")
+        print(f"{action} database in {end_time - start_time:0.4f} seconds")
+
+    def _rebuild_db(self) -> Dict[str, Dict[str, List[int]]]:
+        """Recreates the DB from every repository.
+
+        Returns:
+            manifest (Dict[str, Dict[str, List[int]]]): File stats
+                of every indexed zet, by repo name.
+        """
         # removes current DB path then recreates it
         # this is to start fresh on any new data that was
         # added to the DB or changed
@@ -54,76 +118,472 @@ class Db:
             self.db_path.unlink()
             self.db = Graph(db_path=self.db_path.as_posix())
 
-        # all repos
-        repos = [Repo(repo_path) for repo_path in settings.get_repo_names()]
+        self.tag_index.clear()
+        self.backlink_index.clear()
 
-        # all zets
-        zets = []
-        for repo in repos:
-            # add schema for repo
-            self.db.add_schema(repo.repo_name)
+        # each repo is listed once and indexed into its own schema
+        manifest = {}
+        for repo_name in settings.get_repo_names():
+            self.db.add_schema(repo_name)
+            manifest[repo_name] = self._stat_zets(Repo(repo_name))
 
-            nodes = []
-            edges = []
+        self._index_zets(manifest)
+        with span("search index"):
+            self.search_index.rebuild(path for repo_stats in manifest.values() for path in repo_stats)
 
-            # get all nodes
-            zets += [Zet(zet_path) for zet_path in repo.list_zets(full_path=True)]
+        return manifest
 
-            # create nodes and edges for each zet
-            nodes += [self._construct_node(zet) for zet in zets]
-            for zet in zets:
-                edges += self._construct_edges(zet)
+    def _update_db(self, manifest: Dict[str, Dict[str, List[int]]]) -> Dict[str, Dict[str, List[int]]]:
+        """Re-indexes zets that changed since the last sync.
 
-            # add to DB for the repo
-            self.db.add_nodes(schema_name=repo.repo_name, nodes=nodes)
-            self.db.add_edges(schema_name=repo.repo_name, edges=edges)
+        Added zets get new nodes and edges, changed zets have
+        their node and outgoing edges replaced, and deleted zets
+        have their node and every edge touching it removed. Zets
+        that are restored get their incoming edges back too.
 
-        # db creation end time
-        end_time = time.perf_counter()
-        print(f"Created database in {end_time - start_time:0.4f} seconds")
+        Nodes are written for all repos before any edges so
+        links between repos always have both nodes present.
+
+        Params:
+            manifest (Dict[str, Dict[str, List[int]]]): File stats
+                from the previous sync, by repo name.
+
+        Returns:
+            manifest (Dict[str, Dict[str, List[int]]]): File stats
+                of every indexed zet, by repo name.
+        """
+        new_manifest = {}
+        fresh = {}
+        stale = {}
+        deleted = set()
+
+        for repo_name in settings.get_repo_names():
+            repo = Repo(repo_name)
+            if repo_name not in self.db.schemas:
+                self.db.add_schema(repo_name)
+
+            current = self._stat_zets(repo)
+            indexed = manifest.get(repo_name, {})
+
+            fresh[repo_name] = [path for path, stat in current.items() if indexed.get(path) != stat]
+            stale[repo_name] = [path for path, stat in indexed.items() if current.get(path) != stat]
+            deleted.update(path for path in indexed if path not in current)
+            new_manifest[repo_name] = current
+
+        # repos that were removed from settings
+        for repo_name in manifest.keys() - new_manifest.keys():
+            deleted.update(manifest[repo_name])
+            if repo_name in self.db.schemas:
+                self.db.delete_schema(repo_name)
+
+        self._apply_changes(new_manifest, fresh, stale, deleted)
+        return new_manifest
+
+    def sync_paths(self, paths: Iterable[str]) -> None:
+        """Re-indexes only some paths.
+
+        Like an incremental `sync_db()`, without listing every
+        repo. Used by `zet watch` with the paths that changed on
+        disk. A path can be a zet, or a folder to re-check every
+        zet in it, including zets that were removed with it.
+        Paths that aren't zets in a repo are ignored.
+
+        Falls back to `sync_db()` if nothing has been synced yet.
+
+        Params:
+            paths (Iterable[str]): Changed files or folders.
+
+        Returns:
+            None
+        """
+        manifest = self._load_manifest()
+        if manifest is None:
+            self.sync_db()
+            return
+
+        # the repo each indexed zet is in right now
+        indexed_repos = {path: repo_name for repo_name, repo_stats in manifest.items() for path in repo_stats}
+        resolver = get_repo_resolver()
+
+        candidates = set()
+        folders = []
+        for path in paths:
+            path = os.path.abspath(path)
+            candidates.add(path)
+            if os.path.isdir(path):
+                repo_name = resolver.resolve(path)
+                if repo_name:
+                    candidates.update(zet.path for zet in Repo(repo_name).iter_zets(path))
+            if path not in indexed_repos:
+                # a folder, or a removed one
+                folders.append(os.path.join(path, ""))
+
+        if folders:
+            prefixes = tuple(folders)
+            candidates.update(indexed for indexed in indexed_repos if indexed.startswith(prefixes))
+
+        fresh = {}
+        stale = {}
+        deleted = set()
+        for path in candidates:
+            repo_name = resolver.resolve(path)
+            current = None
+            if repo_name and is_zet_path(os.path.relpath(path, settings.get_repo_path(repo_name))):
+                try:
+                    stat = os.stat(path)
+                    if S_ISREG(stat.st_mode):
+                        current = [stat.st_mtime_ns, stat.st_size]
+                except (FileNotFoundError, NotADirectoryError):
+                    pass
+
+            indexed_repo = indexed_repos.get(path)
+            if indexed_repo is not None:
+                if indexed_repo == repo_name and manifest[indexed_repo][path] == current:
+                    continue
+                stale.setdefault(indexed_repo, []).append(path)
+                del manifest[indexed_repo][path]
+                if current is None:
+                    deleted.add(path)
+
+            if current is not None:
+                if repo_name not in self.db.schemas:
+                    self.db.add_schema(repo_name)
+                fresh.setdefault(repo_name, []).append(path)
+                manifest.setdefault(repo_name, {})[path] = current
+
+        inc("files_stat_total", len(candidates))
+        if fresh or stale:
+            self._apply_changes(manifest, fresh, stale, deleted)
+            self._save_manifest(manifest)
+            self.tag_index.save()
+            metadata_cache.save()
+
+    def _apply_changes(self,
+                       manifest: Dict[str, Dict[str, List[int]]],
+                       fresh: Dict[str, List[str]],
+                       stale: Dict[str, List[str]],
+                       deleted: Set[str]) -> None:
+        """Writes a set of changed zets to the DB and indexes.
+
+        Params:
+            manifest (Dict[str, Dict[str, List[int]]]): File stats
+                of every zet after the changes, by repo name.
+            fresh (Dict[str, List[str]]): Added or changed zets to
+                index, by repo name.
+            stale (Dict[str, List[str]]): Changed or removed zets to
+                drop from the DB, by the repo they were indexed in.
+            deleted (Set[str]): Zets that no longer exist.
+
+        Returns:
+            None
+        """
+        # zets without a node, their incoming edges are added
+        # once every changed zet's links are indexed
+        added = [path for paths in fresh.values() for path in paths if path not in self.db.nodes]
+
+        # drop outdated nodes, their outgoing edges, and links
+        # into deleted zets from anywhere
+        with span("ein delete"):
+            self._delete_from_db(stale, deleted)
+        stale_paths = {path for paths in stale.values() for path in paths}
+        for path in stale_paths:
+            self.db.nodes.pop(path, None)
+        self.db.edges = [
+            edge for edge in self.db.edges
+            if edge.source.id not in stale_paths and edge.target.id not in deleted
+        ]
+
+        self.tag_index.remove(deleted)
+        self.backlink_index.remove_sources(deleted)
+        self._index_zets({
+            repo_name: {path: manifest[repo_name][path] for path in paths}
+            for repo_name, paths in fresh.items()
+        })
+
+        # missing metadata indexes are built from every zet
+        if self.tag_index.created or self.backlink_index.created:
+            for repo_name, repo_stats in manifest.items():
+                self._index_metadata(
+                    repo_name,
+                    metadata_cache.get_many(repo_stats, frontmatter.parse, stats=repo_stats),
+                )
+            self.backlink_index.created = False
+
+        with span("node/edge build"):
+            edges = self._construct_incoming_edges(added, skip={path for paths in fresh.values() for path in paths})
+        with span("ein insert"):
+            for schema_name, schema_edges in edges.items():
+                self.db.add_edges(schema_name=schema_name, edges=schema_edges)
+                inc("ein_edges_written_total", len(schema_edges))
+
+        # a missing search index is built from every zet
+        with span("search index"):
+            if self.search_index.created:
+                self.search_index.rebuild(path for repo_stats in manifest.values() for path in repo_stats)
+            else:
+                self.search_index.remove(deleted)
+                self.search_index.update(path for paths in fresh.values() for path in paths)
+
+        # staged by the next `zet add`
+        record_changes([path for paths in fresh.values() for path in paths] + list(deleted))
+
+    def _delete_from_db(self, stale: Dict[str, List[str]], deleted: Set[str]) -> None:
+        """Deletes outdated nodes and edges in one transaction.
+
+        Paths are bound as parameters, some of ein's queries
+        format them into the SQL.
+
+        Params:
+            stale (Dict[str, List[str]]): Zets whose node and
+                outgoing edges are dropped, by the repo they
+                were indexed in.
+            deleted (Set[str]): Zets whose edges are dropped
+                from every repo.
 
-    def _construct_node(self, zet: Zet) -> Node:
+        Returns:
+            None
+        """
+        connection = sqlite3.connect(self.db_path.as_posix())
+        try:
+            with connection:
+                for repo_name, paths in stale.items():
+                    rows = [(path,) for path in paths]
+                    connection.executemany(f"DELETE FROM {repo_name}_edges WHERE source = ?", rows)
+                    connection.executemany(f"DELETE FROM {repo_name}_nodes WHERE id = ?", rows)
+
+                rows = [(path, path) for path in deleted]
+                for schema_name in self.db.schemas:
+                    connection.executemany(f"DELETE FROM {schema_name}_edges WHERE source = ? OR target = ?", rows)
+        finally:
+            connection.close()
+
+    def _index_zets(self, stats: Dict[str, Dict[str, List[int]]]) -> None:
+        """Adds nodes and edges for zets in every repo.
+
+        Metadata for all zets is parsed in one batch, using a
+        process pool for cache misses, and kept as `ZetRecord`s
+        while the batch is indexed. Each repo's nodes are
+        inserted into its own schema once, then edges are built
+        against every known node so links between repos resolve.
+
+        Params:
+            stats (Dict[str, Dict[str, List[int]]]): File stats of
+                the zets to add, by repo name.
+
+        Returns:
+            None
+        """
+        all_stats = {path: stat for repo_stats in stats.values() for path, stat in repo_stats.items()}
+        with span("metadata parse"):
+            metadata = metadata_cache.get_many(all_stats, frontmatter.parse, stats=all_stats)
+
+            # each dict is dropped as soon as its record is built
+            records = {
+                repo_name: {
+                    path: ZetRecord.from_metadata(path, repo_name, metadata.pop(path))
+                    for path in repo_stats if path in metadata
+                }
+                for repo_name, repo_stats in stats.items()
+            }
+
+        for repo_name, repo_records in records.items():
+            with span("node/edge build"):
+                nodes = [
+                    self._construct_node(repo_name, path, record.to_metadata())
+                    for path, record in repo_records.items()
+                ]
+            with span("ein insert"):
+                self.db.add_nodes(schema_name=repo_name, nodes=nodes)
+            inc("ein_nodes_written_total", len(nodes))
+            del nodes
+            with span("tag/backlink index"):
+                self._index_metadata(repo_name, repo_records)
+
+        for repo_name, repo_records in records.items():
+            with span("node/edge build"):
+                edges = []
+                for path, record in repo_records.items():
+                    edges += self._construct_edges(self.db.nodes[path], record.links or ())
+            with span("ein insert"):
+                self.db.add_edges(schema_name=repo_name, edges=edges)
+            inc("ein_edges_written_total", len(edges))
+
+    def _index_metadata(self, repo_name: str, metadata: Dict[str, Union[Dict, ZetRecord]]) -> None:
+        """Updates the tag and backlink indexes for zets.
+
+        Params:
+            repo_name (str): The repo of the zets.
+            metadata (Dict[str, Union[Dict, ZetRecord]]): Metadata
+                of each zet, by path.
+
+        Returns:
+            None
+        """
+        self.tag_index.update(repo_name, metadata)
+        self.backlink_index.set_many((path, zet_metadata.get("links") or ()) for path, zet_metadata in metadata.items())
+
+    def _stat_zets(self, repo: Repo) -> Dict[str, List[int]]:
+        """File stats of every zet in a repo.
+
+        Params:
+            repo (Repo): A repo to list.
+
+        Returns:
+            stats (Dict[str, List[int]]): `[st_mtime_ns, st_size]`
+                of each zet, by path.
+        """
+        stats = {}
+        with span("repo walk"):
+            for zet in repo.iter_zets():
+                stat = zet.stat()
+                stats[zet.path] = [stat.st_mtime_ns, stat.st_size]
+        inc("files_stat_total", len(stats))
+        return stats
+
+    def _load_manifest(self) -> Optional[Dict[str, Dict[str, List[int]]]]:
+        """Loads the manifest of the last sync.
+
+        Returns:
+            manifest (Optional[Dict[str, Dict[str, List[int]]]]):
+                File stats by repo name, or None if the manifest
+                or the DB is missing.
+        """
+        if not self.db_path.exists():
+            return None
+        try:
+            with self.manifest_path.open("r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest: Dict[str, Dict[str, List[int]]]) -> None:
+        """Writes the manifest of the current sync."""
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        with tmp_path.open("w") as file:
+            json.dump(manifest, file)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _construct_node(self, repo_name: str, path: str, metadata: Dict) -> Node:
         """Node constructor for the graph database.
 
         Params:
-            zet (Zet): A Zet to construct a node.
+            repo_name (str): The repo (schema) of the zet.
+            path (str): Path to the zet, used as the node ID.
+            metadata (Dict): Metadata of the zet.
 
         Returns:
             node (Node): A node representation of a zet.
         """
-        return Node(schema_name=zet.repo_name, id=zet.path, body=zet.metadata)
+        return Node(schema_name=repo_name, id=path, body=metadata)
 
-    def _construct_edges(self, zet: Zet) -> Union[List[Edge], List]:
+    def _construct_edges(self, source_node: Node, links: List[str]) -> Union[List[Edge], List]:
         """Edge constructor for the graph database.
 
+        Targets are looked up in the nodes already added to the
+        graph, the target zets are not read again.
+
         Params:
-            zet (Zet): A Zet to construct edges for. Each link in the
-                zet will be a separate edge.
+            source_node (Node): The node of the linking zet.
+            links (List[str]): Links of the zet. Each link
+                will be a separate edge.
 
         Returns:
             edges (Union[List[Edge], List]): A list of edges to add
                 or an empty list.
         """
         edges = []
+        for link in links:
+
+            # links to zets that were deleted or aren't
+            # in a repo are skipped, the target node doesn't exist
+            target_node = self.db.nodes.get(link)
+            if target_node is None:
+                continue
+
+            edges.append(Edge(schema_name=source_node.schema_name, source=source_node, target=target_node))
 
-        # source node links
-        links = zet.metadata.pop("links", None)
-        if links:
+        return edges
 
-            # source node data
-            source_node_body = zet.metadata
-            source_node = Node(schema_name=zet.repo_name, id=zet.path, body=source_node_body)
+    def _construct_incoming_edges(self, targets: Iterable[str], skip: Set[str]) -> Dict[str, List[Edge]]:
+        """Edges into zets from the zets that link to them.
 
-            # get target nodes of each link
-            for link in links:
-                target_zet = Zet(path=link)
-                target_node_body = target_zet.metadata
-                target_node = Node(schema_name=target_zet.repo_name, id=target_zet.path, body=target_node_body)
+        Edges into a zet are dropped when it's deleted, a zet
+        that's restored, or added after its links, gets them
+        back from the backlink index.
 
-                edges.append(Edge(schema_name=source_node.schema_name, source=source_node, target=target_node))
+        Params:
+            targets (Iterable[str]): Zets to link to.
+            skip (Set[str]): Linking zets whose edges were
+                already built.
+
+        Returns:
+            edges (Dict[str, List[Edge]]): Edges to add, by the
+                schema of the linking zet.
+        """
+        edges = {}
+        for target in targets:
+            target_node = self.db.nodes.get(target)
+            if target_node is None:
+                continue
+
+            for source in self.backlink_index.backlinks(target):
+                source_node = self.db.nodes.get(source)
+                if source_node is None or source in skip:
+                    continue
+                schema_name = source_node.schema_name
+                edges.setdefault(schema_name, []).append(Edge(schema_name=schema_name, source=source_node, target=target_node))
 
         return edges
 
+    def backlinks(self, path: str) -> List[str]:
+        """Zets that link to a zet.
+
+        Params:
+            path (str): Path to a zet.
+
+        Returns:
+            sources (List[str]): Paths of the linking zets.
+        """
+        return self.backlink_index.backlinks(path)
+
+    def link_graph(self) -> LinkGraph:
+        """Compact adjacency of every synced link.
+
+        Returns:
+            graph (LinkGraph): Link graph for neighbourhood,
+                path, and reachability queries.
+        """
+        return LinkGraph.from_edges(
+            ((edge.source.id, edge.target.id) for edge in self.db.edges),
+            nodes=self.db.nodes,
+        )
+
     def add_zet(self) -> None:
         pass
 
+
+def load_link_graph() -> LinkGraph:
+    """Link graph of every synced link, reused until the DB changes.
+
+    Long-running processes, like `zet daemon`, only read
+    the edges again after a sync has written to the DB.
+
+    Returns:
+        graph (LinkGraph): Link graph for neighbourhood,
+            path, and reachability queries.
+    """
+    db_path = Path(settings.install_path / ".env/zets.db").as_posix()
+    try:
+        stat = os.stat(db_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        key = None
+
+    cached = _link_graph_cache.get(db_path)
+    if key is not None and cached and cached[0] == key:
+        return cached[1]
+
+    graph = Db().link_graph()
+    if key is not None:
+        _link_graph_cache[db_path] = (key, graph)
+    return graph
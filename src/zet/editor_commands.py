@@ -2,9 +2,10 @@ import os
 from subprocess import call
 from typing import Optional
 
-from .settings import Settings
+from .settings import get_settings
+from .timings import span
 
-settings = Settings()
+settings = get_settings()
 
 
 class EditorException(Exception):
@@ -35,9 +36,11 @@ def open_editor(path: Optional[str] = None, zet_repo: Optional[str] = None):
 
     if zet_repo and not path:
         repo = settings.get_repo_path(zet_repo)
-        return call([EDITOR, repo])
+        with span("editor launch"):
+            return call([EDITOR, repo])
     elif path and not zet_repo:
-        return call([EDITOR, path])
+        with span("editor launch"):
+            return call([EDITOR, path])
     else:
         raise EditorException(f"""
             Path: {path}
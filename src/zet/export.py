@@ -0,0 +1,236 @@
+"""Streaming export and import of zet metadata as NDJSON.
+
+Each line is one zet, a JSON object with its path, repo,
+title, date, category, tags, and links, and its body with
+`--body`. Front matter keys outside the default template are
+kept under `extra`.
+
+Both directions stream, one zet at a time. Exports walk the
+repos lazily and parse each zet as it's reached, imports read
+one line, write one zet, and move on, so memory doesn't grow
+with the corpus and either end can be a pipe:
+
+    zet export --body | gzip > zets.ndjson.gz
+    gunzip -c zets.ndjson.gz | zet import -r archive
+"""
+import json
+import os
+import re
+import sys
+from typing import Dict, Iterator, List, Optional
+
+from . import frontmatter
+from .changes import record_changes
+from .ids import allocator, id_folders, id_timestamp
+from .metrics import inc
+from .record import ZetRecord
+from .repo import Repo
+from .settings import get_settings
+from .zet import _create_zet_folder
+
+settings = get_settings()
+
+FORMATS = ("ndjson",)
+
+# folder name of a zet, a timestamp with an optional sequence
+EXPORTED_ID = re.compile(r"\d{14}(-\d{6})?")
+
+# changed paths are journaled in batches of this size
+RECORD_BATCH = 1000
+
+
+class ImportFormatException(Exception):
+    """Import line is not a zet object."""
+    pass
+
+
+def iter_zet_objects(zet_repo: Optional[str] = None, body: bool = False) -> Iterator[Dict]:
+    """Lazily reads the metadata of every zet.
+
+    Files are parsed as they're reached, the metadata cache
+    isn't used so it doesn't grow with the corpus.
+
+    Params:
+        zet_repo (Optional[str]): A zet repo name. Defaults to all repos.
+        body (bool): Include the text after the front matter.
+            Defaults to False.
+
+    Returns:
+        zets (Iterator[Dict]): One JSON-compatible object per zet.
+    """
+    repo_names = [zet_repo] if zet_repo else settings.get_repo_names()
+    for repo_name in repo_names:
+        for entry in Repo(repo_name).iter_zets():
+            try:
+                with open(entry.path, "r", encoding="utf-8", errors="replace") as file:
+                    metadata = frontmatter.parse_lines(file)
+                    text = file.read() if body else None
+            except FileNotFoundError:
+                continue
+
+            record = ZetRecord.from_metadata(entry.path, repo_name, metadata)
+            zet = {
+                "path": record.path,
+                "repo": record.repo_name,
+                "title": record.title,
+                "date": record.date,
+                "category": record.category,
+                "tags": list(record.tags or ()),
+                "links": list(record.links or ()),
+            }
+            if record.extra:
+                zet["extra"] = dict(record.extra)
+            if body:
+                zet["body"] = text
+            yield zet
+
+
+def export_zets(zet_repo: Optional[str] = None,
+                output_format: str = "ndjson",
+                body: bool = False,
+                output: str = "-") -> int:
+    """Writes the metadata of every zet as NDJSON.
+
+    Params:
+        zet_repo (Optional[str]): A zet repo name. Defaults to all repos.
+        output_format (str): Only "ndjson". Defaults to "ndjson".
+        body (bool): Include the body of each zet. Defaults to False.
+        output (str): File to write, "-" is stdout. Defaults to "-".
+
+    Returns:
+        count (int): Number of zets written.
+
+    Raises:
+        ValueError
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown export format: {output_format}")
+
+    count = 0
+    file = sys.stdout if output == "-" else open(output, "w")
+    try:
+        for zet in iter_zet_objects(zet_repo, body=body):
+            file.write(json.dumps(zet, ensure_ascii=False) + "\n")
+            count += 1
+        file.flush()
+    except BrokenPipeError:
+        # the reader went away, like `zet export | head`, the
+        # rest of the output has nowhere to go
+        os.dup2(os.open(os.devnull, os.O_WRONLY), file.fileno())
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return count
+
+
+def import_zets(zet_repo: Optional[str] = None,
+                input_format: str = "ndjson",
+                input_file: str = "-") -> int:
+    """Creates a zet from each line of an NDJSON stream.
+
+    Lines look like the output of `export_zets`. The front
+    matter is written in the layout of the default template,
+    with the body when the line has one, or a title heading.
+
+    A zet keeps the ID of its exported path when that ID is
+    free in the repo, so it lands in the same year and month
+    folders, otherwise it gets a new ID. Links are written as
+    they were exported. Blank lines are skipped.
+
+    Params:
+        zet_repo (Optional[str]): A zet repo name. Defaults to
+            the default repo.
+        input_format (str): Only "ndjson". Defaults to "ndjson".
+        input_file (str): File to read, "-" is stdin. Defaults to "-".
+
+    Returns:
+        count (int): Number of zets created.
+
+    Raises:
+        ValueError
+        ImportFormatException
+    """
+    if input_format not in FORMATS:
+        raise ValueError(f"Unknown import format: {input_format}")
+
+    repo = settings.get_repo_path(zet_repo) if zet_repo else settings.get_default_repo_path()
+
+    count = 0
+    created: List[str] = []
+    file = sys.stdin if input_file == "-" else open(input_file, "r")
+    try:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                zet = json.loads(line)
+            except ValueError as error:
+                raise ImportFormatException(f"Line {number} is not JSON: {error}")
+            if not isinstance(zet, dict):
+                raise ImportFormatException(f"Line {number} is not a JSON object")
+
+            created.append(_write_zet(repo, zet))
+            count += 1
+            if len(created) >= RECORD_BATCH:
+                record_changes(created)
+                created = []
+    finally:
+        record_changes(created)
+        inc("zets_imported_total", count)
+        if file is not sys.stdin:
+            file.close()
+    return count
+
+
+def _write_zet(repo: str, zet: Dict) -> str:
+    """Writes one imported zet, returns its path."""
+    zet_id = _exported_id(zet.get("path")) or allocator.allocate()[0]
+    zet_id, zet_folder = _create_zet_folder(repo, zet_id)
+    zet_year, zet_month = id_folders(zet_id)
+
+    # values are single lines, and titles can't leave the zet folder
+    title = _line(zet.get("title"))
+    clean_title = title.lower().replace(" ", "-").replace(os.sep, "-")
+    path = os.path.join(zet_folder, f"{clean_title}-{zet_id}.md")
+
+    lines = [
+        "---",
+        f"path: '/{zet_year}/{zet_month}/{clean_title}-{zet_id}'",
+        f"title: '{title}'",
+        f"date: '{_line(zet.get('date')) or id_timestamp(zet_id)}'",
+        f"category: '{_line(zet.get('category'))}'",
+        f"tags: {_lines(zet.get('tags'))}",
+        f"links: {_lines(zet.get('links'))}",
+    ]
+    extra = zet.get("extra")
+    for key, value in extra.items() if isinstance(extra, dict) else ():
+        value = _lines(value) if isinstance(value, list) else f"'{_line(value)}'"
+        lines.append(f"{_line(key)}: {value}")
+    lines.append("---")
+
+    body = zet.get("body")
+    if body is None:
+        body = f"\n# {title}\n"
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n" + str(body))
+    return path
+
+
+def _line(value: object) -> str:
+    """A metadata value as one line of text."""
+    return " ".join(str(value if value is not None else "").splitlines())
+
+
+def _lines(values: object) -> List[str]:
+    """A metadata list, a single value is a list of one."""
+    if values is None or values == "":
+        return []
+    return [_line(value) for value in (values if isinstance(values, list) else [values])]
+
+
+def _exported_id(path: Optional[str]) -> Optional[str]:
+    """ID of an exported zet, from its `<id>/` folder."""
+    if not isinstance(path, str):
+        return None
+    zet_id = os.path.basename(os.path.dirname(path))
+    return zet_id if EXPORTED_ID.fullmatch(zet_id) else None
@@ -0,0 +1,124 @@
+"""Front-matter parsing for zet files.
+
+The metadata of a zet is a block of `key: value` lines at the
+top of the file, enclosed by a delimeter line (`---` in the
+default template). Only the lines up to the closing delimeter
+are read, the body of the note is never loaded.
+
+Supported values:
+    * Quoted strings - `title: 'some title'`
+    * Lists of quoted strings - `tags: ['some', 'tags']`
+    * Anything else is kept as the stripped string
+"""
+import re
+from typing import Dict, Iterable, List, Union
+
+# one list item, single quoted, double quoted or bare
+LIST_ITEM = re.compile(r"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)"|([^,\s][^,]*)""")
+
+# escapes written by Python's `repr()` of a string
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+ESCAPED_CHAR = re.compile(r"\\(.)")
+
+
+def parse(path: str) -> Dict[str, Union[str, List[str]]]:
+    """Parse the metadata of a zet file.
+
+    Reads a file line by line until the closing
+    delimeter, the first line of the file is the
+    delimeter. Bytes that aren't UTF-8 are replaced.
+
+    Params:
+        path (str): Path to a zet file.
+
+    Returns:
+        metadata (Dict[str, Union[str, List[str]]]): A
+            dictionary of the available metadata in the file.
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        return parse_lines(file)
+
+
+def parse_lines(lines: Iterable[str]) -> Dict[str, Union[str, List[str]]]:
+    """Parse metadata from an iterable of lines.
+
+    Stops consuming the iterable at the closing delimeter,
+    so open files can be passed directly.
+
+    Params:
+        lines (Iterable[str]): Lines of a zet, including
+            the opening delimeter.
+
+    Returns:
+        metadata (Dict[str, Union[str, List[str]]]): A
+            dictionary of the available metadata.
+    """
+    metadata = {}
+    lines = iter(lines)
+
+    delimeter = next(lines, "").rstrip("\r\n")
+    if not delimeter:
+        return metadata
+
+    for line in lines:
+        if line.startswith(delimeter):
+            break
+
+        name, separator, value = line.partition(": ")
+        if separator:
+            metadata[name.strip()] = parse_value(value)
+
+    return metadata
+
+
+def parse_value(value: str) -> Union[str, List[str]]:
+    """Parse one metadata value.
+
+    Params:
+        value (str): The text after `key: `.
+
+    Returns:
+        value (Union[str, List[str]]): A string, or a list
+            of strings for `[...]` values.
+    """
+    value = value.strip()
+
+    if value.startswith("[") and value.endswith("]"):
+        return [
+            _unescape(match.group(match.lastindex)) if match.lastindex < 3
+            else match.group(3).strip()
+            for match in LIST_ITEM.finditer(value[1:-1])
+        ]
+
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+
+    return value
+
+
+def parse_many(paths: Iterable[str]) -> Dict[str, Dict[str, Union[str, List[str]]]]:
+    """Parse the metadata of many zet files.
+
+    Files that don't exist are left out of the results.
+
+    Params:
+        paths (Iterable[str]): Paths to zet files.
+
+    Returns:
+        metadata (Dict[str, Dict[str, Union[str, List[str]]]]):
+            The metadata of each zet, by path.
+    """
+    results = {}
+    for path in paths:
+        try:
+            results[path] = parse(path)
+        except FileNotFoundError:
+            continue
+    return results
+
+
+def _unescape(text: str) -> str:
+    """Reverses the escapes `repr()` adds to a string."""
+    if "\\" not in text:
+        return text
+    return ESCAPED_CHAR.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), text)
@@ -1,8 +1,52 @@
+import os
 import subprocess
+import time
+from typing import Iterable, List, NamedTuple, Optional, Sequence
 
-from .settings import Settings
+from .metrics import inc, observe
+from .settings import get_settings
+from .timings import span
 
-settings = Settings()
+settings = get_settings()
+
+# seconds a git command can run in one repo with `--all`
+GIT_TIMEOUT = 120.0
+
+# repos worked on at once with `--all`, git is mostly
+# waiting on the network so threads are enough
+GIT_WORKERS = 8
+
+
+class GitResult(NamedTuple):
+    """Outcome of a git command in one repo."""
+    repo: str
+    status: str
+    returncode: Optional[int]
+    output: str
+    seconds: float
+
+
+def _git(repo: str, args: List[str], **kwargs) -> bytes:
+    """Runs a git command in a repo, with its time recorded.
+
+    Params:
+        repo (str): Path to the repo.
+        args (List[str]): Git arguments.
+        kwargs: Passed to `subprocess.check_output`.
+
+    Returns:
+        output (bytes): Output of the command.
+
+    Raises:
+        subprocess.CalledProcessError
+    """
+    start_time = time.perf_counter()
+    try:
+        with span("git subprocess"):
+            return subprocess.check_output(['git', *args], cwd=repo, **kwargs)
+    finally:
+        command = next((arg for arg in args if not arg.startswith("-")), "git")
+        observe("git_subprocess_seconds", time.perf_counter() - start_time, command=command)
 
 
 def git_init_zets(zet_repo: str = None):
@@ -21,33 +65,77 @@ def git_init_zets(zet_repo: str = None):
     else:
         # default repo
         repo = settings.get_default_repo_path()
-    return subprocess.check_output(['git', 'init'], cwd = repo)
+    return _git(repo, ['init'])
 
 
-def git_add_zets(zet_repo: str = None):
-    """Adds all files to staging in a repo.
+def git_add_zets(zet_repo: str = None, full: bool = False):
+    """Stages changed zets in a repo.
+
+    Only the zets in the change journal are staged, passed to
+    git with `--pathspec-from-file`, so git doesn't scan the
+    whole working tree. Git isn't run at all when the journal
+    is empty or missing. Files the CLI doesn't know about, like
+    attachments or notes edited elsewhere, are only staged by a
+    `full` add, which runs `git add .`.
 
     Params:
         zet_repo (str): A zet repo name.
             Defaults to ZET_DEFAULT_FOLDER.
-        folder (Dict[str, str]): A dictionary
-            of zet folders. Defaults to ZET_FOLDERS.
+        full (bool): Stage every file, like attachments that
+            the CLI doesn't know about. Defaults to False.
 
     Returns:
         subprocess (Pipe): Output is the terminal
             messages of the bash command.
     """
-    if zet_repo:
-        repo = settings.get_repo_path(zet_repo)
-    else:
+    from .changes import change_journal
+
+    if not zet_repo:
         # default repo
-        repo = settings.get_default_repo_path()
-    return subprocess.check_output(['git', 'add', '.'], cwd = repo)
+        zet_repo = settings.get_default_repo()
+    repo = settings.get_repo_path(zet_repo)
+
+    if full:
+        output = _git(repo, ['add', '.'])
+        change_journal.done(zet_repo)
+        return output
+
+    paths = change_journal.take(zet_repo)
+    if not paths:
+        # nothing changed through the CLI
+        if paths is not None:
+            change_journal.done(zet_repo)
+        return b""
+
+    existing = {path for path in paths if os.path.lexists(os.path.join(repo, path))}
+    removed = [path for path in paths if path not in existing]
+    output = b""
+    try:
+        if existing:
+            output += _git_pathspecs(repo, ['add'], sorted(existing))
+        if removed:
+            output += _git_pathspecs(repo, ['rm', '--cached', '--quiet', '--ignore-unmatch', '-r'], removed)
+    except subprocess.CalledProcessError:
+        change_journal.restore(zet_repo)
+        raise
+    change_journal.done(zet_repo)
+    return output
+
+
+def _git_pathspecs(repo: str, args: List[str], paths: List[str]) -> bytes:
+    """Runs a git command on paths given through stdin."""
+    return _git(
+        repo,
+        ['--literal-pathspecs', *args, '--pathspec-from-file=-', '--pathspec-file-nul'],
+        input=b"\0".join(os.fsencode(path) for path in paths),
+    )
 
 
 def git_commit_zets(message: str, zet_repo: str = None):
     """Performs git commit in a repo.
 
+    Nothing is committed if nothing is staged.
+
     Params:
         message (str): The commit message.
         zet_repo (str): A zet repo name.
@@ -64,7 +152,14 @@ def git_commit_zets(message: str, zet_repo: str = None):
     else:
         # default repo
         repo = settings.get_default_repo_path()
-    return subprocess.check_output(['git', 'commit', '-m', message], cwd = repo)
+
+    try:
+        # compares the index to HEAD, the working tree isn't scanned
+        _git(repo, ['diff', '--cached', '--quiet'])
+        return b"Nothing to commit"
+    except subprocess.CalledProcessError:
+        pass
+    return _git(repo, ['commit', '-m', message])
 
 
 def git_push_zets(zet_repo: str = None):
@@ -85,7 +180,7 @@ def git_push_zets(zet_repo: str = None):
     else:
         # default repo
         repo = settings.get_default_repo_path()
-    return subprocess.check_output(['git', 'push'], cwd = repo)
+    return _git(repo, ['push'])
 
 
 def git_pull_zets(zet_repo: str = None) -> None:
@@ -101,5 +196,120 @@ def git_pull_zets(zet_repo: str = None) -> None:
         # default repo
         repo = settings.get_default_repo_path()
 
-    subprocess.check_output(['git', 'pull'], cwd = repo)
+    _git(repo, ['pull'])
+
+
+def git_repo_zets(zet_repo: str, args: Sequence[str], timeout: float = GIT_TIMEOUT) -> GitResult:
+    """Runs a git command in a repo, without raising.
+
+    Git is kept from prompting for credentials, a command
+    that would wait on a prompt fails instead.
 
+    Params:
+        zet_repo (str): A zet repo name.
+        args (Sequence[str]): Git arguments, like `["pull"]`.
+        timeout (float): Seconds before the command is killed.
+            Defaults to GIT_TIMEOUT.
+
+    Returns:
+        result (GitResult): Status is "ok", "clean" (nothing
+            to commit), "failed", or "timeout".
+    """
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    start_time = time.perf_counter()
+    try:
+        process = subprocess.run(
+            ["git", *args],
+            cwd=settings.get_repo_path(zet_repo),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        inc("git_timeouts_total")
+        return GitResult(zet_repo, "timeout", None, f"Timed out after {timeout:g} seconds",
+                         time.perf_counter() - start_time)
+    except OSError as error:
+        return GitResult(zet_repo, "failed", None, str(error), time.perf_counter() - start_time)
+
+    seconds = time.perf_counter() - start_time
+    observe("git_subprocess_seconds", seconds, command=next((arg for arg in args if not arg.startswith("-")), "git"))
+    output = process.stdout.strip()
+    if process.returncode == 0:
+        status = "ok"
+    elif args[:1] == ["commit"] and "nothing to commit" in output:
+        status = "clean"
+    else:
+        status = "failed"
+    return GitResult(zet_repo, status, process.returncode, output, seconds)
+
+
+def git_all_zets(args: Sequence[str],
+                 repo_names: Optional[Iterable[str]] = None,
+                 timeout: float = GIT_TIMEOUT,
+                 workers: int = GIT_WORKERS) -> List[GitResult]:
+    """Runs a git command in every repo at once.
+
+    Repos are worked on by a bounded thread pool, so the
+    total time is about that of the slowest repo.
+
+    Params:
+        args (Sequence[str]): Git arguments, like `["pull"]`.
+        repo_names (Optional[Iterable[str]]): Zet repo names.
+            Defaults to every repo.
+        timeout (float): Seconds before the command is killed,
+            per repo. Defaults to GIT_TIMEOUT.
+        workers (int): Repos worked on at once.
+            Defaults to GIT_WORKERS.
+
+    Returns:
+        results (List[GitResult]): Result of each repo, in
+            repo order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    repo_names = list(settings.get_repo_names() if repo_names is None else repo_names)
+    if not repo_names:
+        return []
+
+    # one span for the fan-out, spans aren't thread safe
+    with span("git subprocess"), ThreadPoolExecutor(max_workers=max(1, min(workers, len(repo_names)))) as executor:
+        futures = [executor.submit(git_repo_zets, repo_name, args, timeout) for repo_name in repo_names]
+        return [future.result() for future in futures]
+
+
+def git_pull_all_zets(timeout: float = GIT_TIMEOUT, workers: int = GIT_WORKERS) -> List[GitResult]:
+    """Pulls every repo at once. See `git_all_zets`."""
+    return git_all_zets(["pull"], timeout=timeout, workers=workers)
+
+
+def git_push_all_zets(timeout: float = GIT_TIMEOUT, workers: int = GIT_WORKERS) -> List[GitResult]:
+    """Pushes every repo at once. See `git_all_zets`."""
+    return git_all_zets(["push"], timeout=timeout, workers=workers)
+
+
+def git_commit_all_zets(message: str, timeout: float = GIT_TIMEOUT, workers: int = GIT_WORKERS) -> List[GitResult]:
+    """Commits staged zets in every repo at once. See `git_all_zets`."""
+    return git_all_zets(["commit", "-m", message], timeout=timeout, workers=workers)
+
+
+def format_git_results(results: Iterable[GitResult]) -> str:
+    """Status table of `git_all_zets` results.
+
+    Params:
+        results (Iterable[GitResult]): Results of each repo.
+
+    Returns:
+        table (str): One row per repo with its status, time,
+            and the last line of git's output.
+    """
+    results = list(results)
+    width = max([len("repo")] + [len(result.repo) for result in results])
+    rows = [f"{'repo':<{width}}  {'status':<8}{'time (s)':>9}  output"]
+    for result in results:
+        last_line = result.output.splitlines()[-1] if result.output else ""
+        rows.append(f"{result.repo:<{width}}  {result.status:<8}{result.seconds:>9.2f}  {last_line}")
+    return "\n".join(rows)
@@ -0,0 +1,156 @@
+import datetime
+import threading
+from typing import Callable, List, Tuple
+
+# second resolution timestamp every zet ID starts with
+ID_FORMAT = "%Y%m%d%H%M%S"
+ID_TIMESTAMP_LENGTH = 14
+
+# IDs per timestamp, the suffix has six digits
+SEQUENCE_LIMIT = 1000000
+
+# partial dates accepted by `date_bound()`, by number of digits
+DATE_FORMATS = {
+    4: "%Y",
+    6: "%Y%m",
+    8: "%Y%m%d",
+    12: "%Y%m%d%H%M",
+    14: ID_FORMAT,
+}
+
+
+class IdAllocator:
+    """Hands out unique, sortable zet IDs.
+
+    An ID is a `%Y%m%d%H%M%S` timestamp. IDs handed out
+    within the same second get a zero padded sequence suffix,
+    so many IDs can come from one clock read without
+    waiting for the clock to tick:
+
+        20220601120100
+        20220601120100-000001
+        20220601120100-000002
+        20220601120101
+
+    IDs sort in the order they were allocated. If the clock
+    goes backwards the previous timestamp keeps being used.
+    A second that runs out of suffixes moves on to the next
+    second, which the clock then continues from.
+    """
+
+    def __init__(self, clock: Callable[[], datetime.datetime] = datetime.datetime.now) -> None:
+        """Allocator state is shared by every caller in the process.
+
+        Params:
+            clock (Callable[[], datetime.datetime]): Current
+                time source. Defaults to `datetime.datetime.now`.
+
+        Returns:
+            None
+        """
+        self._clock = clock
+        self._timestamp = ""
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def allocate(self, count: int = 1) -> List[str]:
+        """Allocates IDs from a single clock read.
+
+        Params:
+            count (int): Number of IDs to allocate. Defaults to 1.
+
+        Returns:
+            ids (List[str]): Unique IDs in sorted order.
+        """
+        ids = []
+        with self._lock:
+            timestamp = self._clock().strftime(ID_FORMAT)
+            if timestamp > self._timestamp:
+                self._timestamp = timestamp
+                self._sequence = 0
+
+            while count > 0:
+                if self._sequence == SEQUENCE_LIMIT:
+                    self._timestamp = next_timestamp(self._timestamp)
+                    self._sequence = 0
+
+                start = self._sequence
+                self._sequence = min(start + count, SEQUENCE_LIMIT)
+                count -= self._sequence - start
+                ids += [format_id(self._timestamp, sequence) for sequence in range(start, self._sequence)]
+
+        return ids
+
+
+def format_id(timestamp: str, sequence: int) -> str:
+    """Formats a zet ID from a timestamp and sequence number.
+
+    Raises:
+        ValueError
+    """
+    if not 0 <= sequence < SEQUENCE_LIMIT:
+        raise ValueError(f"ID sequence out of range: {sequence}")
+    if sequence == 0:
+        return timestamp
+    return f"{timestamp}-{sequence:06d}"
+
+
+def next_timestamp(timestamp: str) -> str:
+    """The ID timestamp one second later."""
+    later = datetime.datetime.strptime(timestamp, ID_FORMAT) + datetime.timedelta(seconds=1)
+    return later.strftime(ID_FORMAT)
+
+
+def id_folders(zet_id: str) -> Tuple[str, str]:
+    """Year and month folders of a zet ID.
+
+    Matches the `<repo>/<year>/<month>/<id>/` layout,
+    months are not zero padded.
+
+    Params:
+        zet_id (str): A zet ID.
+
+    Returns:
+        folders (Tuple[str, str]): The year and month folder names.
+    """
+    return zet_id[0:4], str(int(zet_id[4:6]))
+
+
+def id_timestamp(zet_id: str) -> str:
+    """The `%Y%m%d%H%M%S` timestamp of a zet ID."""
+    return zet_id[:ID_TIMESTAMP_LENGTH]
+
+
+def date_bound(value: str, end: bool = False) -> str:
+    """Timestamp bound of a partial date.
+
+    Separators are ignored, so `2022-03`, `202203`, and
+    `2022/03` are the same month. The bound is padded to a
+    full timestamp that compares as a string against zet IDs:
+    `2022-03` starts at `20220300000000` and, as an end bound,
+    runs through `20220399999999`, covering the whole month.
+
+    Params:
+        value (str): A date, `YYYY`, `YYYY-MM`, `YYYY-MM-DD`,
+            `YYYY-MM-DD HH:MM`, or `YYYY-MM-DD HH:MM:SS`.
+        end (bool): Whether the bound is inclusive of the
+            whole period. Defaults to False.
+
+    Returns:
+        bound (str): A 14 digit timestamp bound.
+
+    Raises:
+        ValueError
+    """
+    digits = "".join(char for char in value if char.isdigit())
+    date_format = DATE_FORMATS.get(len(digits))
+    if date_format is None:
+        raise ValueError(f"Dates are YYYY, YYYY-MM, YYYY-MM-DD, or with a time: {value}")
+
+    # raises for impossible dates like 2022-13
+    datetime.datetime.strptime(digits, date_format)
+    return digits.ljust(ID_TIMESTAMP_LENGTH, "9" if end else "0")
+
+
+# process-wide allocator
+allocator = IdAllocator()
@@ -0,0 +1,229 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DIRECTIONS = ("out", "in", "both")
+
+
+class NodeDoesNotExistException(Exception):
+    """Zet is not a node in the link graph."""
+    pass
+
+
+class LinkGraph:
+    """Compact in-memory adjacency of zet links.
+
+    Zets are mapped to integer IDs and links are stored in
+    compressed sparse row (CSR) form: the outgoing links of
+    zet `n` are `targets[offsets[n]:offsets[n + 1]]`. The same
+    layout is kept for incoming links, so traversals can follow
+    links in either direction without any per-node objects.
+
+    Built from the synced edges with `Db.link_graph()`.
+    """
+
+    def __init__(self,
+                 ids: List[str],
+                 offsets: array,
+                 targets: array,
+                 reverse_offsets: array,
+                 reverse_targets: array) -> None:
+        """Use `LinkGraph.from_edges()` to build a graph.
+
+        Params:
+            ids (List[str]): Zet path of each integer ID.
+            offsets (array): Start of each ID's outgoing links,
+                with one extra entry for the end.
+            targets (array): Outgoing link targets by ID.
+            reverse_offsets (array): Start of each ID's incoming links.
+            reverse_targets (array): Incoming link sources by ID.
+
+        Returns:
+            None
+        """
+        self.ids = ids
+        self.index = {path: node for node, path in enumerate(ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self.reverse_offsets = reverse_offsets
+        self.reverse_targets = reverse_targets
+
+    def __len__(self) -> int:
+        """Number of nodes."""
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of links."""
+        return len(self.targets)
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[str, str]], nodes: Iterable[str] = ()) -> "LinkGraph":
+        """Builds a graph from `(source, target)` pairs.
+
+        Params:
+            edges (Iterable[Tuple[str, str]]): Links between zet paths.
+            nodes (Iterable[str]): Zets to include even if they
+                have no links. Defaults to none.
+
+        Returns:
+            graph (LinkGraph): The link graph.
+        """
+        index = {}
+        for path in nodes:
+            index.setdefault(path, len(index))
+
+        sources = array("l")
+        targets = array("l")
+        for source, target in edges:
+            sources.append(index.setdefault(source, len(index)))
+            targets.append(index.setdefault(target, len(index)))
+
+        ids = [None] * len(index)
+        for path, node in index.items():
+            ids[node] = path
+
+        offsets, ordered_targets = cls._compress(len(ids), sources, targets)
+        reverse_offsets, reverse_targets = cls._compress(len(ids), targets, sources)
+        return cls(ids, offsets, ordered_targets, reverse_offsets, reverse_targets)
+
+    def neighbors(self, path: str, depth: int = 1, direction: str = "out") -> Dict[str, int]:
+        """Zets within `depth` links of a zet.
+
+        Params:
+            path (str): Path to the starting zet.
+            depth (int): Maximum number of links to follow. Defaults to 1.
+            direction (str): Follow "out" links, "in" links (backlinks),
+                or "both". Defaults to "out".
+
+        Returns:
+            neighbors (Dict[str, int]): Distance of each reached
+                zet, by path, nearest first. The start is left out.
+
+        Raises:
+            NodeDoesNotExistException
+        """
+        start = self._node(path)
+        distances = {start: 0}
+        frontier = [start]
+        for distance in range(1, depth + 1):
+            next_frontier = []
+            for node in frontier:
+                for neighbor in self._adjacent(node, direction):
+                    if neighbor not in distances:
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        del distances[start]
+        return {self.ids[node]: distance for node, distance in distances.items()}
+
+    def shortest_path(self, source: str, target: str, direction: str = "out") -> Optional[List[str]]:
+        """Fewest links from one zet to another.
+
+        Params:
+            source (str): Path to the starting zet.
+            target (str): Path to the destination zet.
+            direction (str): Follow "out" links, "in" links (backlinks),
+                or "both". Defaults to "out".
+
+        Returns:
+            path (Optional[List[str]]): Zet paths from source to
+                target, or None if the target can't be reached.
+
+        Raises:
+            NodeDoesNotExistException
+        """
+        start = self._node(source)
+        goal = self._node(target)
+        if start == goal:
+            return [source]
+
+        # bidirectional search, the backward side follows
+        # links the other way, always growing the smaller frontier
+        backward = {"out": "in", "in": "out", "both": "both"}[direction]
+        forward_parents = {start: start}
+        backward_parents = {goal: goal}
+        forward_frontier = [start]
+        backward_frontier = [goal]
+
+        meeting = None
+        while forward_frontier and backward_frontier and meeting is None:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self._expand(
+                    forward_frontier, forward_parents, backward_parents, direction,
+                )
+            else:
+                backward_frontier, meeting = self._expand(
+                    backward_frontier, backward_parents, forward_parents, backward,
+                )
+
+        if meeting is None:
+            return None
+
+        nodes = [meeting]
+        while nodes[-1] != start:
+            nodes.append(forward_parents[nodes[-1]])
+        nodes.reverse()
+        while nodes[-1] != goal:
+            nodes.append(backward_parents[nodes[-1]])
+        return [self.ids[node] for node in nodes]
+
+    def is_reachable(self, source: str, target: str, direction: str = "out") -> bool:
+        """Whether any chain of links leads from one zet to another."""
+        return self.shortest_path(source, target, direction) is not None
+
+    def _expand(self,
+                frontier: List[int],
+                parents: Dict[int, int],
+                other_parents: Dict[int, int],
+                direction: str) -> Tuple[List[int], Optional[int]]:
+        """Expands one side of a bidirectional search by a level.
+
+        Returns the next frontier and the node where both
+        sides met, if they did.
+        """
+        next_frontier = []
+        for node in frontier:
+            for neighbor in self._adjacent(node, direction):
+                if neighbor not in parents:
+                    parents[neighbor] = node
+                    if neighbor in other_parents:
+                        return next_frontier, neighbor
+                    next_frontier.append(neighbor)
+        return next_frontier, None
+
+    def _node(self, path: str) -> int:
+        """Integer ID of a zet."""
+        try:
+            return self.index[path]
+        except KeyError:
+            raise NodeDoesNotExistException(f"Zet is not in the link graph: {path}")
+
+    def _adjacent(self, node: int, direction: str) -> Iterable[int]:
+        """IDs linked to or from a node."""
+        if direction == "out":
+            return self.targets[self.offsets[node]:self.offsets[node + 1]]
+        if direction == "in":
+            return self.reverse_targets[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+        if direction == "both":
+            outgoing = self.targets[self.offsets[node]:self.offsets[node + 1]]
+            return outgoing + self.reverse_targets[self.reverse_offsets[node]:self.reverse_offsets[node + 1]]
+        raise ValueError(f"Direction must be one of {DIRECTIONS}: {direction}")
+
+    @staticmethod
+    def _compress(node_count: int, sources: array, targets: array) -> Tuple[array, array]:
+        """Counting sort of edges into CSR offsets and targets."""
+        offsets = array("l", bytes(array("l").itemsize * (node_count + 1)))
+        for source in sources:
+            offsets[source + 1] += 1
+        for node in range(node_count):
+            offsets[node + 1] += offsets[node]
+
+        position = array("l", offsets[:-1])
+        ordered = array("l", bytes(array("l").itemsize * len(targets)))
+        for source, target in zip(sources, targets):
+            ordered[position[source]] = target
+            position[source] += 1
+        return offsets, ordered
@@ -1,18 +1,23 @@
 """Zet tool's main execution."""
+from __future__ import annotations
+
 import argparse
-import inspect
-import pprint
-import textwrap
-from typing import Optional, Sequence
-
-from .editor_commands import open_editor
-from .git_commands import (git_add_zets, git_commit_zets, git_init_zets,
-                           git_pull_zets, git_push_zets)
-from .repo import Repo
-from .settings import Settings
-from .zet import Zet, bulk_import_zets
-
-# Classes are instantiated to avoid
+import importlib
+import os
+import sys
+
+from .settings import Settings, get_settings
+from .timings import span, timings
+
+# `typing` is only imported by type checkers, see `timings`
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# Commands are mapped to `<module>:<callable>` and only imported
+# when they run, so `zet --help` or a single command doesn't pay
+# for importing the DB, search, and git modules.
+# Classes in the path are instantiated to avoid
 # doing discovery with the `__qualname__` property
 # then instantiating them afterward. This is just easier.
 # See:
@@ -21,62 +26,125 @@ from .zet import Zet, bulk_import_zets
 # Note: None of these classes need args.
 FUNCTION_MAP = {
     # Zet commands
-    "create": Zet.create,
+    "create": "zet:Zet.create",
+    "bulk": "zet:bulk_import_zets",
+    "link": "zet:link_zets",
+    "export": "export:export_zets",
+    "import": "export:import_zets",
 
     # Repo commands
-    "list": Repo().list_zets,
-    "add_repo": Repo().add_repo,
+    "list": "repo:list_repo_zets",
+    "add_repo": "repo:Repo.add_repo",
+
+    # DB commands
+    "sync": "db:Db.sync_db",
+    "search": "search:search_zets",
+    "backlinks": "backlinks:list_backlinks",
+    "graph": "db:load_link_graph",
+    "watch": "watch:watch_zets",
+    "daemon": "daemon:run_daemon",
+    "stats": "metrics:zet_stats",
 
     # Git commands
-    "add": git_add_zets,
-    "commit": git_commit_zets,
-    "init": git_init_zets,
-    "pull": git_pull_zets,
-    "push": git_push_zets,
+    "add": "git_commands:git_add_zets",
+    "commit": "git_commands:git_commit_zets",
+    "init": "git_commands:git_init_zets",
+    "pull": "git_commands:git_pull_zets",
+    "push": "git_commands:git_push_zets",
+    # with `--all`
+    "commit_all": "git_commands:git_commit_all_zets",
+    "pull_all": "git_commands:git_pull_all_zets",
+    "push_all": "git_commands:git_push_all_zets",
 
     # Editor commands
-    "editor": open_editor,
+    "editor": "editor_commands:open_editor",
 }
 
-settings = Settings()
 
+# written flush left, dedenting it means importing `textwrap`
+DESCRIPTION = """
+Zettlekasten command line tools.
 
-def main(argv: Optional[Sequence[str]] = None) -> int:
-    """
-    TODO:
-        * list repos should have a choice of 1 or all
-        * templates should have a list option for all template
-            names with paths
-        * there should be a pretty printer for all options
-            that print things
+This tool creates, interacts with, and helps to
+organize individual notes. A "zet" is seen as an
+individual notes file that is stored in a "repo" (folder).
+
+Installation path: `~/zets/`
+Default notes repo: `{default_repo_path}`
+Environment variables: `~/zets/.env/.local.json`
+"""
+
+
+class HelpFormatter(argparse.HelpFormatter):
+    """Help formatter that sizes help to the terminal without `shutil`.
+
+    argparse imports `shutil`, which imports the compression
+    modules, and reads the terminal size for every formatter,
+    and a formatter is made for every argument that is added.
+    The width is read once here instead.
     """
 
-    parser = argparse.ArgumentParser(
-        prog="zet",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        description=textwrap.dedent(f"""
-            Zettlekasten command line tools.
+    width: Optional[int] = None
 
-            This tool creates, interacts with, and helps to
-            organize individual notes. A "zet" is seen as an
-            individual notes file that is stored in a "repo" (folder).
+    def __init__(self, prog: str, indent_increment: int = 2, max_help_position: int = 24, width: Optional[int] = None) -> None:
+        super().__init__(prog, indent_increment, max_help_position, width or self.terminal_width())
 
-            Installation path: `~/zets/`
-            Default notes repo: `{settings.get_default_repo_path()}`
-            Environment variables: `~/zets/.env/.local.json`
-        """),
-    )
-    subparsers = parser.add_subparsers(help="sub-command help", dest="command")
+    @classmethod
+    def terminal_width(cls) -> int:
+        """Columns of the terminal less a margin, like argparse."""
+        if cls.width is None:
+            try:
+                columns = int(os.environ["COLUMNS"])
+            except (KeyError, ValueError):
+                try:
+                    columns = os.get_terminal_size(sys.__stdout__.fileno()).columns
+                except (AttributeError, ValueError, OSError):
+                    columns = 80
+            HelpFormatter.width = (columns or 80) - 2
+        return cls.width
 
-    parser_create = subparsers.add_parser(
-        "create",
-        help="""Creates a zet file.
 
-        The file has "metadata" added into the template
-        based on the parameters passed to each argument.
+class RawDescriptionHelpFormatter(argparse.RawDescriptionHelpFormatter, HelpFormatter):
+    """`HelpFormatter` that keeps the description's line breaks."""
+
+
+def load_function(command: str) -> Callable:
+    """Imports the function of a command.
+
+    Params:
+        command (str): A key of `FUNCTION_MAP`.
+
+    Returns:
+        func (Callable): The function, bound to an
+            instance if it's a method.
+    """
+    module_name, _, qualname = FUNCTION_MAP[command].partition(":")
+    func = importlib.import_module(f".{module_name}", __package__)
+    for name in qualname.split("."):
+        func = getattr(func, name)
+        if isinstance(func, type):
+            func = func()
+    return func
+
+
+def add_repo_argument(parser: argparse.ArgumentParser, settings: Settings, repo_names: Sequence[str]) -> None:
+    """Adds the `-r/--zet_repo` option shared by most sub-commands."""
+    parser.add_argument(
+        "-r",
+        "--zet_repo",
+        action="store",
+        default=settings.get_default_repo(),
+        const=settings.get_default_repo(),
+        nargs="?",
+        choices=repo_names,
+        help="""A zet repo folder name. Defaults to "%(default)s".
+        This option is available for all sub-commands.
         """,
     )
-    parser_create.add_argument(
+
+
+def add_create_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
         "-t",
         "--title",
         action="store",
@@ -94,7 +162,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         `-t "some title"` becomes "some-title-20220102120051.md"
         """
     )
-    parser_create.add_argument(
+    parser.add_argument(
         "-c",
         "--category",
         action="store",
@@ -102,7 +170,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         required=True,
         help="A zet category."
     )
-    parser_create.add_argument(
+    parser.add_argument(
         "-tag",
         "--tags",
         action="store",
@@ -115,7 +183,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         `-t 'tag, tag, tag'`
         """
     )
-    parser_create.add_argument(
+    parser.add_argument(
         "-tem",
         "--template",
         action="store",
@@ -128,22 +196,11 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         Defaults to "%(default)s".
         """
     )
-    parser_create.add_argument(
-        "-r",
-        "--zet_repo",
-        action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
-        """,
-    )
-    parser_create.set_defaults(which="create")
+    add_repo_argument(parser, settings, settings.get_repo_names())
 
-    parser_bulk = subparsers.add_parser("bulk", help="Bulk imports zets from a folder.")
-    parser_bulk.add_argument(
+
+def add_bulk_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
         "-f",
         "--files_folder",
         action="store",
@@ -151,34 +208,62 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         required=True,
         help="A folder of files to copy."
     )
-    parser_bulk.add_argument(
+    add_repo_argument(parser, settings, settings.get_repo_names())
+
+
+def add_export_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--format",
+        action="store",
+        dest="output_format",
+        default="ndjson",
+        choices=("ndjson",),
+        help="Output format, one JSON object per zet. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--body",
+        action="store_true",
+        help="Include the body of each zet. Defaults to false.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        action="store",
+        default="-",
+        help="File to write. Defaults to stdout.",
+    )
+    parser.add_argument(
         "-r",
         "--zet_repo",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
+        default=None,
         choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
-        """,
+        help="Only export this repo. Defaults to every repo.",
     )
-    parser_bulk.set_defaults(which="bulk")
 
-    parser_add_repo = subparsers.add_parser(
-        "add_repo",
-        help="""Creates a zet repo.
 
-        Repos are folders that store zets. Separate repos
-        are used to organize notes at a higher level than
-        categories/tags.
-
-        This could be useful for separating
-        things like general/personal notes from work-specific
-        knowledge.
-        """,
+def add_import_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--format",
+        action="store",
+        dest="input_format",
+        default="ndjson",
+        choices=("ndjson",),
+        help="Input format, as written by `zet export`. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        action="store",
+        dest="input_file",
+        default="-",
+        help="File to read. Defaults to stdin.",
     )
-    parser_add_repo.add_argument(
+    add_repo_argument(parser, settings, settings.get_repo_names())
+
+
+def add_add_repo_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
         "-r",
         "--zet_repo",
         action="store",
@@ -186,7 +271,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         default=settings.get_default_repo(),
         help="A repo folder name."
     )
-    parser_add_repo.add_argument(
+    parser.add_argument(
         "-tem",
         "--template",
         action="store",
@@ -200,7 +285,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         Defaults to "%(default)s".
         """
     )
-    parser_add_repo.add_argument(
+    parser.add_argument(
         "-f",
         "--zet_path",
         action="store",
@@ -214,137 +299,535 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         general use, as it breaks the organization design of the tool.
         """
     )
-    parser_add_repo.set_defaults(which="add_repo")
 
-    parser_list = subparsers.add_parser("list", help="List zets from a folder.")
-    parser_list.add_argument(
+
+def add_link_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "path",
+        action="store",
+        type=str,
+        help="Path to the linking zet.",
+    )
+    parser.add_argument(
+        "-a",
+        "--add",
+        action="append",
+        help="Path to a zet to link to. Can be repeated.",
+    )
+    parser.add_argument(
+        "-d",
+        "--remove",
+        action="append",
+        help="Path to a zet to unlink. Can be repeated.",
+    )
+
+
+def add_list_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
         "-full",
         "--full_path",
         action="store",
         default=False,
         help="Full paths to zets. Defaults to false.",
     )
-    parser_list.add_argument(
-        "-r",
-        "--zet_repo",
+    add_repo_argument(parser, settings, settings.get_repo_names())
+    parser.add_argument(
+        "-n",
+        "--limit",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
+        type=int,
+        default=None,
+        help="Maximum number of zets. Defaults to all.",
+    )
+    parser.add_argument(
+        "--since",
+        action="store",
+        help="""Only zets created on or after a date,
+        `YYYY`, `YYYY-MM`, or `YYYY-MM-DD`.
         """,
     )
-    parser_list.set_defaults(which="list")
-
-    parser_git_init = subparsers.add_parser("init", help="Git init inside a repo.")
-    parser_git_init.add_argument(
-        "-r",
-        "--zet_repo",
+    parser.add_argument(
+        "--until",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
+        help="""Only zets created on or before a date. The whole
+        period is included, `--until 2022-06` includes all of June.
+        """,
+    )
+    parser.add_argument(
+        "--tag",
+        action="append",
+        help="""Only zets with this tag. Repeat for zets
+        that have every tag.
         """,
     )
-    parser_git_init.set_defaults(which="init")
+    parser.add_argument(
+        "--any-tag",
+        action="append",
+        help="Only zets with at least one of these tags. Can be repeated.",
+    )
+    parser.add_argument(
+        "--not-tag",
+        action="append",
+        help="Only zets without this tag. Can be repeated.",
+    )
+    parser.add_argument(
+        "--category",
+        action="append",
+        help="Only zets in this category. Repeat to allow several categories.",
+    )
 
-    parser_git_add = subparsers.add_parser(
-        "add",
-        help="Git add all untracked zets inside a repo.",
+
+def add_sync_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild the database from scratch. Defaults to false.",
     )
-    parser_git_add.add_argument(
-        "-r",
-        "--zet_repo",
+
+
+def add_watch_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Poll file stats instead of using inotify. Defaults to false.",
+    )
+    parser.add_argument(
+        "--interval",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
-        """,
+        type=float,
+        default=1.0,
+        help="Seconds between polls. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--debounce",
+        action="store",
+        type=float,
+        default=0.5,
+        help="Seconds without changes before syncing. Defaults to %(default)s.",
     )
-    parser_git_add.set_defaults(which="add")
 
-    parser_git_commit = subparsers.add_parser("commit", help="Git commit zets in a repo.")
-    parser_git_commit.add_argument(
-        "-m",
-        "--message",
+
+def add_daemon_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--stop",
+        action="store_true",
+        help="Stop the running daemon. Defaults to false.",
+    )
+
+
+def add_stats_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        dest="show_metrics",
+        help="""Print the operation counters and latencies kept
+        with `ZET_METRICS`, or by `zet daemon`. Defaults to false.
+        """,
+    )
+    parser.add_argument(
+        "--format",
         action="store",
-        default="",
-        help="Commit message. Defaults to none."
+        dest="output_format",
+        default="json",
+        choices=("json", "prometheus"),
+        help="Metrics format. Defaults to %(default)s.",
     )
-    parser_git_commit.add_argument(
-        "-r",
-        "--zet_repo",
+
+
+def add_search_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "query",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
+        type=str,
+        help="""Search terms. Every term has to match.
+
+        Example:
+        `zet search 'graph data* "exact phrase"'`
         """,
     )
-    parser_git_commit.set_defaults(which="commit")
+    parser.add_argument(
+        "-n",
+        "--limit",
+        action="store",
+        type=int,
+        default=20,
+        help="Maximum number of results. Defaults to %(default)s.",
+    )
 
-    parser_git_push = subparsers.add_parser("push", help="Git push zets in a repo.")
-    parser_git_push.add_argument(
-        "-r",
-        "--zet_repo",
+
+def add_backlinks_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "path",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
-        """,
+        type=str,
+        help="Path to the linked zet.",
+    )
+    parser.add_argument(
+        "-full",
+        "--full_path",
+        action="store_true",
+        help="Full paths to zets. Defaults to false.",
     )
-    parser_git_push.set_defaults(which="push")
 
-    parser_git_pull = subparsers.add_parser("pull", help="Git pull zet repo.")
-    parser_git_pull.add_argument(
-        "-r",
-        "--zet_repo",
+
+def add_graph_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    graph_subparsers = parser.add_subparsers(help="graph query help", dest="graph_command", required=True)
+
+    parser_neighbors = graph_subparsers.add_parser(
+        "neighbors",
+        help="Zets within a number of links of a zet.",
+        formatter_class=HelpFormatter,
+    )
+    parser_neighbors.add_argument("path", action="store", type=str, help="Path to the starting zet.")
+    parser_neighbors.add_argument(
+        "-d",
+        "--depth",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
+        type=int,
+        default=1,
+        help="Maximum number of links to follow. Defaults to %(default)s.",
+    )
+
+    # only imported when the graph command's arguments are built
+    from .link_graph import DIRECTIONS
+
+    parser_path = graph_subparsers.add_parser(
+        "path",
+        help="Shortest chain of links between two zets.",
+        formatter_class=HelpFormatter,
+    )
+    parser_path.add_argument("source", action="store", type=str, help="Path to the starting zet.")
+    parser_path.add_argument("target", action="store", type=str, help="Path to the destination zet.")
+
+    for parser_query in (parser_neighbors, parser_path):
+        parser_query.add_argument(
+            "--direction",
+            action="store",
+            default="out",
+            choices=DIRECTIONS,
+            help="""Follow outgoing links, incoming links (backlinks),
+            or both. Defaults to "%(default)s".
+            """,
+        )
+
+
+def add_add_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    add_repo_argument(parser, settings, settings.get_repo_names())
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="""Stage every file with `git add .`, instead of only
+        the zets the CLI changed. Defaults to false.
         """,
     )
-    parser_git_pull.set_defaults(which="pull")
 
-    parser_open_editor = subparsers.add_parser("editor", help="Open the editor to a repo.")
-    parser_open_editor.add_argument(
-        "-r",
-        "--zet_repo",
+
+def add_all_repos_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the `--all` options of the git commands."""
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        dest="all_repos",
+        help="""Run in every repo at once, instead of one repo,
+        and print the status of each. Defaults to false.
+        """,
+    )
+    parser.add_argument(
+        "--timeout",
         action="store",
-        default=settings.get_default_repo(),
-        const=settings.get_default_repo(),
-        nargs="?",
-        choices=settings.get_repo_names(),
-        help="""A zet repo folder name. Defaults to "%(default)s".
-        This option is available for all sub-commands.
+        type=float,
+        default=120.0,
+        help="Seconds per repo with `--all`. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        action="store",
+        type=int,
+        default=8,
+        help="Repos worked on at once with `--all`. Defaults to %(default)s.",
+    )
+
+
+def add_commit_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    parser.add_argument(
+        "-m",
+        "--message",
+        action="store",
+        default="",
+        help="Commit message. Defaults to none."
+    )
+    add_repo_argument(parser, settings, settings.get_repo_names())
+    add_all_repos_arguments(parser)
+
+
+def add_remote_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    add_repo_argument(parser, settings, settings.get_repo_names())
+    add_all_repos_arguments(parser)
+
+
+def add_repo_arguments(parser: argparse.ArgumentParser, settings: Settings) -> None:
+    add_repo_argument(parser, settings, settings.get_repo_names())
+
+
+# Sub-command help and the function that adds its arguments.
+# Arguments are only added for the command being run, every
+# other sub-command is registered with its help text alone.
+COMMANDS: Dict[str, Tuple[str, Callable[[argparse.ArgumentParser, Settings], None]]] = {
+    "create": (
+        """Creates a zet file.
+
+        The file has "metadata" added into the template
+        based on the parameters passed to each argument.
+        """,
+        add_create_arguments,
+    ),
+    "bulk": ("Bulk imports zets from a folder.", add_bulk_arguments),
+    "link": (
+        """Adds and removes links of a zet.
+
+        Every change is applied in one rewrite of the zet,
+        and the backlink index is updated.
+        """,
+        add_link_arguments,
+    ),
+    "export": (
+        """Streams the metadata of every zet as NDJSON.
+
+        One JSON object per line, with the path, repo, title,
+        date, category, tags, and links of a zet.
+        """,
+        add_export_arguments,
+    ),
+    "import": (
+        """Creates zets from an NDJSON stream.
+
+        Reads the output of `zet export` one line at a time.
+        """,
+        add_import_arguments,
+    ),
+    "add_repo": (
+        """Creates a zet repo.
+
+        Repos are folders that store zets. Separate repos
+        are used to organize notes at a higher level than
+        categories/tags.
+
+        This could be useful for separating
+        things like general/personal notes from work-specific
+        knowledge.
+        """,
+        add_add_repo_arguments,
+    ),
+    "list": ("List zets from a folder.", add_list_arguments),
+    "sync": (
+        """Synchronizes the zets database.
+
+        Only zets that were added, changed, or deleted since
+        the last sync are re-indexed.
+        """,
+        add_sync_arguments,
+    ),
+    "watch": (
+        """Keeps the database in sync as zets change.
+
+        Watches every repo and re-indexes changed zets
+        until interrupted.
+        """,
+        add_watch_arguments,
+    ),
+    "daemon": (
+        """Serves commands from a resident process.
+
+        While it runs, `list`, `search`, `backlinks`, `graph`,
+        `link`, `sync`, and `stats` are forwarded to it over a socket
+        instead of starting from scratch.
+        """,
+        add_daemon_arguments,
+    ),
+    "stats": (
+        """Zet counts of each repo, or metrics with `--metrics`.
+
+        Set `ZET_METRICS` to a file path to keep metrics
+        across commands.
+        """,
+        add_stats_arguments,
+    ),
+    "search": (
+        """Full-text search of every zet.
+
+        Uses the search index built by `zet sync`.
+        """,
+        add_search_arguments,
+    ),
+    "backlinks": (
+        """Lists the zets that link to a zet.
+
+        Uses the backlink index kept up to date by `zet sync`
+        and by adding or deleting links.
+        """,
+        add_backlinks_arguments,
+    ),
+    "graph": (
+        """Link graph queries.
+
+        Uses the links synced by `zet sync`.
+        """,
+        add_graph_arguments,
+    ),
+    "init": ("Git init inside a repo.", add_repo_arguments),
+    "add": (
+        """Git add changed zets inside a repo.
+
+        Only zets created, linked, or synced by the CLI since
+        the last add are staged, use `--full` for everything.
+        """,
+        add_add_arguments,
+    ),
+    "commit": ("Git commit zets in a repo, or every repo with `--all`.", add_commit_arguments),
+    "push": ("Git push zets in a repo, or every repo with `--all`.", add_remote_arguments),
+    "pull": ("Git pull zet repo, or every repo with `--all`.", add_remote_arguments),
+    "editor": ("Open the editor to a repo.", add_repo_arguments),
+}
+
+
+# commands that run until they're stopped, they check the
+# settings for changes per sync or request instead
+UNBATCHED_COMMANDS = ("watch", "daemon")
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Builds the argument parser.
+
+    Params:
+        command (Optional[str]): The sub-command being run, the only
+            one that gets its arguments. Defaults to none, for
+            top-level help.
+
+    Returns:
+        parser (argparse.ArgumentParser): The parser.
+    """
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        prog="zet",
+        formatter_class=RawDescriptionHelpFormatter,
+        description=DESCRIPTION.format(default_repo_path=settings.get_default_repo_path()),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="""Profile the command with cProfile and write the stats
+        to `zet-<command>.pstats`. Goes before the sub-command.
+        """,
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="""Print the time spent in each phase of the command.
+        Goes before the sub-command.
         """,
     )
-    parser_open_editor.set_defaults(which="editor")
+    subparsers = parser.add_subparsers(help="sub-command help", dest="command")
 
-    args = parser.parse_args(argv)
+    for name, (help_text, add_arguments) in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=help_text, formatter_class=HelpFormatter)
+        if name == command:
+            add_arguments(subparser, settings)
+        subparser.set_defaults(which=name)
 
-    pprint.pprint(vars(args))
+    return parser
 
+
+def main(argv: Optional[Sequence[str]] = None, use_daemon: bool = True) -> int:
+    """
+    Commands are forwarded to `zet daemon` when it's running,
+    set `use_daemon` to False or `ZET_NO_DAEMON` to run them here.
+
+    TODO:
+        * list repos should have a choice of 1 or all
+        * templates should have a list option for all template
+            names with paths
+        * there should be a pretty printer for all options
+            that print things
+    """
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    # the sub-command is the first positional argument,
+    # there are no top-level options that take a value
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+
+    # only pay for importing the client when a daemon might be up
+    use_daemon = use_daemon and not os.environ.get("ZET_NO_DAEMON")
+    if use_daemon and os.path.exists(get_settings().get_env_path("zet.sock")):
+        from .daemon import DAEMON_COMMANDS, forward
+
+        if command in DAEMON_COMMANDS:
+            status = forward(argv)
+            if status is not None:
+                return status
+
+    # enabled before parsing so loading the settings is timed
+    options = argv[:argv.index(command)] if command else argv
+    enable_timings = "--timings" in options and not timings.enabled
+    if enable_timings:
+        timings.enable()
+
+    # the settings file is checked for changes once for the
+    # parse and once for the command, not on every read
+    settings = get_settings()
+
+    profiler = None
+    try:
+        with span("parse args"), settings.batch():
+            parser = build_parser(command)
+            args = parser.parse_args(argv)
+
+        # exports write their stream to stdout
+        if args.command != "export":
+            import pprint
+            pprint.pprint(vars(args))
+
+        if args.profile:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        with span(f"zet {args.command}" if args.command else "zet"):
+            if args.command in UNBATCHED_COMMANDS:
+                return run_command(args, parser)
+            with settings.batch():
+                return run_command(args, parser)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profile_path = f"zet-{args.command or 'help'}.pstats"
+            profiler.dump_stats(profile_path)
+            print(f"Profile written to {profile_path}, view it with `python -m pstats {profile_path}`", file=sys.stderr)
+        if enable_timings:
+            # the daemon runs many commands, each reports its own
+            timings.disable()
+            print(timings.report(), file=sys.stderr)
+            timings.reset()
+
+
+def run_command(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """Runs a parsed command.
+
+    Params:
+        args (argparse.Namespace): Parsed arguments.
+        parser (argparse.ArgumentParser): The parser, for help.
+
+    Returns:
+        status (int): Exit status.
+    """
     if args.command:
+        import inspect
+
         # Map arg to command
-        func = FUNCTION_MAP[args.command]
+        all_repos = getattr(args, "all_repos", False)
+        func = load_function(f"{args.command}_all" if all_repos else args.command)
 
         # Filter argparse specific keys from
         # argument values to only ones used
@@ -361,10 +844,52 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         # Edge case handling
         # for anything that has multiple function
         # calls outside the function map
-        if args.command == "create":
-            zet = Zet()
-            zet.create(**filtered_args)
-            open_editor(path=zet.path)
+        if all_repos:
+            from .git_commands import format_git_results
+
+            results = func(**filtered_args)
+            print(format_git_results(results))
+            if any(result.status in ("failed", "timeout") for result in results):
+                return 1
+        elif args.command == "create":
+            from .editor_commands import open_editor
+
+            func(**filtered_args)
+            open_editor(path=func.__self__.path)
+        elif args.command == "list":
+            # tag and category filters use the tag index
+            if args.tag or args.any_tag or args.not_tag or args.category:
+                from .tags import filter_zets
+
+                zets = filter_zets(**{
+                    key: value for key, value in vars(args).items()
+                    if key in inspect.signature(filter_zets).parameters
+                })[:args.limit]
+            else:
+                zets = func(**filtered_args)
+            for zet in zets:
+                print(zet)
+        elif args.command in ("backlinks", "link"):
+            for zet in func(**filtered_args):
+                print(zet)
+        elif args.command == "graph":
+            graph = func()
+            if args.graph_command == "neighbors":
+                path = os.path.abspath(os.path.expanduser(args.path))
+                for zet, distance in graph.neighbors(path, args.depth, args.direction).items():
+                    print(f"{distance}  {zet}")
+            else:
+                source = os.path.abspath(os.path.expanduser(args.source))
+                target = os.path.abspath(os.path.expanduser(args.target))
+                zet_path = graph.shortest_path(source, target, args.direction)
+                print("\n".join(zet_path) if zet_path else "No path found.")
+        elif args.command == "stats":
+            print(func(**filtered_args))
+        elif args.command == "import":
+            print(f"Imported {func(**filtered_args)} zets")
+        elif args.command == "search":
+            for path, score in func(**filtered_args):
+                print(f"{score:8.3f}  {path}")
         else:
             func(**filtered_args)
 
@@ -376,4 +901,3 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
 
 if __name__ == "__main__":
     exit(main())
-
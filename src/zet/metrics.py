@@ -0,0 +1,272 @@
+"""Operation counters and latencies, for scraping.
+
+Modules count what they do with `inc()` and time it with
+`observe()`, in batches rather than per file. Both return
+right away unless metrics are enabled, so the calls stay in
+the code.
+
+Metrics are enabled by setting `ZET_METRICS` to a file path.
+Every process then adds its counts to that file when it exits,
+so the file keeps running totals across commands, cron jobs,
+and daemons. `zet daemon` always keeps metrics, `zet stats
+--metrics` run against it shows the live totals.
+
+    ZET_METRICS=~/zet/.env/metrics.json zet sync
+    zet stats --metrics --format prometheus
+"""
+import atexit
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+METRICS_ENV = "ZET_METRICS"
+
+# every metric name is prefixed with this in Prometheus text
+PREFIX = "zet_"
+
+# `(name, ((label, value), ...))`
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Metrics:
+    """Registry of counters and summaries.
+
+    Counters only go up. Summaries keep the count, sum, and
+    max of observed values, like the latency of each git command.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.counters: Dict[MetricKey, float] = {}
+        self.summaries: Dict[MetricKey, List[float]] = {}
+        self.path: Optional[str] = None
+
+    def enable(self, path: Optional[str] = None) -> None:
+        """Starts recording metrics.
+
+        Params:
+            path (Optional[str]): File the totals are added to
+                at exit. Defaults to none, metrics are only
+                kept in memory.
+
+        Returns:
+            None
+        """
+        if path and self.path is None:
+            atexit.register(self.save)
+        self.enabled = True
+        self.path = path or self.path
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Adds to a counter.
+
+        Params:
+            name (str): Counter name, like "files_stat_total".
+            value (float): Amount to add. Defaults to 1.
+            labels (str): Labels of the counter.
+
+        Returns:
+            None
+        """
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """Records a value, like a latency in seconds.
+
+        Params:
+            name (str): Summary name, like "git_subprocess_seconds".
+            value (float): The observed value.
+            labels (str): Labels of the summary.
+
+        Returns:
+            None
+        """
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            summary = self.summaries.get(key)
+            if summary is None:
+                self.summaries[key] = [1, value, value]
+            else:
+                summary[0] += 1
+                summary[1] += value
+                summary[2] = max(summary[2], value)
+
+    def snapshot(self) -> Dict:
+        """Every metric, as JSON-compatible data.
+
+        Returns:
+            snapshot (Dict): `counters` and `summaries` lists of
+                `{"name", "labels", ...}` records.
+        """
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ],
+            "summaries": [
+                {"name": name, "labels": dict(labels), "count": count, "sum": total, "max": largest}
+                for (name, labels), (count, total, largest) in sorted(self.summaries.items())
+            ],
+        }
+
+    def merge(self, snapshot: Dict) -> None:
+        """Adds the metrics of a snapshot to this registry.
+
+        Params:
+            snapshot (Dict): From `snapshot()`.
+
+        Returns:
+            None
+        """
+        for record in snapshot.get("counters", []):
+            key = (record["name"], tuple(sorted(record["labels"].items())))
+            self.counters[key] = self.counters.get(key, 0) + record["value"]
+        for record in snapshot.get("summaries", []):
+            key = (record["name"], tuple(sorted(record["labels"].items())))
+            summary = self.summaries.setdefault(key, [0, 0.0, record["max"]])
+            summary[0] += record["count"]
+            summary[1] += record["sum"]
+            summary[2] = max(summary[2], record["max"])
+
+    def save(self) -> None:
+        """Adds the metrics to the metrics file, then clears them.
+
+        The file is locked while it's updated, and written to a
+        temporary path then moved over the old one. Nothing is
+        written without a path or if nothing was recorded.
+        """
+        if not self.path or not (self.counters or self.summaries):
+            return
+
+        # processes exiting together take turns adding their counts
+        with open(f"{self.path}.lock", "a") as lock:
+            try:
+                import fcntl
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            except ImportError:
+                pass
+
+            totals = Metrics()
+            totals.merge(load_snapshot(self.path))
+            totals.merge(self.snapshot())
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as file:
+                json.dump(totals.snapshot(), file, indent=2)
+            os.replace(tmp_path, self.path)
+
+        self.counters = {}
+        self.summaries = {}
+
+    def collect(self) -> "Metrics":
+        """Totals from the metrics file plus this process.
+
+        Returns:
+            metrics (Metrics): A new registry with every total.
+        """
+        totals = Metrics()
+        if self.path:
+            totals.merge(load_snapshot(self.path))
+        totals.merge(self.snapshot())
+        return totals
+
+    def to_json(self) -> str:
+        """Every metric as JSON."""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text format."""
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:g}")
+        families: Dict[str, List[Tuple[str, float, float, float]]] = {}
+        for (name, labels), (count, total, largest) in sorted(self.summaries.items()):
+            families.setdefault(PREFIX + name, []).append((_labels(labels), count, total, largest))
+        for metric, samples in families.items():
+            # a summary has no max, it's a gauge family of its own
+            lines.append(f"# TYPE {metric} summary")
+            for labels, count, total, _ in samples:
+                lines.append(f"{metric}_count{labels} {count:g}")
+                lines.append(f"{metric}_sum{labels} {total:g}")
+            lines.append(f"# TYPE {metric}_max gauge")
+            for labels, _, _, largest in samples:
+                lines.append(f"{metric}_max{labels} {largest:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    """Prometheus label set, `{key="value"}`."""
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def load_snapshot(path: str) -> Dict:
+    """Reads a metrics file, a missing or broken file is empty."""
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+# process-wide metrics
+metrics = Metrics()
+if os.environ.get(METRICS_ENV):
+    metrics.enable(os.path.expanduser(os.environ[METRICS_ENV]))
+
+
+def inc(name: str, value: float = 1, **labels: str) -> None:
+    """Adds to a counter of the process-wide metrics."""
+    if metrics.enabled:
+        metrics.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Records a value in the process-wide metrics."""
+    if metrics.enabled:
+        metrics.observe(name, value, **labels)
+
+
+def zet_stats(show_metrics: bool = False, output_format: str = "json") -> str:
+    """Zet counts, or the metrics with `show_metrics`.
+
+    Params:
+        show_metrics (bool): Show the metrics totals of the
+            metrics file and this process. Defaults to False.
+        output_format (str): "json" or "prometheus" metrics.
+            Defaults to "json".
+
+    Returns:
+        text (str): The stats.
+    """
+    if show_metrics:
+        totals = metrics.collect()
+        return totals.to_prometheus() if output_format == "prometheus" else totals.to_json()
+
+    from pathlib import Path
+
+    from .settings import get_settings
+    from .tags import TagIndexReader
+
+    with TagIndexReader(Path(get_settings().install_path / ".env/tags.db")) as index:
+        repos = index.bitmaps("repos")
+    lines = [f"{'repo':<24}{'zets':>10}"]
+    for repo_name, bitmap in sorted(repos.items()):
+        lines.append(f"{repo_name:<24}{bin(bitmap).count('1'):>10}")
+    if metrics.enabled:
+        lines.append(f"\nMetrics are kept in {metrics.path or 'memory'}.")
+    else:
+        lines.append(f"\nMetrics are off, set {METRICS_ENV} to a file path to keep them.")
+    return "\n".join(lines)
@@ -0,0 +1,150 @@
+"""Compact in-memory form of a zet's metadata.
+
+Parsed metadata is a dict per zet, with its own copy of every
+key and of every tag, category, and link string. Holding a
+million of them, as a sync of a large repo does, costs several
+hundred bytes per zet.
+
+A `ZetRecord` keeps the same metadata in `__slots__`. Tags
+and links are tuples, and repo, category, tag, and link
+strings are interned, so the handful of tags and categories
+used across a repo are stored once. Records read like metadata
+dicts with `get()` and `[]`, and `to_metadata()` turns one back
+into a dict.
+"""
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# metadata keys with their own slot, by slot name
+KEYS = {
+    "permalink": "path",
+    "title": "title",
+    "date": "date",
+    "category": "category",
+    "tags": "tags",
+    "links": "links",
+}
+SLOTS = {key: slot for slot, key in KEYS.items()}
+
+# list values, stored as tuples of interned strings
+LIST_KEYS = frozenset(("tags", "links"))
+
+# values with few distinct strings across a repo
+INTERNED_KEYS = frozenset(("category",))
+
+Value = Union[str, List[str]]
+
+
+def intern_value(value: Value) -> Union[str, Tuple[str, ...]]:
+    """Interns a string, or each string of a list."""
+    if isinstance(value, list):
+        return tuple(sys.intern(item) if isinstance(item, str) else item for item in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+class ZetRecord:
+    """Metadata of one zet, in slots.
+
+    Keys of the default template have their own slot, None
+    when the zet doesn't have the key. Any other keys are kept
+    in `extra` as `(key, value)` pairs.
+    """
+
+    __slots__ = ("path", "repo_name", "permalink", "title", "date", "category", "tags", "links", "extra")
+
+    def __init__(self,
+                 path: str,
+                 repo_name: Optional[str] = None,
+                 permalink: Optional[str] = None,
+                 title: Optional[str] = None,
+                 date: Optional[str] = None,
+                 category: Optional[str] = None,
+                 tags: Optional[Tuple[str, ...]] = None,
+                 links: Optional[Tuple[str, ...]] = None,
+                 extra: Optional[Tuple[Tuple[str, Value], ...]] = None) -> None:
+        self.path = path
+        self.repo_name = repo_name
+        self.permalink = permalink
+        self.title = title
+        self.date = date
+        self.category = category
+        self.tags = tags
+        self.links = links
+        self.extra = extra
+
+    @classmethod
+    def from_metadata(cls, path: str, repo_name: Optional[str], metadata: Dict[str, Value]) -> "ZetRecord":
+        """Builds a record from parsed metadata.
+
+        Params:
+            path (str): Path to the zet.
+            repo_name (Optional[str]): The repo of the zet.
+            metadata (Dict[str, Value]): Parsed metadata, from
+                `frontmatter.parse`.
+
+        Returns:
+            record (ZetRecord): The record, it doesn't share
+                lists with the metadata.
+        """
+        record = cls(sys.intern(path), sys.intern(repo_name) if repo_name else None)
+        extra = []
+        for key, value in metadata.items():
+            slot = SLOTS.get(key)
+            if slot is None:
+                extra.append((sys.intern(key), tuple(value) if isinstance(value, list) else value))
+            elif key in LIST_KEYS:
+                setattr(record, slot, intern_value(value if isinstance(value, list) else [value]))
+            elif key in INTERNED_KEYS:
+                setattr(record, slot, intern_value(value))
+            else:
+                setattr(record, slot, value)
+        if extra:
+            record.extra = tuple(extra)
+        return record
+
+    def to_metadata(self) -> Dict[str, Value]:
+        """The metadata as a new dict, lists and all."""
+        return dict(self.items())
+
+    def items(self) -> Iterator[Tuple[str, Value]]:
+        """`(key, value)` pairs of the metadata the zet has."""
+        for slot, key in KEYS.items():
+            value = getattr(self, slot)
+            if value is not None:
+                yield key, list(value) if key in LIST_KEYS else value
+        for key, value in self.extra or ():
+            yield key, list(value) if isinstance(value, tuple) else value
+
+    def get(self, key: str, default: Optional[Value] = None) -> Optional[Value]:
+        """Metadata value of a key, like `dict.get()`.
+
+        Tags and links are returned as tuples, they're
+        shared with the record.
+        """
+        slot = SLOTS.get(key)
+        if slot is not None:
+            value = getattr(self, slot)
+            return default if value is None else value
+        for extra_key, value in self.extra or ():
+            if extra_key == key:
+                return value
+        return default
+
+    def __getitem__(self, key: str) -> Value:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ZetRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"ZetRecord(path={self.path!r}, title={self.title!r})"
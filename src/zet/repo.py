@@ -1,9 +1,18 @@
 import os
-from typing import List, Optional
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
 
-from .settings import Settings
+from .ids import ID_TIMESTAMP_LENGTH, date_bound, id_timestamp
+from .metrics import inc
+from .settings import get_settings
+from .timings import span
 
-settings = Settings()
+settings = get_settings()
+
+# folders inside a repo that only hold attachments
+ATTACHMENT_FOLDERS = {"attachments", "assets", "images"}
+# zets are markdown, anything else in a zet folder is an attachment
+ZET_SUFFIX = ".md"
 
 
 class RepoDoesNotExistException(Exception):
@@ -80,44 +89,299 @@ class Repo:
         }
         settings.append_setting("zet_repos", new_repo)
 
-    def list_zets(self, zet_repo: str = None, full_path: bool = False) -> List[str]:
+    def iter_zets(self,
+                  zet_repo: str = None,
+                  limit: Optional[int] = None,
+                  since: Optional[str] = None,
+                  until: Optional[str] = None) -> Iterator["ZetEntry"]:
+        """Lazily walks the zets of a repo.
+
+        Folders are read with `os.scandir` one at a time as the
+        generator is consumed, so stopping early (or passing a
+        `limit`) never reads the rest of the repo. Hidden folders,
+        such as `.git`, and attachment folders are pruned.
+        Only `.md` files are zets, hidden files are skipped.
+
+        Zets are yielded in ID order, folders are sorted with
+        months compared as numbers.
+
+        With `since` or `until` only the `<year>/<month>/<id>/`
+        folders that overlap the range are read, dates come from
+        the folder names and no zet is opened. Files outside
+        that layout are left out.
+
+        Params:
+            zet_repo (str): Folder to search. Defaults to the repo folder.
+            limit (Optional[int]): Maximum number of zets. Defaults to all.
+            since (Optional[str]): Earliest date, inclusive, such as
+                `2022-03` (see `ids.date_bound`). Defaults to none.
+            until (Optional[str]): Latest date, inclusive of the whole
+                period, so `2022-06` includes all of June. Defaults to none.
+
+        Returns:
+            zets (Iterator[ZetEntry]): The zet files.
+
+        Raises:
+            RepoDoesNotExistException
+            ValueError
+        """
+        if zet_repo is None:
+            zet_repo = self.repo_path
+
+        if not os.path.isdir(zet_repo):
+            raise RepoDoesNotExistException("Repo does not exist.")
+
+        if since is None and until is None:
+            return islice(self._scan(zet_repo), limit)
+
+        bounds = (
+            date_bound(since) if since else "",
+            date_bound(until, end=True) if until else "9" * ID_TIMESTAMP_LENGTH,
+        )
+        return islice(self._scan(zet_repo, bounds=bounds), limit)
+
+    def _scan(self,
+              folder: str,
+              bounds: Optional[Tuple[str, str]] = None,
+              depth: int = 0,
+              prefix: str = "") -> Iterator["ZetEntry"]:
+        """Depth-first walk of one folder.
+
+        With `bounds` the first three levels are the year,
+        month, and ID folders. `prefix` is the date of the
+        current folder, `2022` then `202206`.
+        """
+        try:
+            with os.scandir(folder) as scan:
+                # months aren't zero padded, "2" has to sort before "10"
+                entries = sorted(scan, key=lambda entry: entry.name.zfill(2))
+        except (FileNotFoundError, NotADirectoryError):
+            # removed while walking
+            return
+
+        in_layout = bounds is not None and depth < 3
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in ATTACHMENT_FOLDERS:
+                    continue
+                if not in_layout:
+                    yield from self._scan(entry.path, bounds, depth + 1, prefix)
+                    continue
+
+                folder_date = self._folder_date(entry.name, depth, prefix)
+                if folder_date is None:
+                    continue
+                since, until = bounds
+                if since[:len(folder_date)] <= folder_date <= until[:len(folder_date)]:
+                    yield from self._scan(entry.path, bounds, depth + 1, folder_date)
+            elif not in_layout and entry.name.lower().endswith(ZET_SUFFIX):
+                yield ZetEntry(entry)
+
+    @staticmethod
+    def _folder_date(name: str, depth: int, prefix: str) -> Optional[str]:
+        """Date of a year, month, or ID folder, None for other folders."""
+        if depth == 0:
+            return name if len(name) == 4 and name.isdigit() else None
+        if depth == 1:
+            return prefix + name.zfill(2) if len(name) <= 2 and name.isdigit() else None
+        timestamp = id_timestamp(name)
+        return timestamp if len(timestamp) == ID_TIMESTAMP_LENGTH and timestamp.isdigit() else None
+
+    def list_zets(self,
+                  zet_repo: str = None,
+                  full_path: bool = False,
+                  limit: Optional[int] = None,
+                  since: Optional[str] = None,
+                  until: Optional[str] = None) -> List[str]:
         """Lists zets.
 
         This will be a catch-all for listing
         zets based on different argument structures.
+        Built on `iter_zets()`.
 
         Params:
             folder (str): Folder to search.
             full_path (bool): Determines if full file paths will
                 be provided. Defaults to False.
+            limit (Optional[int]): Maximum number of zets. Defaults to all.
+            since (Optional[str]): Earliest date, inclusive. Defaults to none.
+            until (Optional[str]): Latest date, inclusive. Defaults to none.
 
         Returns:
             zets (List[str]): List of zets.
 
         Raises:
             RepoDoesNotExistException
+            ValueError
         """
+        zets = self.iter_zets(zet_repo, limit=limit, since=since, until=until)
+        with span("repo walk"):
+            if full_path:
+                zets = [zet.path for zet in zets]
+            else:
+                zets = [zet.name for zet in zets]
+        inc("zets_listed_total", len(zets))
+        return zets
 
-        if zet_repo is None:
-            zet_repo = self.repo_path
 
-        zet_list = []
-        if not os.path.exists(zet_repo):
-            raise RepoDoesNotExistException("Repo does not exist.")
+class ZetEntry:
+    """A zet file found by `Repo.iter_zets()`.
 
-        if full_path:
-            for root, dirs, files in os.walk(zet_repo, topdown=True):
-                # exclude .git folder from the results
-                dirs[:] = [d for d in dirs if d not in {".git",}]
-                for file in files:
-                    if not file.endswith((".png", ".gif", ".jpg")):
-                        full_file_path = os.path.join(root, file)
-                        zet_list.append(full_file_path)
-        else:
-            for root, dirs, files in os.walk(zet_repo):
-                for file in files:
-                    if not file.endswith((".png", ".gif", ".jpg")):
-                        zet_list.append(file)
+    Backed by the `os.DirEntry` of the scan, so the name and
+    path need no extra work and `stat()` is cached after
+    the first call.
+    """
+
+    __slots__ = ("entry",)
+
+    def __init__(self, entry: os.DirEntry) -> None:
+        self.entry = entry
+
+    def __repr__(self) -> str:
+        return f"ZetEntry({self.entry.path!r})"
+
+    @property
+    def name(self) -> str:
+        """File name of the zet."""
+        return self.entry.name
+
+    @property
+    def path(self) -> str:
+        """Full path to the zet."""
+        return self.entry.path
+
+    @property
+    def zet_id(self) -> str:
+        """ID of the zet, the name of its folder."""
+        return os.path.basename(os.path.dirname(self.entry.path))
 
-        return zet_list
+    def stat(self) -> os.stat_result:
+        """File stats of the zet, cached."""
+        return self.entry.stat()
 
+
+def is_zet_path(relative_path: str) -> bool:
+    """Whether a path in a repo is a zet `Repo.iter_zets()` lists.
+
+    Params:
+        relative_path (str): Path relative to the repo folder.
+
+    Returns:
+        is_zet (bool): False for hidden files and folders,
+            attachments, files that aren't `.md`, and paths
+            outside the repo.
+    """
+    parts = os.path.normpath(relative_path).split(os.sep)
+    if any(part.startswith(".") for part in parts):
+        return False
+    if any(folder in ATTACHMENT_FOLDERS for folder in parts[:-1]):
+        return False
+    return parts[-1].lower().endswith(ZET_SUFFIX)
+
+
+def list_repo_zets(zet_repo: Optional[str] = None,
+                   full_path: bool = False,
+                   limit: Optional[int] = None,
+                   since: Optional[str] = None,
+                   until: Optional[str] = None) -> List[str]:
+    """Lists the zets of a repo by name.
+
+    Params:
+        zet_repo (Optional[str]): A zet repo name. Defaults to the default repo.
+        full_path (bool): Determines if full file paths will
+            be provided. Defaults to False.
+        limit (Optional[int]): Maximum number of zets. Defaults to all.
+        since (Optional[str]): Earliest date, inclusive. Defaults to none.
+        until (Optional[str]): Latest date, inclusive. Defaults to none.
+
+    Returns:
+        zets (List[str]): List of zets.
+
+    Raises:
+        RepoDoesNotExistException
+        ValueError
+    """
+    return Repo(zet_repo).list_zets(full_path=full_path, limit=limit, since=since, until=until)
+
+
+class RepoResolver:
+    """Finds the repo a zet path belongs to.
+
+    Repo folders are split into path components and stored
+    in a trie. Resolving a path walks its components, so the
+    cost is the depth of the path rather than the number of
+    repos. A folder only matches whole components, `/notes/work2`
+    is not in `/notes/work`, and the deepest folder wins for
+    repos nested inside each other.
+
+    Use `get_repo_resolver()` for a resolver that follows
+    the current settings.
+    """
+
+    def __init__(self, repos: Dict[str, Dict]) -> None:
+        """Builds the trie.
+
+        Params:
+            repos (Dict[str, Dict]): Repo settings by name,
+                as returned by `Settings.get_repos()`.
+
+        Returns:
+            None
+        """
+        # nodes map a path component to the next node,
+        # the `None` key holds the repo name of a folder
+        self.root = {}
+        for repo_name, repo in repos.items():
+            node = self.root
+            for part in self._parts(repo["folder"]):
+                node = node.setdefault(part, {})
+            node[None] = repo_name
+
+    def resolve(self, path: str) -> Optional[str]:
+        """Name of the repo a path is in.
+
+        Params:
+            path (str): Path to a zet or folder.
+
+        Returns:
+            repo_name (Optional[str]): The repo, or None if
+                the path isn't in any repo.
+        """
+        node = self.root
+        repo_name = node.get(None)
+        for part in self._parts(path):
+            node = node.get(part)
+            if node is None:
+                break
+            repo_name = node.get(None, repo_name)
+        return repo_name
+
+    @staticmethod
+    def _parts(path: str) -> List[str]:
+        """Components of a normalized absolute path."""
+        return [part for part in os.path.abspath(path).split(os.sep) if part]
+
+
+_resolver = None
+_resolver_version = None
+
+
+def get_repo_resolver() -> RepoResolver:
+    """Resolver for the repos in settings.
+
+    Rebuilt only when the settings change. Reading the repos
+    checks the settings file for changes, callers that
+    resolve many paths should do it inside `settings.batch()`,
+    as CLI commands do, so the file is checked once.
+
+    Returns:
+        resolver (RepoResolver): The shared resolver.
+    """
+    global _resolver, _resolver_version
+    repos = settings.get_repos()
+    if _resolver is None or _resolver_version != settings.version:
+        _resolver = RepoResolver(repos)
+        _resolver_version = settings.version
+    return _resolver
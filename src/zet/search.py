@@ -0,0 +1,332 @@
+import math
+import os
+import re
+import sqlite3
+from array import array
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .metrics import inc
+from .settings import get_settings
+from .timings import span
+
+settings = get_settings()
+
+# words are runs of letters, digits, and underscores
+TOKEN = re.compile(r"\w+")
+
+# a query is made of quoted phrases and single terms
+QUERY_CLAUSE = re.compile(r'"([^"]*)"|(\S+)')
+
+# bytes per stored token position
+POSITION_SIZE = array("I").itemsize
+
+# posting rows buffered before they're written
+UPDATE_BATCH_ROWS = 200000
+
+# `user_version` of an index that has been built
+BUILT_VERSION = 1
+
+# BM25 ranking parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (token, doc)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_postings_doc
+    ON postings(doc);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into lowercase word tokens."""
+    return TOKEN.findall(text.lower())
+
+
+class SearchIndex:
+    """Full-text search over zet files.
+
+    An inverted index maps every token to a posting list
+    of the zets that contain it, with the token positions
+    in each zet. It's stored as a SQLite database next to
+    the zets DB, so queries never touch the zet files.
+
+    Queries support:
+        * Terms - `graph` matches zets containing the word
+        * Prefixes - `gra*` matches any word starting with `gra`
+        * Phrases - `"graph database"` matches the exact sequence
+
+    Every clause of a query has to match. Results are
+    ranked with BM25.
+
+    An index counts as built once `rebuild()` finishes, it's
+    marked in SQLite's `user_version`. Until then it's
+    `created`, and the next sync rebuilds it.
+    """
+
+    def __init__(self, index_path: Path) -> None:
+        """Opens or creates the index.
+
+        Params:
+            index_path (Path): Path to the index database.
+
+        Returns:
+            None
+        """
+        self.index_path = index_path
+        self._connection = sqlite3.connect(index_path.as_posix())
+        self._connection.executescript(SCHEMA)
+        self.created = self._connection.execute("PRAGMA user_version").fetchone()[0] != BUILT_VERSION
+
+    def __len__(self) -> int:
+        """Number of indexed zets."""
+        return self._connection.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def update(self, paths: Iterable[str]) -> None:
+        """Indexes zets, replacing any previous entries.
+
+        Postings are written in batches sorted by token, which
+        keeps inserts into the token index sequential. Bytes that
+        aren't UTF-8 are replaced, and files deleted since they
+        were listed are skipped.
+
+        Params:
+            paths (Iterable[str]): Paths to zet files.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            rows = []
+            files = 0
+            size = 0
+            for path in paths:
+                try:
+                    with open(path, "r", encoding="utf-8", errors="replace") as file:
+                        tokens = tokenize(file.read())
+                        size += os.fstat(file.fileno()).st_size
+                except FileNotFoundError:
+                    # deleted since it was listed, the next sync removes it
+                    continue
+                files += 1
+
+                positions = {}
+                for position, token in enumerate(tokens):
+                    positions.setdefault(token, array("I")).append(position)
+
+                doc = self._doc_id(path)
+                self._connection.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+                self._connection.execute("UPDATE docs SET length = ? WHERE id = ?", (len(tokens), doc))
+                rows += [(token, doc, token_positions.tobytes()) for token, token_positions in positions.items()]
+
+                if len(rows) >= UPDATE_BATCH_ROWS:
+                    self._insert_postings(rows)
+                    rows = []
+            self._insert_postings(rows)
+        inc("files_opened_total", files)
+        inc("bytes_read_total", size)
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """Removes zets from the index.
+
+        Params:
+            paths (Iterable[str]): Paths to zet files.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            for path in paths:
+                row = self._connection.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+                if row:
+                    self._connection.execute("DELETE FROM postings WHERE doc = ?", (row[0],))
+                    self._connection.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+
+    def rebuild(self, paths: Iterable[str]) -> None:
+        """Replaces the whole index.
+
+        Params:
+            paths (Iterable[str]): Paths to every zet file.
+
+        Returns:
+            None
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM postings")
+            self._connection.execute("DELETE FROM docs")
+        self.update(paths)
+        self._connection.execute(f"PRAGMA user_version = {BUILT_VERSION}")
+        self.created = False
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """Searches the index.
+
+        Params:
+            query (str): Terms, `prefix*` terms, and `"quoted phrases"`.
+            limit (int): Maximum number of results. Defaults to 20.
+
+        Returns:
+            results (List[Tuple[str, float]]): Zet paths and
+                their scores, best match first.
+        """
+        clauses = []
+        for phrase, term in QUERY_CLAUSE.findall(query):
+            if phrase:
+                tokens = tokenize(phrase)
+                if tokens:
+                    clauses.append(self._phrase_matches(tokens))
+            elif term.endswith("*"):
+                tokens = tokenize(term[:-1])
+                if tokens:
+                    clauses.append(self._prefix_matches(tokens[0]))
+            else:
+                # terms with punctuation are matched as phrases
+                tokens = tokenize(term)
+                if len(tokens) == 1:
+                    clauses.append(self._term_matches(tokens[0]))
+                elif tokens:
+                    clauses.append(self._phrase_matches(tokens))
+
+        if not clauses:
+            return []
+
+        docs = set.intersection(*(set(matches) for matches in clauses))
+        if not docs:
+            return []
+
+        doc_count, average_length = self._connection.execute(
+            "SELECT COUNT(*), AVG(length) FROM docs"
+        ).fetchone()
+        lengths = self._doc_lengths(docs)
+
+        scores = {}
+        for matches in clauses:
+            idf = math.log(1 + (doc_count - len(matches) + 0.5) / (len(matches) + 0.5))
+            for doc in docs:
+                frequency = matches[doc]
+                norm = 1 - BM25_B + BM25_B * lengths[doc] / (average_length or 1)
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        paths = self._doc_paths(doc for doc, _ in ranked)
+        return [(paths[doc], score) for doc, score in ranked]
+
+    def close(self) -> None:
+        """Closes the index database."""
+        self._connection.close()
+
+    def _doc_id(self, path: str) -> int:
+        """Gets or assigns the integer ID of a zet."""
+        row = self._connection.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+        if row:
+            return row[0]
+        return self._connection.execute("INSERT INTO docs (path, length) VALUES (?, 0)", (path,)).lastrowid
+
+    def _insert_postings(self, rows: List[Tuple[str, int, bytes]]) -> None:
+        """Inserts posting rows in token order."""
+        rows.sort(key=itemgetter(0))
+        self._connection.executemany("INSERT INTO postings (token, doc, positions) VALUES (?, ?, ?)", rows)
+
+    def _term_matches(self, token: str) -> Dict[int, int]:
+        """Term frequency of a token, by doc."""
+        rows = self._connection.execute("SELECT doc, length(positions) FROM postings WHERE token = ?", (token,))
+        return {doc: size // POSITION_SIZE for doc, size in rows}
+
+    def _prefix_matches(self, prefix: str) -> Dict[int, int]:
+        """Summed term frequency of every token with a prefix, by doc."""
+        rows = self._connection.execute(
+            "SELECT doc, length(positions) FROM postings WHERE token >= ? AND token < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        matches = {}
+        for doc, size in rows:
+            matches[doc] = matches.get(doc, 0) + size // POSITION_SIZE
+        return matches
+
+    def _phrase_matches(self, tokens: List[str]) -> Dict[int, int]:
+        """Number of times a phrase occurs, by doc.
+
+        Candidate docs contain every token of the phrase, then
+        each occurrence of the first token is checked for the
+        rest of the phrase at the following positions.
+        """
+        postings = []
+        for token in tokens:
+            rows = self._connection.execute("SELECT doc, positions FROM postings WHERE token = ?", (token,))
+            postings.append({doc: positions for doc, positions in rows})
+
+        candidates = set.intersection(*(set(token_postings) for token_postings in postings))
+
+        matches = {}
+        for doc in candidates:
+            positions = []
+            for token_postings in postings:
+                token_positions = array("I")
+                token_positions.frombytes(token_postings[doc])
+                positions.append(token_positions)
+
+            following = [set(token_positions) for token_positions in positions[1:]]
+            count = sum(
+                1 for start in positions[0]
+                if all(start + offset in token_positions for offset, token_positions in enumerate(following, 1))
+            )
+            if count:
+                matches[doc] = count
+        return matches
+
+    def _doc_lengths(self, docs: Iterable[int]) -> Dict[int, int]:
+        """Token counts of docs, by doc."""
+        return dict(self._select_docs("SELECT id, length FROM docs WHERE id IN ({})", docs))
+
+    def _doc_paths(self, docs: Iterable[int]) -> Dict[int, str]:
+        """Paths of docs, by doc."""
+        return dict(self._select_docs("SELECT id, path FROM docs WHERE id IN ({})", docs))
+
+    def _select_docs(self, sql_text: str, docs: Iterable[int]) -> List[Tuple]:
+        """Runs a doc query in batches under SQLite's variable limit."""
+        docs = list(docs)
+        rows = []
+        for start in range(0, len(docs), 900):
+            batch = docs[start:start + 900]
+            rows += self._connection.execute(sql_text.format(", ".join("?" * len(batch))), batch).fetchall()
+        return rows
+
+
+def search_zets(query: str, limit: int = 20) -> List[Tuple[str, float]]:
+    """Searches every zet in the index.
+
+    The index is kept up to date by `zet sync`.
+
+    Params:
+        query (str): Terms, `prefix*` terms, and `"quoted phrases"`.
+        limit (int): Maximum number of results. Defaults to 20.
+
+    Returns:
+        results (List[Tuple[str, float]]): Zet paths and
+            their scores, best match first. An empty list
+            before the first sync.
+    """
+    # opening the index would create it
+    index_path = Path(settings.install_path / ".env/search.db")
+    if not index_path.exists():
+        return []
+
+    index = SearchIndex(index_path)
+    try:
+        with span("search query"):
+            return index.search(query, limit=limit)
+    finally:
+        index.close()
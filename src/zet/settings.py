@@ -1,18 +1,68 @@
+from __future__ import annotations
+
 import json
 import os
-import shutil
-from pathlib import Path
-from typing import Dict, List
 
-# Project install defaults
-ZET_PROJECT = Path(__file__)
-ZET_HOME = ZET_PROJECT.parents[2]
+from .timings import span
+
+# `typing` is only imported by type checkers, see `timings`
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional
+
+# Project install defaults, kept as strings because the CLI
+# loads the settings at startup and `pathlib` is slow to
+# import. `ZET_PROJECT`, `ZET_HOME`, and `ZET_INSTALL_PATH`
+# are paths made on first use, see `__getattr__`.
+_ZET_HOME = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
 # Check env stage (test)
 if os.environ.get("ZET_STAGE") == "test":
-    ZET_INSTALL_PATH = ZET_HOME / "zet/"
+    _ZET_INSTALL_PATH = os.path.join(_ZET_HOME, "zet")
 else:
-    ZET_INSTALL_PATH = Path.home() / "zet/"
+    _ZET_INSTALL_PATH = os.path.join(os.path.expanduser("~"), "zet")
+
+
+def __getattr__(name: str) -> Path:
+    """Project install defaults as paths."""
+    paths = {"ZET_PROJECT": __file__, "ZET_HOME": _ZET_HOME, "ZET_INSTALL_PATH": _ZET_INSTALL_PATH}
+    if name not in paths:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return _path(paths[name])
+
+
+def _path(*parts: str) -> Path:
+    """A `Path`, importing `pathlib` on first use."""
+    from pathlib import Path
+    return Path(*parts)
+
+
+class _Batch:
+    """Context manager of `Settings.batch()`.
+
+    A class rather than `contextlib.contextmanager`, the CLI
+    imports this module at startup and `contextlib` isn't
+    needed otherwise.
+    """
+
+    __slots__ = ("settings",)
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+
+    def __enter__(self) -> Settings:
+        self.settings.refresh()
+        self.settings._batch_depth += 1
+        return self.settings
+
+    def __exit__(self, *exc_info) -> None:
+        settings = self.settings
+        settings._batch_depth -= 1
+        if not settings._batch_depth and settings._batch_changed:
+            settings._batch_changed = False
+            settings._write()
 
 
 class Settings:
@@ -27,14 +77,17 @@ class Settings:
     Settings are stored in JSON to allow flexibility,
     this means that there are some occassions where
     the settings will change during execution and require
-    refreshing from the file.
+    refreshing from the file. Reads check the file's modified
+    time and only parse it again if it changed.
+
+    Modules share one instance from `get_settings()`.
 
     To conserve space elsewhere and keep references DRY there
     are quite a few getter methods to allow access to the
     underlying configuration file.
     """
 
-    def __init__(self, install_path: Path = ZET_INSTALL_PATH) -> None:
+    def __init__(self, install_path: Optional[Path] = None) -> None:
         """Initializes all settings from a given `.local.json` file.
 
         If the file does not exist it will be created from the
@@ -53,28 +106,71 @@ class Settings:
             None
         """
 
-        self.zet_local_env_folder = install_path / ".env/"
-        self.zet_local_env_path = self.zet_local_env_folder / ".local.json"
+        # paths are strings, the `Path` properties are made from them
+        self._install_path = os.fspath(install_path) if install_path else _ZET_INSTALL_PATH
+        self._env_folder = os.path.join(self._install_path, ".env")
+        self._env_path = os.path.join(self._env_folder, ".local.json")
 
-        if not install_path.exists():
-            example_settings = ZET_HOME / ".env/.example.json"
-            os.makedirs(self.zet_local_env_folder)
-            shutil.copyfile(example_settings, self.zet_local_env_path)
+        if not os.path.exists(self._install_path):
+            # only needed on first run, kept out of CLI startup
+            import shutil
 
-        self.install_path = install_path
-        self.data = self.load_settings(self.zet_local_env_path)
+            example_settings = os.path.join(_ZET_HOME, ".env/.example.json")
+            os.makedirs(self._env_folder)
+            shutil.copyfile(example_settings, self._env_path)
+
+        self.version = 0
+        self._data = {}
+        self._stat = None
+        self._batch_depth = 0
+        self._batch_changed = False
+        self.refresh()
 
         # after initial setup the template and default repo need
         # to have a path discovery, then add them to the config
-        if self.data["templates"]["default"] == "":
-            keys = ["templates", "default"]
-            value = ZET_HOME / "src/zet/templates/readme.md"
-            self.update_setting(keys, value.as_posix())
+        with self.batch():
+            if self.data["templates"]["default"] == "":
+                keys = ["templates", "default"]
+                value = _path(_ZET_HOME, "src/zet/templates/readme.md")
+                self.update_setting(keys, value.as_posix())
+
+            if self.data["zet_repos"]["zets"]["folder"] == "":
+                keys = ["zet_repos", "zets", "folder"]
+                value = _path(_ZET_INSTALL_PATH, "zets")
+                self.update_setting(keys, value.as_posix())
+
+    @property
+    def install_path(self) -> Path:
+        """Folder of the install, defaults to `~/zet/`."""
+        return _path(self._install_path)
+
+    @property
+    def zet_local_env_folder(self) -> Path:
+        """The install's `.env/` folder."""
+        return _path(self._env_folder)
+
+    @property
+    def zet_local_env_path(self) -> Path:
+        """The `.local.json` settings file."""
+        return _path(self._env_path)
+
+    def get_env_path(self, name: str) -> str:
+        """Returns the path of a file in the `.env/` folder.
+
+        A string rather than a `Path`, for the CLI's
+        startup, which doesn't import `pathlib`.
+        """
+        return os.path.join(self._env_folder, name)
 
-        if self.data["zet_repos"]["zets"]["folder"] == "":
-            keys = ["zet_repos", "zets", "folder"]
-            value = ZET_INSTALL_PATH / "zets"
-            self.update_setting(keys, value.as_posix())
+    @property
+    def data(self) -> Dict:
+        """All settings.
+
+        Reloaded from `.local.json` only if the file
+        changed since it was last read or written.
+        """
+        self.refresh()
+        return self._data
 
     def refresh(self):
         """Checks for settings changes.
@@ -94,21 +190,56 @@ class Settings:
                 did not have one (env is being set up).
             1. Refreshing enables the user to have that change caught
                 during execution time. (See `Zet.create()`)
+
+        The file is only parsed again if its modified time,
+        size, or inode changed, so calling this is cheap. Every
+        reload bumps `version`. Changes made inside a `batch()`
+        haven't been written yet, so nothing is reloaded until
+        the batch ends.
         """
-        self.data = self.load_settings(self.zet_local_env_path)
+        if self._batch_depth:
+            return self
+
+        try:
+            stat = os.stat(self._env_path)
+        except FileNotFoundError:
+            # keep the last known settings, e.g. while the
+            # install folder is being recreated
+            return self
+
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if key != self._stat:
+            with span("settings load"):
+                self._data = self.load_settings(self._env_path)
+            self._stat = key
+            self.version += 1
         return self
 
+    def batch(self) -> _Batch:
+        """Groups setting changes into a single write.
+
+        Every `update_setting()` and `append_setting()` inside
+        the block changes the settings in memory, the file is
+        written once when the outermost batch ends.
+
+        Example:
+            with settings.batch():
+                settings.update_setting(["defaults", "repo"], "work")
+                settings.update_setting(["defaults", "template"], "default")
+        """
+        return _Batch(self)
+
     @staticmethod
-    def load_settings(path: Path) -> Dict:
+    def load_settings(path: str) -> Dict:
         """Load settings from the JSON file.
 
         Params:
-            path (Path): Path to a settings file.
+            path (str): Path to a settings file.
 
         Returns:
             data (Dict): Dictionary of all settings.
         """
-        with path.open("r") as file:
+        with open(path, "r") as file:
             data = json.load(file)
         return data
 
@@ -151,25 +282,13 @@ class Settings:
         by traveling down a list of keys
         (in order) to update the destination value.
 
-        TODO:
-            * This can probably be revised.
+        Use `batch()` to change several settings
+        with one write.
         """
-        # retrieve data from settings
-        settings_file = self.zet_local_env_path.open("r+")
-        data = json.load(settings_file)
-
-        # set new data values
-        self.set_item(data, keys, value)
-
-        # dump data to file
-        settings_file.seek(0)
-        json.dump(data, settings_file, indent=4)
-        settings_file.close()
-
-        # If settings are still used after updating
-        # we need to refresh it or they won't be
-        # recognized
+        # pick up outside changes before writing over them
         self.refresh()
+        self.set_item(self._data, list(keys), value)
+        self._write()
 
     def append_setting(self, key: str, value) -> None:
         """Adds a new entry to a setting.
@@ -177,19 +296,30 @@ class Settings:
         This allows for things like new repos,
         and templates.
         """
-        # retrieve data from settings
-        settings_file = self.zet_local_env_path.open("r+")
-        config_data = json.load(settings_file)
-        settings_file.close()
+        self.refresh()
+        self._data[key].update(value)
+        self._write()
+
+    def _write(self) -> None:
+        """Writes the settings to `.local.json`.
+
+        Inside a `batch()` the write is deferred until the
+        batch ends. The file is replaced atomically so readers
+        never see a partial write.
+        """
+        if self._batch_depth:
+            self._batch_changed = True
+            return
 
-        # update value
-        data = config_data[key]
-        data.update(value)
+        tmp_path = self._env_path + ".tmp"
+        with open(tmp_path, "w") as settings_file:
+            json.dump(self._data, settings_file, indent=4)
+        os.replace(tmp_path, self._env_path)
 
-        # dump data to file
-        with self.zet_local_env_path.open("w") as settings_file:
-            json.dump(config_data, settings_file, indent=4)
-            settings_file.close()
+        # the write is already in memory, don't parse it again
+        stat = os.stat(self._env_path)
+        self._stat = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        self.version += 1
 
     def get_default_repo(self) -> str:
         """Returns folder path of default repo."""
@@ -274,3 +404,21 @@ class Settings:
         """Returns the command to open an editor."""
         return self.data["defaults"]["editor"]["command"]
 
+
+# process-wide settings, see `get_settings()`
+_settings = None
+
+
+def get_settings() -> Settings:
+    """Settings shared by every module in the process.
+
+    `.local.json` is loaded once on first use, instead of
+    once per module that reads settings.
+
+    Returns:
+        settings (Settings): The shared settings.
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
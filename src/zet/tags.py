@@ -0,0 +1,465 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from .ids import ID_TIMESTAMP_LENGTH, date_bound, id_timestamp
+from .settings import get_settings
+
+settings = get_settings()
+
+# bitmaps of each kind of key, by the `TagIndex` attribute
+KINDS = ("tags", "categories", "repos")
+
+# tags of a doc are stored as one string, a tag is a single line
+TAG_SEPARATOR = "\n"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    category TEXT,
+    tags TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS bitmaps (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bitmap BLOB NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+"""
+
+
+def to_bitmap(doc_ids: Iterable[int]) -> int:
+    """Bitmap with the bit of every ID set.
+
+    The bits are set in a `bytearray` and turned into an
+    `int` once, instead of an OR per ID that copies the
+    whole bitmap each time.
+    """
+    doc_ids = list(doc_ids)
+    if not doc_ids:
+        return 0
+
+    data = bytearray((max(doc_ids) >> 3) + 1)
+    for doc_id in doc_ids:
+        data[doc_id >> 3] |= 1 << (doc_id & 7)
+    return int.from_bytes(data, "little")
+
+
+class TagIndex:
+    """Secondary index of zet tags, categories, and repos.
+
+    Every zet gets a small integer ID. Each tag, category,
+    and repo maps to a bitmap of the IDs that have it, stored
+    as a Python `int` where bit `n` is set for zet `n`. Filters
+    are bitwise AND, OR, and NOT over those ints, so no zet
+    file is read to answer a query.
+
+    The index is a SQLite database next to the zets DB, with
+    the bitmaps as little-endian bytes. It's kept up to date
+    by `Db.sync_db`, and saving only writes the zets and
+    bitmaps that changed.
+    """
+
+    def __init__(self, index_path: Path) -> None:
+        """Loads the index, or starts an empty one.
+
+        Params:
+            index_path (Path): Path to the index database.
+
+        Returns:
+            None
+        """
+        self.index_path = index_path
+        self.created = not index_path.exists()
+
+        # docs are `(path, repo, category, tags)` rows, tags
+        # joined into one string, or None for an ID that is
+        # free to reuse
+        self.docs = []
+        self.tags = {}
+        self.categories = {}
+        self.repos = {}
+        if not self.created:
+            self._load()
+
+        self._ids = {doc[0]: doc_id for doc_id, doc in enumerate(self.docs) if doc}
+        self._free = [doc_id for doc_id, doc in enumerate(self.docs) if not doc]
+        self._changed_docs: Set[int] = set()
+        self._changed_keys: Set[Tuple[str, str]] = set()
+        self._cleared = False
+        self._dirty = False
+
+    def __len__(self) -> int:
+        """Number of indexed zets."""
+        return len(self._ids)
+
+    def update(self, repo_name: str, metadata: Dict[str, Dict]) -> None:
+        """Indexes zets, replacing any previous entries.
+
+        Params:
+            repo_name (str): The repo of the zets.
+            metadata (Dict[str, Dict]): Metadata of each zet, by path.
+
+        Returns:
+            None
+        """
+        self.remove(metadata)
+
+        # IDs are collected by key, each bitmap is built once
+        doc_ids = {kind: {} for kind in KINDS}
+        for path, zet_metadata in metadata.items():
+            doc_id = self._free.pop() if self._free else len(self.docs)
+            if doc_id == len(self.docs):
+                self.docs.append(None)
+
+            category = zet_metadata.get("category") or None
+            tags = [tag for tag in zet_metadata.get("tags") or [] if tag]
+
+            self.docs[doc_id] = (path, repo_name, category, TAG_SEPARATOR.join(tags))
+            self._ids[path] = doc_id
+            self._changed_docs.add(doc_id)
+            doc_ids["repos"].setdefault(repo_name, []).append(doc_id)
+            if category:
+                doc_ids["categories"].setdefault(category, []).append(doc_id)
+            for tag in tags:
+                doc_ids["tags"].setdefault(tag, []).append(doc_id)
+
+        for kind, ids_by_key in doc_ids.items():
+            bitmaps = getattr(self, kind)
+            for key, ids in ids_by_key.items():
+                bitmaps[key] = bitmaps.get(key, 0) | to_bitmap(ids)
+                self._changed_keys.add((kind, key))
+
+        self._dirty = True
+
+    def remove(self, paths: Iterable[str]) -> None:
+        """Removes zets from the index.
+
+        Params:
+            paths (Iterable[str]): Paths to zet files.
+
+        Returns:
+            None
+        """
+        # IDs are collected by key, each bitmap is cleared once
+        doc_ids = {kind: {} for kind in KINDS}
+        for path in paths:
+            doc_id = self._ids.pop(path, None)
+            if doc_id is None:
+                continue
+
+            _, repo_name, category, tags = self.docs[doc_id]
+            doc_ids["repos"].setdefault(repo_name, []).append(doc_id)
+            if category:
+                doc_ids["categories"].setdefault(category, []).append(doc_id)
+            for tag in tags.split(TAG_SEPARATOR) if tags else ():
+                doc_ids["tags"].setdefault(tag, []).append(doc_id)
+
+            self.docs[doc_id] = None
+            self._free.append(doc_id)
+            self._changed_docs.add(doc_id)
+
+        for kind, ids_by_key in doc_ids.items():
+            bitmaps = getattr(self, kind)
+            for key, ids in ids_by_key.items():
+                bitmaps[key] &= ~to_bitmap(ids)
+                self._changed_keys.add((kind, key))
+
+        self._dirty = True
+
+    def clear(self) -> None:
+        """Removes every zet from the index."""
+        self.docs = []
+        self.tags = {}
+        self.categories = {}
+        self.repos = {}
+        self._ids = {}
+        self._free = []
+        self._changed_docs = set()
+        self._changed_keys = set()
+        self._cleared = True
+        self._dirty = True
+
+    def query(self,
+              tags: Sequence[str] = (),
+              any_tags: Sequence[str] = (),
+              not_tags: Sequence[str] = (),
+              categories: Sequence[str] = (),
+              repos: Sequence[str] = ()) -> List[str]:
+        """Filters zets by tags, categories, and repos.
+
+        Every filter that is passed has to match.
+
+        Params:
+            tags (Sequence[str]): Zets must have all of these tags.
+            any_tags (Sequence[str]): Zets must have at least one of these tags.
+            not_tags (Sequence[str]): Zets must have none of these tags.
+            categories (Sequence[str]): Zets must be in one of these categories.
+            repos (Sequence[str]): Zets must be in one of these repos.
+
+        Returns:
+            paths (List[str]): Paths of the matching zets, in ID order.
+        """
+        result = match_bitmaps(self._bitmaps, tags, any_tags, not_tags, categories, repos)
+        return [self.docs[doc_id][0] for doc_id in bit_ids(result)]
+
+    def save(self) -> None:
+        """Writes the index to disk if anything changed."""
+        if not self._dirty:
+            return
+
+        connection = sqlite3.connect(self.index_path.as_posix())
+        try:
+            connection.executescript(SCHEMA)
+            with connection:
+                if self._cleared:
+                    connection.execute("DELETE FROM docs")
+                    connection.execute("DELETE FROM bitmaps")
+
+                freed_docs = []
+                docs = []
+                for doc_id in sorted(self._changed_docs):
+                    doc = self.docs[doc_id]
+                    if doc:
+                        docs.append((doc_id, *doc))
+                    else:
+                        freed_docs.append((doc_id,))
+                connection.executemany("DELETE FROM docs WHERE id = ?", freed_docs)
+                connection.executemany("INSERT OR REPLACE INTO docs (id, path, repo, category, tags) VALUES (?, ?, ?, ?, ?)", docs)
+
+                # bitmaps of tags that no zet has anymore are dropped
+                empty_bitmaps = []
+                bitmaps = []
+                for kind, key in sorted(self._changed_keys):
+                    bitmap = getattr(self, kind).get(key, 0)
+                    if bitmap:
+                        bitmaps.append((kind, key, bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")))
+                    else:
+                        empty_bitmaps.append((kind, key))
+                connection.executemany("DELETE FROM bitmaps WHERE kind = ? AND key = ?", empty_bitmaps)
+                connection.executemany("INSERT OR REPLACE INTO bitmaps (kind, key, bitmap) VALUES (?, ?, ?)", bitmaps)
+        finally:
+            connection.close()
+
+        self._changed_docs = set()
+        self._changed_keys = set()
+        self._cleared = False
+        self.created = False
+        self._dirty = False
+
+    def _load(self) -> None:
+        """Reads the zets and bitmaps of a saved index."""
+        connection = sqlite3.connect(self.index_path.as_posix())
+        try:
+            rows = connection.execute("SELECT id, path, repo, category, tags FROM docs ORDER BY id").fetchall()
+            bitmaps = connection.execute("SELECT kind, key, bitmap FROM bitmaps").fetchall()
+        except sqlite3.OperationalError:
+            # an empty file, the tables are made on save
+            rows = bitmaps = []
+        finally:
+            connection.close()
+
+        for row in rows:
+            # freed IDs aren't stored
+            self.docs.extend([None] * (row[0] - len(self.docs)))
+            self.docs.append(row[1:])
+        for kind, key, bitmap in bitmaps:
+            getattr(self, kind)[key] = int.from_bytes(bitmap, "little")
+
+    def _bitmaps(self, kind: str, keys: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Bitmaps of some keys of a kind, or all of them."""
+        bitmaps = getattr(self, kind)
+        if keys is None:
+            return bitmaps
+        return {key: bitmaps[key] for key in keys if key in bitmaps}
+
+
+class TagIndexReader:
+    """Queries a saved tag index without loading it.
+
+    A `TagIndex` reads every zet and bitmap, which syncs need
+    to update it. A query only reads the bitmaps of the keys
+    it names and the paths of the zets that match, so
+    `zet list --tag` doesn't pay for the size of the index.
+    """
+
+    def __init__(self, index_path: Path) -> None:
+        """Opens the index, a missing one isn't created.
+
+        Params:
+            index_path (Path): Path to the index database.
+
+        Returns:
+            None
+        """
+        self.index_path = index_path
+        self._connection = sqlite3.connect(index_path.as_posix()) if index_path.exists() else None
+
+    def __enter__(self) -> "TagIndexReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def query(self,
+              tags: Sequence[str] = (),
+              any_tags: Sequence[str] = (),
+              not_tags: Sequence[str] = (),
+              categories: Sequence[str] = (),
+              repos: Sequence[str] = ()) -> List[str]:
+        """Filters zets by tags, categories, and repos.
+
+        Same as `TagIndex.query()`.
+
+        Returns:
+            paths (List[str]): Paths of the matching zets, in ID order.
+        """
+        result = match_bitmaps(self.bitmaps, tags, any_tags, not_tags, categories, repos)
+        doc_ids = bit_ids(result)
+        paths = dict(self._select("SELECT id, path FROM docs WHERE id IN ({})", [], doc_ids))
+        return [paths[doc_id] for doc_id in doc_ids if doc_id in paths]
+
+    def bitmaps(self, kind: str, keys: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """Reads the bitmaps of some keys of a kind.
+
+        Params:
+            kind (str): "tags", "categories", or "repos".
+            keys (Optional[Sequence[str]]): Keys to read.
+                Defaults to every key of the kind.
+
+        Returns:
+            bitmaps (Dict[str, int]): Bitmaps of the keys that
+                any zet has, by key.
+        """
+        if keys is None:
+            rows = self._select("SELECT key, bitmap FROM bitmaps WHERE kind = ?", [kind])
+        else:
+            rows = self._select("SELECT key, bitmap FROM bitmaps WHERE kind = ? AND key IN ({})", [kind], list(dict.fromkeys(keys)))
+        return {key: int.from_bytes(bitmap, "little") for key, bitmap in rows}
+
+    def close(self) -> None:
+        """Closes the index database."""
+        if self._connection is not None:
+            self._connection.close()
+
+    def _select(self, sql_text: str, params: List, values: Optional[List] = None) -> List[Tuple]:
+        """Runs a query, `values` in batches under SQLite's variable limit."""
+        if self._connection is None:
+            return []
+
+        batches = [[]] if values is None else [values[start:start + 900] for start in range(0, len(values), 900)]
+        rows = []
+        try:
+            for batch in batches:
+                rows += self._connection.execute(sql_text.format(", ".join("?" * len(batch))), params + batch).fetchall()
+        except sqlite3.OperationalError:
+            # an empty file, the tables are made on save
+            return []
+        return rows
+
+
+def match_bitmaps(bitmaps: Callable[[str, Optional[Sequence[str]]], Dict[str, int]],
+                  tags: Sequence[str] = (),
+                  any_tags: Sequence[str] = (),
+                  not_tags: Sequence[str] = (),
+                  categories: Sequence[str] = (),
+                  repos: Sequence[str] = ()) -> int:
+    """Bitmap of the zets that match every filter.
+
+    Params:
+        bitmaps (Callable[[str, Optional[Sequence[str]]], Dict[str, int]]):
+            Reads the bitmaps of some keys of a kind, or all keys.
+        tags, any_tags, not_tags, categories, repos: The filters,
+            like `TagIndex.query()`.
+
+    Returns:
+        bitmap (int): The matching zets.
+    """
+    # every zet is in a repo
+    result = union(bitmaps("repos", repos or None).values())
+    if tags:
+        tag_bitmaps = bitmaps("tags", tags)
+        for tag in tags:
+            result &= tag_bitmaps.get(tag, 0)
+    if any_tags:
+        result &= union(bitmaps("tags", any_tags).values())
+    if categories:
+        result &= union(bitmaps("categories", categories).values())
+    if not_tags:
+        result &= ~union(bitmaps("tags", not_tags).values())
+    return result
+
+
+def union(bitmaps: Iterable[int]) -> int:
+    """Bitwise OR of some bitmaps."""
+    result = 0
+    for bitmap in bitmaps:
+        result |= bitmap
+    return result
+
+
+def bit_ids(bitmap: int) -> List[int]:
+    """IDs of the set bits, lowest first."""
+    bits = bin(bitmap)[:1:-1]
+    ids = []
+    doc_id = bits.find("1")
+    while doc_id != -1:
+        ids.append(doc_id)
+        doc_id = bits.find("1", doc_id + 1)
+    return ids
+
+
+def filter_zets(zet_repo: Optional[str] = None,
+                tag: Sequence[str] = (),
+                any_tag: Sequence[str] = (),
+                not_tag: Sequence[str] = (),
+                category: Sequence[str] = (),
+                full_path: bool = False,
+                since: Optional[str] = None,
+                until: Optional[str] = None) -> List[str]:
+    """Lists zets matching tag and category filters.
+
+    Uses the tag index built by `zet sync`, no zet
+    files are read.
+
+    Params:
+        zet_repo (Optional[str]): A zet repo name. Defaults to all repos.
+        tag (Sequence[str]): Zets must have all of these tags.
+        any_tag (Sequence[str]): Zets must have at least one of these tags.
+        not_tag (Sequence[str]): Zets must have none of these tags.
+        category (Sequence[str]): Zets must be in one of these categories.
+        full_path (bool): Determines if full file paths will
+            be provided. Defaults to False.
+        since (Optional[str]): Earliest date, inclusive. Defaults to none.
+        until (Optional[str]): Latest date, inclusive of the whole
+            period. Defaults to none.
+
+    Returns:
+        zets (List[str]): List of zets.
+
+    Raises:
+        ValueError
+    """
+    with TagIndexReader(Path(settings.install_path / ".env/tags.db")) as index:
+        paths = index.query(
+            tags=tag or (),
+            any_tags=any_tag or (),
+            not_tags=not_tag or (),
+            categories=category or (),
+            repos=[zet_repo] if zet_repo else (),
+        )
+    if since or until:
+        # dates come from the ID folder of each zet
+        start = date_bound(since) if since else ""
+        end = date_bound(until, end=True) if until else "9" * ID_TIMESTAMP_LENGTH
+        paths = [
+            path for path in paths
+            if start <= id_timestamp(os.path.basename(os.path.dirname(path))) <= end
+        ]
+    if full_path:
+        return paths
+    return [os.path.basename(path) for path in paths]
@@ -0,0 +1,132 @@
+"""Template rendering for new zets.
+
+Templates are Markdown files with placeholder words, such
+as `templateTitle`, that are replaced when a zet is created.
+A template is compiled once into a list of literal text and
+placeholder tokens, then every zet is rendered from the tokens
+in a single pass. Substituted values are never scanned again,
+so a title containing a placeholder word is left as written.
+"""
+import os
+import re
+from typing import Dict, List, Tuple
+
+PLACEHOLDERS = (
+    "templatePath",
+    "templateDate",
+    "templateTitle",
+    "templateCleanTitle",
+    "templateCategory",
+    "templateTags",
+    "templateLinks",
+)
+
+# longest first, so no placeholder matches
+# the start of a longer one
+PLACEHOLDER = re.compile("({})".format("|".join(sorted(PLACEHOLDERS, key=len, reverse=True))))
+
+
+class TemplateDoesNotExistException(Exception):
+    """Template file does not exist."""
+    pass
+
+
+class CompiledTemplate:
+    """A template split into literal text and placeholders.
+
+    `tokens` alternates between literal text (even indexes)
+    and placeholder names (odd indexes).
+    """
+
+    def __init__(self, text: str) -> None:
+        """Compiles template text.
+
+        Params:
+            text (str): Contents of a template file.
+
+        Returns:
+            None
+        """
+        self.tokens = PLACEHOLDER.split(text)
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Placeholders used by the template, in order."""
+        return self.tokens[1::2]
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Fills in the placeholders.
+
+        Params:
+            values (Dict[str, str]): Text of each placeholder.
+                Placeholders without a value are left as is.
+
+        Returns:
+            text (str): The rendered zet.
+        """
+        parts = self.tokens[:]
+        for index in range(1, len(parts), 2):
+            parts[index] = values.get(parts[index], parts[index])
+        return "".join(parts)
+
+
+class TemplateCache:
+    """Compiled templates by path.
+
+    Each entry is validated by the `(st_mtime_ns, st_size)` of
+    the template file, an edited template is compiled again
+    on its next use.
+    """
+
+    def __init__(self) -> None:
+        self.entries: Dict[str, Tuple[int, int, CompiledTemplate]] = {}
+
+    def get(self, path: str) -> CompiledTemplate:
+        """Gets the compiled template of a file.
+
+        Params:
+            path (str): Path to a template file.
+
+        Returns:
+            template (CompiledTemplate): The compiled template.
+
+        Raises:
+            TemplateDoesNotExistException
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise TemplateDoesNotExistException(f"Template does not exist: {path}")
+
+        entry = self.entries.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        with open(path, "r") as file:
+            template = CompiledTemplate(file.read())
+        self.entries[path] = (stat.st_mtime_ns, stat.st_size, template)
+        return template
+
+    def clear(self) -> None:
+        """Removes every compiled template."""
+        self.entries.clear()
+
+
+# process-wide cache
+template_cache = TemplateCache()
+
+
+def render_template(path: str, values: Dict[str, str]) -> str:
+    """Renders a template file.
+
+    Params:
+        path (str): Path to a template file.
+        values (Dict[str, str]): Text of each placeholder.
+
+    Returns:
+        text (str): The rendered zet.
+
+    Raises:
+        TemplateDoesNotExistException
+    """
+    return template_cache.get(path).render(values)
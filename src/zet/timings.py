@@ -0,0 +1,160 @@
+"""Named timing spans, for `zet --timings`.
+
+Modules wrap their phases in spans:
+
+    with span("repo walk"):
+        ...
+
+When timings are off, which is the default, `span()` returns
+a shared no-op context manager, so spans can stay in the code.
+When they're on, each span name adds up its wall time and the
+number of times it ran. Spans can nest, the report indents a
+span under the span it first ran in, and a parent's time
+includes its children.
+"""
+from __future__ import annotations
+
+import time
+
+# `typing` is only imported by type checkers, the CLI imports
+# this module at startup and `typing` is slow to import
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Tuple
+
+
+class _NullSpan:
+    """Context manager that does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Times one run of a named span."""
+
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings: "Timings", name: str) -> None:
+        self.timings = timings
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.timings._open(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.timings._close(self.name, time.perf_counter() - self.start)
+
+
+class Timings:
+    """Totals of named spans.
+
+    Totals are kept by span name, in the order each span
+    first ran, with the depth it first ran at.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.totals: Dict[str, List] = {}
+        self._stack: List[str] = []
+
+    def enable(self) -> None:
+        """Starts recording spans."""
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stops recording spans, totals are kept."""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Drops every total."""
+        self.totals = {}
+        self._stack = []
+
+    def span(self, name: str):
+        """Context manager that times a named phase.
+
+        Params:
+            name (str): The phase, like "repo walk".
+
+        Returns:
+            span (ContextManager): Times its block if
+                timings are enabled.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds time measured elsewhere to a span.
+
+        Params:
+            name (str): The phase.
+            seconds (float): Wall time of one run.
+
+        Returns:
+            None
+        """
+        if self.enabled:
+            self._open(name)
+            self._close(name, seconds)
+
+    def results(self) -> List[Tuple[str, int, int, float]]:
+        """Totals in the order spans first ran.
+
+        Returns:
+            results (List[Tuple[str, int, int, float]]): Name,
+                depth, count, and total seconds of each span.
+        """
+        return [(name, depth, count, seconds) for name, (depth, count, seconds) in self.totals.items()]
+
+    def report(self) -> str:
+        """Table of span totals, in milliseconds."""
+        results = self.results()
+        width = max([len("phase")] + [len(name) + 2 * depth for name, depth, _, _ in results])
+        rows = [f"{'phase':<{width}}{'calls':>8}{'total (ms)':>13}"]
+        for name, depth, count, seconds in results:
+            rows.append(f"{'  ' * depth + name:<{width}}{count:>8}{seconds * 1000:>13.2f}")
+        return "\n".join(rows)
+
+    def _open(self, name: str) -> None:
+        """Starts a run of a span."""
+        if name not in self.totals:
+            self.totals[name] = [len(self._stack), 0, 0.0]
+        self._stack.append(name)
+
+    def _close(self, name: str, seconds: float) -> None:
+        """Ends a run of a span."""
+        if self._stack and self._stack[-1] == name:
+            self._stack.pop()
+        total = self.totals[name]
+        total[1] += 1
+        total[2] += seconds
+
+
+# process-wide timings
+timings = Timings()
+
+
+def span(name: str):
+    """Times a named phase with the process-wide timings.
+
+    Params:
+        name (str): The phase, like "repo walk".
+
+    Returns:
+        span (ContextManager): Times its block if
+            timings are enabled.
+    """
+    return timings.span(name)
@@ -0,0 +1,300 @@
+"""Keeps the DB and indexes in sync with edits made anywhere.
+
+`zet watch` monitors every repo folder and re-indexes the zets
+that change, with `Db.sync_paths()`. Changes made in an editor,
+by `git pull`, or by other tools are picked up as they happen.
+
+On Linux the repos are watched with inotify, through `ctypes`.
+Anywhere else, or with `--poll`, the repos are re-listed on an
+interval and file stats are compared.
+
+Bursts of changes, like a `git pull` or an editor's save dance
+of temp files and renames, are debounced: nothing is synced
+until the repos have been quiet for a moment, then every
+changed path is synced at once.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .db import Db
+from .repo import ATTACHMENT_FOLDERS, Repo, RepoDoesNotExistException
+from .settings import get_settings
+
+settings = get_settings()
+
+# inotify event flags, see `man 7 inotify`
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+WATCH_MASK |= IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+
+# `struct inotify_event` without the trailing name
+EVENT = struct.Struct("iIII")
+
+
+class WatchUnavailableException(Exception):
+    """Inotify can't be used on this system."""
+    pass
+
+
+class InotifyWatcher:
+    """Watches folders with Linux inotify.
+
+    Inotify watches aren't recursive, so every folder in the
+    repos gets its own watch and new folders are watched as
+    they're created. Files that were written into a new folder
+    before its watch was added are reported with the folder.
+    """
+
+    def __init__(self, folders: Iterable[str]) -> None:
+        """Starts watching folders and everything below them.
+
+        Params:
+            folders (Iterable[str]): Repo folders.
+
+        Returns:
+            None
+
+        Raises:
+            WatchUnavailableException
+        """
+        if not sys.platform.startswith("linux"):
+            raise WatchUnavailableException("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise WatchUnavailableException("libc has no inotify support")
+
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise WatchUnavailableException(os.strerror(ctypes.get_errno()))
+
+        self.roots = [os.path.abspath(folder) for folder in folders]
+        self.folders: Dict[int, str] = {}
+        for root in self.roots:
+            self._watch_tree(root)
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """Waits for changes.
+
+        Params:
+            timeout (Optional[float]): Seconds to wait. Defaults
+                to waiting until something changes.
+
+        Returns:
+            paths (Set[str]): Changed files and folders, empty
+                if nothing changed before the timeout.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            changed.update(self._parse(buffer))
+        return changed
+
+    def close(self) -> None:
+        """Stops watching."""
+        os.close(self.fd)
+
+    def _parse(self, buffer: bytes) -> Set[str]:
+        """Changed paths from a buffer of inotify events."""
+        changed = set()
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT.size:offset + EVENT.size + length].rstrip(b"\0")
+            offset += EVENT.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # events were dropped, check everything
+                changed.update(self.roots)
+                continue
+
+            folder = self.folders.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.folders[wd]
+                continue
+
+            path = os.path.join(folder, os.fsdecode(name)) if name else folder
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(path)
+        return changed
+
+    def _watch_tree(self, root: str) -> None:
+        """Adds watches for a folder and every folder below it."""
+        for folder, dirs, _ in os.walk(root):
+            dirs[:] = [name for name in dirs if not name.startswith(".") and name not in ATTACHMENT_FOLDERS]
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd >= 0:
+                self.folders[wd] = folder
+
+
+class PollingWatcher:
+    """Watches folders by comparing file stats on an interval.
+
+    Used where inotify isn't available. Every poll lists the
+    repos, which is cheap with `Repo.iter_zets()` but grows
+    with the number of zets.
+    """
+
+    def __init__(self, folders: Iterable[str], interval: float = 1.0) -> None:
+        """Takes the first snapshot of the folders.
+
+        Params:
+            folders (Iterable[str]): Repo folders.
+            interval (float): Seconds between polls. Defaults to 1.
+
+        Returns:
+            None
+        """
+        self.roots = [os.path.abspath(folder) for folder in folders]
+        self.interval = interval
+        self.snapshot = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """Waits for the next poll, or the timeout.
+
+        Params:
+            timeout (Optional[float]): Seconds to wait. Defaults
+                to waiting until something changes.
+
+        Returns:
+            paths (Set[str]): Added, changed, and removed zets,
+                empty if nothing changed before the timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._next_poll - time.monotonic()
+            if deadline is not None and deadline < self._next_poll:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                return set()
+            time.sleep(max(0.0, wait))
+            self._next_poll = time.monotonic() + self.interval
+
+            snapshot = self._snapshot()
+            changed = {
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        """Stops watching."""
+        self.snapshot = {}
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """`(st_mtime_ns, st_size)` of every zet, by path."""
+        snapshot = {}
+        for root in self.roots:
+            try:
+                zets = Repo().iter_zets(root)
+            except RepoDoesNotExistException:
+                continue
+            for zet in zets:
+                try:
+                    stat = zet.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[zet.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+def create_watcher(folders: List[str], poll: bool = False, interval: float = 1.0):
+    """Watcher for folders, inotify if it's available.
+
+    Params:
+        folders (List[str]): Repo folders.
+        poll (bool): Always poll. Defaults to False.
+        interval (float): Seconds between polls. Defaults to 1.
+
+    Returns:
+        watcher (Union[InotifyWatcher, PollingWatcher]): The watcher.
+    """
+    if not poll:
+        try:
+            return InotifyWatcher(folders)
+        except WatchUnavailableException:
+            pass
+    return PollingWatcher(folders, interval=interval)
+
+
+def watch_zets(poll: bool = False,
+               interval: float = 1.0,
+               debounce: float = 0.5,
+               max_delay: float = 5.0) -> None:
+    """Keeps the DB and indexes in sync until interrupted.
+
+    Params:
+        poll (bool): Poll file stats instead of using inotify.
+            Defaults to False.
+        interval (float): Seconds between polls. Defaults to 1.
+        debounce (float): Seconds without changes before syncing.
+            Defaults to 0.5.
+        max_delay (float): Longest a change waits during constant
+            activity. Defaults to 5.
+
+    Returns:
+        None
+    """
+    db = Db()
+    db.sync_db()
+
+    folders = [folder for folder in settings.get_repo_paths() if os.path.isdir(folder)]
+    watcher = create_watcher(folders, poll=poll, interval=interval)
+    print(f"Watching {len(folders)} repos with {type(watcher).__name__}, Ctrl-C to stop")
+
+    pending: Set[str] = set()
+    first_change = 0.0
+    try:
+        while True:
+            changed = watcher.changes(timeout=debounce if pending else None)
+            if changed:
+                if not pending:
+                    first_change = time.monotonic()
+                pending |= changed
+                if time.monotonic() - first_change < max_delay:
+                    continue
+
+            if pending:
+                start_time = time.perf_counter()
+
+                # settings are checked for changes once per sync
+                with settings.batch():
+                    db.sync_paths(pending)
+                print(f"Synced {len(pending)} changed paths in {time.perf_counter() - start_time:0.4f} seconds")
+                pending = set()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
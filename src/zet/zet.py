@@ -1,14 +1,24 @@
-import ast
-import datetime
-import fileinput
 import os
 import shutil
-import time
-from typing import Dict, List
-
-from .settings import Settings
-
-settings = Settings()
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from . import frontmatter
+from .backlinks import BacklinkIndex
+from .cache import MetadataCache
+from .changes import record_changes
+from .ids import allocator, id_folders, id_timestamp
+from .metrics import inc
+from .record import ZetRecord
+from .repo import get_repo_resolver
+from .settings import get_settings
+from .template_engine import render_template
+from .timings import span
+
+settings = get_settings()
+metadata_cache = MetadataCache(Path(settings.install_path / ".env/metadata.json"))
 
 
 class ZetDoesNotExistException(Exception):
@@ -23,20 +33,25 @@ class Zet:
     on-disk. If one does not exist it will
     be created after a `create()` call
     and passed back to the caller.
+
+    Metadata is read once per instance and kept as a
+    `ZetRecord`. Changes made through the instance, `create()`
+    and the link edits, drop it so the next read sees them.
     """
 
+    __slots__ = ("path", "repo_name", "_record")
+
     def __init__(self, path: str = None) -> None:
         self.path = path
+        self._record = None
 
         # discover repo name rather than keep it in
         # metadata because files could be moved, avoids
         # user having to change a hardcoded value
         if self.path:
-            repos = settings.get_repos()
-            for repo in repos.keys():
-                if self.path.startswith(repos[repo]["folder"]):
-                    self.repo_name = repo
-                    break
+            repo_name = get_repo_resolver().resolve(self.path)
+            if repo_name:
+                self.repo_name = repo_name
 
     @property
     def metadata(self) -> Dict:
@@ -70,84 +85,187 @@ class Zet:
             |                             |
             -------------------------------
 
+        Only the lines up to the closing delimeter are read
+        (see `frontmatter.parse`). Metadata is cached by path and
+        validated by the file's modification time and size
+        (see `MetadataCache`).
+
         Returns:
             metadata (Dict): A dictionary of the available
-                metadata in the file.
+                metadata in the file, callers are free to
+                change it.
 
         Raises:
             ZetDoesNotExistException
         """
-        if self.path is not None and os.path.exists(self.path):
-            metadata = {}
-
-            # read a file line by line until we
-            # hit our second delimeter
-            # this assumes we have a consistent delimeter
-            with open(self.path, "r") as file:
-                delimeter = file.readline()
-                for line in file.readlines()[0:]:
-                    if line.startswith(delimeter):
-                        break
-                    else:
-
-                        # split the line to a named key
-                        # and a value (value contains newline "\n")
-                        name, value = line.partition(": ")[::2]
-
-                        # check if the value is a list or not
-                        # example representation:
-                        # path: 'some/path/to/file.md'
-                        if "[" not in value:
-                            metadata[name.strip()] = value.rstrip().split("\'")[1]
-
-                        # value is a list
-                        # example representation:
-                        # tags: ['some', 'tag', 'here',]
-                        else:
-                            value_list = ast.literal_eval(value.rstrip())
-                            metadata[name.strip()] = value_list
-            return metadata
-        else:
+        return self.record.to_metadata()
+
+    @property
+    def record(self) -> ZetRecord:
+        """Get file metadata as a compact record.
+
+        Read on first use and kept by the instance, later
+        calls don't stat or parse the file.
+
+        Returns:
+            record (ZetRecord): The metadata of the zet.
+
+        Raises:
+            ZetDoesNotExistException
+        """
+        if self._record is not None:
+            return self._record
+        if self.path is None:
+            raise ZetDoesNotExistException("Zet does not exist")
+
+        # parsed metadata is shared through the cache,
+        # unchanged files are never re-read
+        try:
+            metadata = metadata_cache.get(self.path, frontmatter.parse)
+        except FileNotFoundError:
             raise ZetDoesNotExistException("Zet does not exist")
+        self._record = ZetRecord.from_metadata(self.path, getattr(self, "repo_name", None), metadata)
+        return self._record
 
     def add_link(self, link_path: str) -> None:
         """Add link to the zet file.
 
         Links are stored as a list, similar to tags.
 
+        The backlink index is updated with the new link.
+
         Params:
             link_path (str): A link (filepath) to add.
 
         Returns:
             None
         """
-
-        for line in fileinput.input(self.path, inplace=True):
-            if line.startswith("links"):
-                name, value = line.partition(": ")[::2]
-                value_list = ast.literal_eval(value.rstrip())
-                value_list.append(link_path)
-                print(f"links: {value_list}")
-            else:
-                print(line, end="")
+        self.update_links(add=[link_path])
 
     def delete_link(self, link_path: str) -> None:
         """Remove a link from the zet file.
 
+        The backlink index is updated unless the zet
+        still has another copy of the link.
+
         Params:
             link_path (str): A link (filepath) to remove.
 
         Returns:
             None
         """
-        for line in fileinput.input(self.path, inplace=True):
-            if line.startswith("links"):
-                name, value = line.partition(": ")[::2]
-                value_list = ast.literal_eval(value.rstrip())
-                value_list.remove(link_path)
-                print(f"links: {value_list}")
-            else:
-                print(line, end="")
+        self.update_links(remove=[link_path])
+
+    def update_links(self, add: Iterable[str] = (), remove: Iterable[str] = ()) -> List[str]:
+        """Adds and removes any number of links in one rewrite.
+
+        Only the `links` line of the metadata changes, the
+        rest of the file is copied through unchanged. The new
+        file is written next to the zet and moved over it with
+        `os.replace`, so a crash leaves either the old or the
+        new zet, never a partial one.
+
+        Links that are already there aren't added twice, and
+        links that aren't there are skipped when removing.
+        Removals are applied before additions. The backlink
+        index is updated in the same call.
+
+        Params:
+            add (Iterable[str]): Links (filepaths) to add.
+            remove (Iterable[str]): Links (filepaths) to remove.
+
+        Returns:
+            links (List[str]): The links of the zet afterward.
+
+        Raises:
+            ZetDoesNotExistException
+        """
+        if self.path is None or not os.path.exists(self.path):
+            raise ZetDoesNotExistException("Zet does not exist")
+
+        self._record = None
+        add = list(add)
+        remove = list(remove)
+
+        folder = os.path.dirname(os.path.abspath(self.path))
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".", suffix=".tmp")
+        try:
+            # the temp file owns the fd first, it's closed if the zet can't be opened
+            with span("link rewrite"), os.fdopen(tmp_fd, "w") as tmp_file, open(self.path, "r") as zet_file:
+                links, removed, added = self._rewrite_links(zet_file, tmp_file, add, remove)
+                shutil.copyfileobj(zet_file, tmp_file)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        record_changes([self.path])
+        inc("link_edits_total")
+        inc("links_changed_total", len(added) + len(removed))
+
+        # duplicate links in the file keep their backlink
+        removed = [link for link in removed if link not in links]
+        if added or removed:
+            with BacklinkIndex(Path(settings.install_path / ".env/backlinks.db")) as index:
+                index.remove(self.path, removed)
+                index.add(self.path, added)
+
+        return links
+
+    @staticmethod
+    def _rewrite_links(zet_file: TextIO,
+                       tmp_file: TextIO,
+                       add: List[str],
+                       remove: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """Copies the metadata of a zet with its links changed.
+
+        Reads up to and including the closing delimeter, a
+        `links` line is added before it if the zet has none.
+
+        Returns the new links, and the links that were
+        actually removed and added.
+        """
+        delimeter = zet_file.readline()
+        tmp_file.write(delimeter)
+        delimeter = delimeter.rstrip("\r\n")
+
+        links = None
+        removed = []
+        added = []
+        for line in zet_file:
+            is_links = line.startswith("links: ")
+            is_closing = bool(delimeter) and line.startswith(delimeter)
+            if not is_links and not (is_closing and links is None):
+                tmp_file.write(line)
+                if is_closing:
+                    break
+                continue
+
+            links = []
+            if is_links:
+                value = frontmatter.parse_value(line[len("links: "):])
+                links = value if isinstance(value, list) else []
+
+            for link in remove:
+                if link in links:
+                    links.remove(link)
+                    removed.append(link)
+            present = set(links)
+            for link in add:
+                if link not in present:
+                    present.add(link)
+                    links.append(link)
+                    added.append(link)
+            tmp_file.write(f"links: {links}\n")
+
+            if is_closing:
+                tmp_file.write(line)
+                break
+
+        return links or [], removed, added
 
     def create(self,
                title: str,
@@ -159,7 +277,9 @@ class Zet:
 
         Takes in the zet folder and returns
         a path to the new zet. This will
-        be time sensitive.
+        be time sensitive, zets created in the
+        same second get a sequence suffix on their
+        ID (see `IdAllocator`).
 
         Params:
             title (str): Title of the zet,
@@ -172,59 +292,70 @@ class Zet:
             zet_path (str): Full path to the newly
                 created zet.
         """
-        today = datetime.datetime.now()
-        today_year = str(today.year)
-        today_month = str(today.month)
-        today_str = str(today.strftime("%Y%m%d%H%M%S"))
-
         if zet_repo:
             repo = settings.get_repo_path(zet_repo)
         else:
             zet_repo = settings.get_default_repo()
             repo = settings.get_default_repo_path()
 
-        full_path = os.path.join(
-            repo, today_year, today_month, today_str
-        )
+        zet_id, full_path = _create_zet_folder(repo, allocator.allocate()[0])
+        zet_year, zet_month = id_folders(zet_id)
+
         clean_title = title.lower().replace(' ', '-')
-        full_title = str(clean_title) + "-" + today_str + ".md"
+        full_title = str(clean_title) + "-" + zet_id + ".md"
         filename = os.path.join(full_path, full_title)
         tags_list = tags.split(', ')
-        zet_template_path = "/" + os.path.join(today_year, today_month, clean_title + "-" + today_str)
-
-        metadata = [
-            ["templatePath", zet_template_path],
-            ["templateDate", today_str],
-            ["templateTitle", str(title)],
-            ["templateCleanTitle", str(clean_title)],
-            ["templateCategory", str(category)],
-            ["templateTags", str(tags_list)],
-            ["templateLinks", str([])],
-        ]
-
-        if not os.path.exists(full_path):
-            os.makedirs(full_path)
+        zet_template_path = "/" + os.path.join(zet_year, zet_month, clean_title + "-" + zet_id)
+
+        values = {
+            "templatePath": zet_template_path,
+            "templateDate": id_timestamp(zet_id),
+            "templateTitle": str(title),
+            "templateCleanTitle": str(clean_title),
+            "templateCategory": str(category),
+            "templateTags": str(tags_list),
+            "templateLinks": str([]),
+        }
+
+        if template is None:
+            template = settings.get_default_template_path()
+        else:
+            template = settings.get_template_path(template)
 
-            if template is None:
-                # if the settings haven't been made then the
-                # data will not be refreshed
-                settings.refresh()
-                template = settings.get_default_template_path()
-            else:
-                template = settings.get_template_path(template)
+        # the template is compiled once per process and
+        # rendered in one pass, the zet is written once
+        with span("template render"), open(filename, "w") as file:
+            file.write(render_template(template, values))
+        self.path = filename
+        self.repo_name = zet_repo
+        self._record = None
+        record_changes([filename])
+        inc("zets_created_total")
 
-            new_file = shutil.copyfile(template, filename)
 
-            for line in fileinput.input(new_file, inplace=True):
-                for item in metadata:
-                    line = line.replace(item[0], item[1])
+def _create_zet_folder(repo: str, zet_id: str) -> Tuple[str, str]:
+    """Creates the folder of a new zet.
 
-                # don't delete, it does the line replacement
-                print(line, end="")
+    If the folder already exists, for example another
+    process created it, a new ID is allocated rather than
+    reusing the folder.
 
-                # line = re.sub(r"/{({word_match}*)}/".format(word_match=item[0]), item[1], line)
-            fileinput.close()
-        self.path = filename
+    Params:
+        repo (str): Path to a zet repo.
+        zet_id (str): An allocated zet ID.
+
+    Returns:
+        zet_folder (Tuple[str, str]): The zet ID that was
+            used and the path to its new folder.
+    """
+    while True:
+        zet_year, zet_month = id_folders(zet_id)
+        full_path = os.path.join(repo, zet_year, zet_month, zet_id)
+        try:
+            os.makedirs(full_path)
+            return zet_id, full_path
+        except FileExistsError:
+            zet_id = allocator.allocate()[0]
 
 
 def bulk_import_zets(files_folder: str,
@@ -232,7 +363,9 @@ def bulk_import_zets(files_folder: str,
     """Bulk create zets from a folder.
 
     Takes in the folder of existing files
-    to import to a zet repo.
+    to import to a zet repo. Every file gets
+    its own zet ID from a single clock read,
+    then the files are copied in parallel.
 
     Params:
         files_folder (str): A folder with
@@ -245,33 +378,66 @@ def bulk_import_zets(files_folder: str,
             paths, zet file paths, and newly folder paths.
     """
 
-    zet_list = []
-
     if zet_repo:
         repo = settings.get_repo_path(zet_repo)
     else:
         repo = settings.get_default_repo_path()
 
-    for root, dirs, files in os.walk(files_folder):
-        for file in files:
-            today = datetime.datetime.now()
-            today_year = str(today.year)
-            today_month = str(today.month)
-            today_str = str(today.strftime("%Y%m%d%H%M%S"))
-            full_path = os.path.join(
-                repo, today_year, today_month, today_str
-            )
+    existing_paths = [
+        os.path.join(root, file)
+        for root, dirs, files in os.walk(files_folder)
+        for file in files
+    ]
 
-            clean_title = file.lower().replace(' ', '-')
-            full_title = str(clean_title) + "-" + today_str + ".md"
-            filename = os.path.join(full_path, full_title)
+    # IDs for every file come from one clock read
+    zet_list = []
+    for existing_file_path, zet_id in zip(existing_paths, allocator.allocate(len(existing_paths))):
+        zet_id, full_path = _create_zet_folder(repo, zet_id)
+
+        file = os.path.basename(existing_file_path)
+        clean_title = file.lower().replace(' ', '-')
+        full_title = str(clean_title) + "-" + zet_id + ".md"
+
+        zet_list.append({
+            "file_name": full_title,
+            "existing_path": existing_file_path,
+            "zet_file_path": os.path.join(full_path, full_title),
+            "zet_folder_path": full_path,
+        })
+
+    # copying is I/O bound, threads overlap the waits
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(
+            lambda zet: shutil.copyfile(zet["existing_path"], zet["zet_file_path"]),
+            zet_list,
+        ))
+    record_changes(zet["zet_file_path"] for zet in zet_list)
+    inc("zets_imported_total", len(zet_list))
 
-            existing_file_path = os.path.join(root, file)
+    return zet_list
 
-            if not os.path.exists(full_path):
-                os.makedirs(full_path)
-                shutil.copyfile(existing_file_path, filename)
-            time.sleep(1)
 
-    return zet_list
+def link_zets(path: str,
+              add: Optional[List[str]] = None,
+              remove: Optional[List[str]] = None) -> List[str]:
+    """Adds and removes links of a zet in one rewrite.
+
+    Paths are expanded to absolute paths, the form
+    links are stored in by `zet sync` and the backlink index.
+
+    Params:
+        path (str): Path to the linking zet.
+        add (Optional[List[str]]): Paths to link to. Defaults to none.
+        remove (Optional[List[str]]): Paths to unlink. Defaults to none.
+
+    Returns:
+        links (List[str]): The links of the zet afterward.
+
+    Raises:
+        ZetDoesNotExistException
+    """
+    def normalize(link_paths: Optional[List[str]]) -> List[str]:
+        return [os.path.abspath(os.path.expanduser(link_path)) for link_path in link_paths or []]
 
+    zet = Zet(os.path.abspath(os.path.expanduser(path)))
+    return zet.update_links(add=normalize(add), remove=normalize(remove))
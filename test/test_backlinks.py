@@ -0,0 +1,57 @@
+import os
+import time
+
+from src.zet.backlinks import BacklinkIndex, list_backlinks
+from src.zet.db import Db
+from src.zet.zet import Zet
+
+
+def test_backlinks_index(tmp_path):
+    with BacklinkIndex(tmp_path / "backlinks.db") as index:
+        index.set_links("a.md", ["b.md", "c.md"])
+        index.add("d.md", ["b.md"])
+        assert index.backlinks("b.md") == ["a.md", "d.md"]
+        assert index.backlinks("c.md") == ["a.md"]
+
+        index.set_links("a.md", ["c.md"])
+        assert index.backlinks("b.md") == ["d.md"]
+
+        index.remove("d.md", ["b.md"])
+        index.remove_sources(["a.md"])
+        assert index.backlinks("b.md") == []
+        assert index.backlinks("c.md") == []
+
+        # many zets at once, replacing their earlier links
+        index.set_many([("a.md", ["b.md"]), ("e.md", ["b.md", "c.md"]), ("f.md", [])])
+        index.set_many([("e.md", ["c.md"])])
+        assert index.backlinks("b.md") == ["a.md"]
+        assert index.backlinks("c.md") == ["e.md"]
+
+
+def test_backlinks_add_delete_link(zet_settings, zet):
+    time.sleep(1)
+    target = Zet()
+    target.create("backlink target", "some category", "some, tags")
+
+    Zet(zet).add_link(target.path)
+    assert list_backlinks(target.path, full_path=True) == [zet]
+    assert list_backlinks(target.path) == [os.path.basename(zet)]
+
+    Zet(zet).delete_link(target.path)
+    assert list_backlinks(target.path) == []
+
+
+def test_backlinks_synced_zets(zet_settings, zet):
+    time.sleep(1)
+    target = Zet()
+    target.create("synced target", "some category", "some, tags")
+    Zet(zet).add_link(target.path)
+
+    # rebuilt from the zet files
+    db = Db()
+    db.sync_db(full=True)
+    assert db.backlinks(target.path) == [zet]
+
+    os.remove(zet)
+    db.sync_db()
+    assert db.backlinks(target.path) == []
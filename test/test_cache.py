@@ -0,0 +1,63 @@
+import os
+
+from src.zet.cache import MetadataCache
+from src.zet.frontmatter import parse
+from src.zet.zet import Zet
+
+
+def test_cache_hits_unchanged_zet(zet_settings, zet, tmp_path):
+    cache = MetadataCache(tmp_path / "metadata.json")
+
+    first = cache.get(zet, parse)
+    second = cache.get(zet, parse)
+
+    assert first == second
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_cache_returns_copies(zet_settings, zet, tmp_path):
+    cache = MetadataCache(tmp_path / "metadata.json")
+
+    metadata = cache.get(zet, parse)
+    metadata.pop("links")
+    metadata["tags"].append("changed")
+
+    metadata = cache.get(zet, parse)
+    assert metadata["links"] == []
+    assert metadata["tags"] == ["some", "tags"]
+
+
+def test_cache_invalidates_changed_zet(zet_settings, zet, tmp_path):
+    cache = MetadataCache(tmp_path / "metadata.json")
+    cache.get(zet, parse)
+
+    Zet(zet).add_link("something.md")
+
+    assert cache.get(zet, parse)["links"] == ["something.md"]
+    assert cache.misses == 2
+
+
+def test_cache_persists(zet_settings, zet, tmp_path):
+    cache_path = tmp_path / "metadata.json"
+    cache = MetadataCache(cache_path)
+    cache.get(zet, parse)
+    cache.save()
+    assert os.path.exists(cache_path)
+
+    cache_two = MetadataCache(cache_path)
+    cache_two.get(zet, parse)
+    assert cache_two.hits == 1
+    assert cache_two.misses == 0
+
+
+def test_cache_get_many_parallel(zet_settings, zet_list_paths, tmp_path):
+    cache = MetadataCache(tmp_path / "metadata.json")
+    cache.parallel_threshold = 1
+
+    metadata = cache.get_many(zet_list_paths, parse, workers=2)
+    assert sorted(metadata) == sorted(zet_list_paths)
+    assert all(zet_metadata["title"] == "some title" for zet_metadata in metadata.values())
+    assert cache.misses == len(zet_list_paths)
+
+    cache.get_many(zet_list_paths, parse, workers=2)
+    assert cache.hits == len(zet_list_paths)
@@ -1,9 +1,10 @@
 import os
 import subprocess
+import sys
 
 import pytest
 
-from src.zet.main import main
+from src.zet.main import build_parser, main
 
 
 def capture(command):
@@ -33,3 +34,35 @@ def test_create(zet_settings):
 
     assert 'cli-test' in [file[:len("cli-test")] for file in files_found]
 
+
+def test_startup_imports_are_lazy():
+    """`--help` shouldn't import the modules only commands need."""
+    out, err, returncode = capture([
+        sys.executable, "-c",
+        "import sys; from src.zet.main import main\n"
+        "try:\n    main(['--help'])\nexcept SystemExit:\n    pass\n"
+        "print(sorted(name for name in ('ein', 'sqlite3', 'src.zet.db', 'src.zet.zet') if name in sys.modules))",
+    ])
+    assert returncode == 0, err
+    assert out.decode().splitlines()[-1] == "[]"
+
+
+def test_command_arguments_are_deferred():
+    parser = build_parser("search")
+    args = parser.parse_args(["search", "some query", "-n", "5"])
+    assert args.query == "some query"
+    assert args.limit == 5
+
+    # other commands are registered without their arguments
+    with pytest.raises(SystemExit):
+        parser.parse_args(["create", "-t", "some title"])
+
+
+def test_timings_and_profile(zet, tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    assert main(["--timings", "--profile", "list"]) == 0
+
+    err = capsys.readouterr().err
+    assert "zet list" in err
+    assert "repo walk" in err
+    assert (tmp_path / "zet-list.pstats").exists()
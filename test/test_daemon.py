@@ -0,0 +1,61 @@
+import os
+import threading
+
+import pytest
+
+from src.zet.daemon import DaemonNotRunningException, handle, request, serve
+from src.zet.main import main
+
+
+@pytest.fixture
+def daemon(zet_settings, tmp_path):
+    path = tmp_path / "zet.sock"
+    thread = threading.Thread(target=serve, args=(path,), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if path.exists():
+            break
+        thread.join(0.01)
+    yield path
+
+    try:
+        request({"op": "stop"}, path, timeout=5)
+    except DaemonNotRunningException:
+        pass
+    thread.join(5)
+
+
+def test_daemon_runs_commands(zet, daemon):
+    assert request({"op": "ping"}, daemon)["pid"] == os.getpid()
+
+    reply = request({"op": "run", "argv": ["list"], "cwd": os.getcwd()}, daemon)
+    assert reply["status"] == 0
+    assert os.path.basename(zet) in reply["stdout"]
+
+    # argparse errors come back as a status
+    reply = request({"op": "run", "argv": ["list", "--limit", "x"], "cwd": os.getcwd()}, daemon)
+    assert reply["status"] == 2
+    assert "invalid int value" in reply["stderr"]
+
+
+def test_daemon_refuses_terminal_commands(zet_settings):
+    reply = handle({"op": "run", "argv": ["editor"]})
+    assert reply["status"] == 2
+    assert "editor" in reply["stderr"]
+
+
+def test_daemon_stops(daemon):
+    assert request({"op": "stop"}, daemon)["status"] == 0
+    with pytest.raises(DaemonNotRunningException):
+        request({"op": "ping"}, daemon)
+
+
+def test_main_falls_back_without_daemon(zet, capsys, zet_settings):
+    socket_path = zet_settings.install_path / ".env/zet.sock"
+    # left behind by a daemon that was killed
+    socket_path.touch()
+    try:
+        assert main(["list"]) == 0
+    finally:
+        socket_path.unlink()
+    assert os.path.basename(zet) in capsys.readouterr().out
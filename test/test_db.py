@@ -1,5 +1,5 @@
 import os
-import time
+import shutil
 
 import pytest
 
@@ -7,6 +7,16 @@ from src.zet.db import Db
 from src.zet.zet import Zet
 
 
+def touch(path):
+    """Moves a file's modified time a second ahead."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+
+def edge_pairs(db):
+    return sorted((edge.source.id, edge.target.id) for edge in db.db.edges)
+
+
 def test_db_creates(zet_settings):
     db = Db()
     assert os.path.exists(db.db_path)
@@ -21,7 +31,6 @@ def test_db_sync(zet_settings):
         "some category",
         "some, tags",
     )
-    time.sleep(1)
 
     zet_two = Zet()
     zet_two.create(
@@ -36,10 +45,131 @@ def test_db_sync(zet_settings):
     assert len(db.db.edges) == 1
     assert len(db.db.nodes) == 2
 
+    # every zet is inserted into its schema exactly once
+    assert len(db.db.database.get_all_nodes(schema_name="zets")) == 2
+
     # check data persists
     db_two = Db()
     assert len(db_two.db.edges) == 1
     assert len(db_two.db.nodes) == 2
 
 
+def test_db_sync_incremental(zet_settings):
+    db = Db()
+    db.sync_db(full=True)
+    nodes = len(db.db.nodes)
+    edges = len(db.db.edges)
+
+    # added zets
+    zet_one = Zet()
+    zet_one.create("incremental one", "some category", "some, tags")
+    zet_two = Zet()
+    zet_two.create("incremental two", "some category", "some, tags")
+
+    db.sync_db()
+    assert len(db.db.nodes) == nodes + 2
+    assert len(db.db.edges) == edges
+
+    # changed zet, with a later modified time
+    zet_one.add_link(zet_two.path)
+    touch(zet_one.path)
+    db.sync_db()
+    assert len(db.db.nodes) == nodes + 2
+    assert len(db.db.edges) == edges + 1
+    assert db.db.nodes[zet_one.path].body["links"] == [zet_two.path]
+
+    # deleted zet, incoming links are removed
+    os.remove(zet_two.path)
+    db.sync_db()
+    assert len(db.db.nodes) == nodes + 1
+    assert len(db.db.edges) == edges
+
+    # the DB matches a fresh load and a full rebuild
+    db_two = Db()
+    assert len(db_two.db.nodes) == nodes + 1
+    assert len(db_two.db.edges) == edges
+
+    db_two.sync_db(full=True)
+    assert len(db_two.db.nodes) == nodes + 1
+    assert len(db_two.db.edges) == edges
+
+
+def test_db_sync_paths(zet_settings):
+    db = Db()
+    db.sync_db()
+    nodes = len(db.db.nodes)
+    edges = len(db.db.edges)
+
+    # added zets and a changed zet
+    zet_one = Zet()
+    zet_one.create("paths one", "some category", "some, tags")
+    zet_two = Zet()
+    zet_two.create("paths two", "some category", "some, tags")
+    db.sync_paths([zet_one.path, zet_two.path])
+    assert len(db.db.nodes) == nodes + 2
+
+    zet_one.add_link(zet_two.path)
+    db.sync_paths([zet_one.path, os.path.join(os.path.dirname(zet_one.path), "image.png")])
+    assert len(db.db.edges) == edges + 1
+    assert db.db.nodes[zet_one.path].body["links"] == [zet_two.path]
+    assert db.search_index.search('"paths one"')[0][0] == zet_one.path
+
+    # a removed folder drops the zets in it
+    shutil.rmtree(os.path.dirname(zet_two.path))
+    db.sync_paths([os.path.dirname(zet_two.path)])
+    assert len(db.db.nodes) == nodes + 1
+    assert len(db.db.edges) == edges
+    assert zet_two.path not in db.tag_index.query(tags=["tags"])
+
+    # the manifest matches a full listing
+    db.sync_db()
+    assert len(db.db.nodes) == nodes + 1
+    assert len(db.db.edges) == edges
+
+
+def test_db_sync_restored_zet(zet_settings):
+    db = Db()
+    db.sync_db(full=True)
+
+    # the quote ends up in the path
+    target = Zet()
+    target.create("restored target's", "some category", "some, tags")
+    source = Zet()
+    source.create("restored source", "some category", "some, tags")
+    source.add_link(target.path)
+    db.sync_db()
+    assert (source.path, target.path) in edge_pairs(db)
 
+    with open(target.path, "r") as file:
+        text = file.read()
+    os.remove(target.path)
+    db.sync_db()
+    assert (source.path, target.path) not in edge_pairs(db)
+
+    # restored, the unchanged source links to it again
+    with open(target.path, "w") as file:
+        file.write(text)
+    db.sync_db()
+    incremental = edge_pairs(db)
+    assert (source.path, target.path) in incremental
+    assert edge_pairs(Db()) == incremental
+
+    # an incremental sync matches a full rebuild
+    db_full = Db()
+    db_full.sync_db(full=True)
+    assert edge_pairs(db_full) == incremental
+    assert sorted(db_full.db.nodes) == sorted(db.db.nodes)
+
+
+def test_db_sync_binary_attachment(zet_settings):
+    zet = Zet()
+    zet.create("binary attachment", "some category", "some, tags")
+    blob_path = os.path.join(os.path.dirname(zet.path), "blob.pdf")
+    with open(blob_path, "wb") as file:
+        file.write(os.urandom(4096))
+
+    db = Db()
+    db.sync_db(full=True)
+    db.sync_paths([blob_path])
+    assert zet.path in db.db.nodes
+    assert blob_path not in db.db.nodes
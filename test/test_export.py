@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from src.zet.export import (
+    ImportFormatException,
+    export_zets,
+    import_zets,
+    iter_zet_objects,
+)
+from src.zet.main import main
+from src.zet.repo import Repo
+from src.zet.zet import Zet
+
+
+def test_export_zets(zet, tmp_path):
+    Zet(zet).add_link("/zets/other.md")
+    output = tmp_path / "zets.ndjson"
+
+    count = export_zets(body=True, output=str(output))
+    zets = [json.loads(line) for line in output.read_text().splitlines()]
+    assert count == len(zets)
+
+    exported = next(item for item in zets if item["path"] == zet)
+    assert exported["repo"] == "zets"
+    assert exported["title"] == "some title"
+    assert exported["category"] == "some category"
+    assert exported["tags"] == ["some", "tags"]
+    assert exported["links"] == ["/zets/other.md"]
+    assert exported["body"] == "\n# some title\n"
+    assert "body" not in next(iter_zet_objects())
+
+
+def test_import_zets(zet_settings, tmp_path):
+    Repo().add_repo("imported", zet_path=str(tmp_path))
+    lines = [
+        {"path": "/old/2021/3/20210301120000/note-20210301120000.md", "title": "first note",
+         "category": "idea", "tags": ["one", "two"], "links": ["/old/linked.md"], "body": "\n# first\n\ntext\n"},
+        {"title": "second\nnote", "tags": "single", "extra": {"draft": "yes"}},
+    ]
+    source = tmp_path / "import.ndjson"
+    source.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n")
+
+    assert import_zets(zet_repo="imported", input_file=str(source)) == 2
+
+    zets = sorted(iter_zet_objects("imported", body=True), key=lambda item: item["title"])
+    assert zets[0]["path"] == str(tmp_path / "imported/2021/3/20210301120000/first-note-20210301120000.md")
+    assert zets[0]["tags"] == ["one", "two"]
+    assert zets[0]["links"] == ["/old/linked.md"]
+    assert zets[0]["body"] == "\n# first\n\ntext\n"
+    assert zets[1]["title"] == "second note"
+    assert zets[1]["tags"] == ["single"]
+    assert zets[1]["extra"] == {"draft": "yes"}
+
+    source.write_text("[1, 2]\n")
+    with pytest.raises(ImportFormatException):
+        import_zets(zet_repo="imported", input_file=str(source))
+
+
+def test_export_cli(zet, capsys):
+    assert main(["export", "-r", "zets"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert all(json.loads(line)["repo"] == "zets" for line in lines)
+    assert zet in [json.loads(line)["path"] for line in lines]
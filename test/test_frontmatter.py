@@ -0,0 +1,51 @@
+from src.zet.frontmatter import parse, parse_lines, parse_many, parse_value
+
+
+def test_parse_zet(zet_settings, zet):
+    metadata = parse(zet)
+    assert metadata["title"] == "some title"
+    assert metadata["category"] == "some category"
+    assert metadata["tags"] == ["some", "tags"]
+    assert metadata["links"] == []
+
+
+def test_parse_stops_at_delimeter():
+    lines = iter([
+        "---\n",
+        "title: 'some title'\n",
+        "---\n",
+        "body: 'not metadata'\n",
+    ])
+    assert parse_lines(lines) == {"title": "some title"}
+
+    # the body was never consumed
+    assert next(lines) == "body: 'not metadata'\n"
+
+
+def test_parse_not_utf8(tmp_path):
+    path = tmp_path / "latin.md"
+    path.write_bytes("---\ntitle: 'caf\xe9'\n---\n".encode("latin-1"))
+    assert parse(str(path)) == {"title": "caf\ufffd"}
+
+
+def test_parse_value_strings():
+    assert parse_value("'some value'\n") == "some value"
+    assert parse_value("'it's quoted'") == "it's quoted"
+    assert parse_value("'a [bracketed] title'") == "a [bracketed] title"
+    assert parse_value("bare value") == "bare value"
+
+
+def test_parse_value_lists():
+    assert parse_value("[]") == []
+    assert parse_value("['some', 'tags',]") == ["some", "tags"]
+    assert parse_value("['a, b', \"it's\"]") == ["a, b", "it's"]
+    assert parse_value(repr(["back\\slash", "quote'\""])) == ["back\\slash", "quote'\""]
+    assert parse_value("[1, two]") == ["1", "two"]
+
+
+def test_parse_many(tmp_path):
+    zet_path = tmp_path / "zet.md"
+    zet_path.write_text("---\ntitle: 'some title'\n---\n")
+
+    metadata = parse_many([str(zet_path), str(tmp_path / "missing.md")])
+    assert metadata == {str(zet_path): {"title": "some title"}}
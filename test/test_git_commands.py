@@ -1,11 +1,21 @@
 import os
+import subprocess
+import time
 
 import pytest
 
-from src.zet.git_commands import git_add_zets
-from src.zet.git_commands import git_commit_zets
-from src.zet.git_commands import git_init_zets
-from src.zet.git_commands import git_push_zets
+from src.zet import git_commands
+from src.zet.changes import record_changes
+from src.zet.git_commands import (
+    format_git_results,
+    git_add_zets,
+    git_all_zets,
+    git_commit_zets,
+    git_init_zets,
+    git_push_zets,
+)
+from src.zet.repo import Repo
+from src.zet.zet import Zet
 
 
 def test_git_init_initializes(zet_settings):
@@ -31,3 +41,100 @@ def test_git_push_zets(zet_settings, zet_repo_changes):
     assert "non-zero exit code" in str(git_push)
     assert "No configured push destination." in str(git_push)
 
+
+def push_note(origin, clone, name):
+    """Commits a note to a bare repo from another clone."""
+    if not clone.exists():
+        subprocess.run(["git", "clone", "-q", str(origin), str(clone)], check=True, stderr=subprocess.DEVNULL)
+    (clone / name).write_text("note\n")
+    subprocess.run(["git", "add", "."], cwd=clone, check=True)
+    subprocess.run(["git", "commit", "-q", "-m", name], cwd=clone, check=True)
+    subprocess.run(["git", "push", "-q", "origin", "HEAD"], cwd=clone, check=True, stderr=subprocess.DEVNULL)
+
+
+def test_git_all_zets(zet_settings, tmp_path):
+    names = ["all_one", "all_two", "all_three"]
+    for name in names:
+        origin = tmp_path / "remotes" / f"{name}.git"
+        subprocess.run(["git", "init", "-q", "--bare", str(origin)], check=True)
+        push_note(origin, tmp_path / "other" / name, "first.md")
+
+        Repo().add_repo(name, zet_path=str(tmp_path))
+        subprocess.run(["git", "clone", "-q", str(origin), "."], cwd=zet_settings.get_repo_path(name), check=True)
+
+    push_note(tmp_path / "remotes/all_one.git", tmp_path / "other/all_one", "second.md")
+
+    results = git_all_zets(["pull"], repo_names=names)
+    assert [result.repo for result in results] == names
+    assert [result.status for result in results] == ["ok", "ok", "ok"]
+    assert os.path.exists(os.path.join(zet_settings.get_repo_path("all_one"), "second.md"))
+
+    results = git_all_zets(["commit", "-m", "nothing"], repo_names=names)
+    assert [result.status for result in results] == ["clean", "clean", "clean"]
+
+    table = format_git_results(results).splitlines()
+    assert table[0].split()[:2] == ["repo", "status"]
+    assert table[1].split()[:2] == ["all_one", "clean"]
+
+
+def test_git_all_zets_timeout_and_concurrency(zet_settings, tmp_path):
+    names = ["slow_one", "slow_two", "slow_three"]
+    for name in names:
+        Repo().add_repo(name, zet_path=str(tmp_path))
+
+    # each repo takes 0.5 seconds, run together they take about that
+    start_time = time.perf_counter()
+    results = git_all_zets(["-c", "alias.slow=!sleep 0.5", "slow"], repo_names=names)
+    assert time.perf_counter() - start_time < 1.2
+    assert [result.status for result in results] == ["ok", "ok", "ok"]
+
+    results = git_all_zets(["-c", "alias.slow=!sleep 5", "slow"], repo_names=names[:1], timeout=0.2)
+    assert results[0].status == "timeout"
+    assert results[0].returncode is None
+
+
+def test_git_add_stages_journaled_zets(zet_settings, tmp_path):
+    Repo().add_repo("journaled", zet_path=str(tmp_path))
+    repo_path = zet_settings.get_repo_path("journaled")
+    git_init_zets("journaled")
+
+    # files the CLI doesn't know about are staged by a full add
+    with open(os.path.join(repo_path, "untracked.md"), "w") as file:
+        file.write("untracked\n")
+    git_add_zets("journaled", full=True)
+    assert "some message" in str(git_commit_zets("some message", "journaled"))
+    assert git_commit_zets("some message", "journaled") == b"Nothing to commit"
+
+    zet = Zet()
+    zet.create("staged title", "category", "tags", zet_repo="journaled")
+    with open(os.path.join(repo_path, "unknown.md"), "w") as file:
+        file.write("not from the CLI\n")
+    git_add_zets("journaled")
+
+    staged = subprocess.check_output(["git", "diff", "--cached", "--name-only"], cwd=repo_path, text=True)
+    assert staged.splitlines() == [os.path.relpath(zet.path, repo_path)]
+    git_commit_zets("zet", "journaled")
+
+    # deleted zets are staged as removals
+    os.remove(zet.path)
+    record_changes([zet.path])
+    git_add_zets("journaled")
+    status = subprocess.check_output(["git", "status", "--porcelain"], cwd=repo_path, text=True)
+    assert f"D  {os.path.relpath(zet.path, repo_path)}" in status.splitlines()
+    assert "?? unknown.md" in status.splitlines()
+    git_commit_zets("removed zet", "journaled")
+
+
+def test_git_add_empty_journal(zet_settings, tmp_path, monkeypatch):
+    Repo().add_repo("unchanged", zet_path=str(tmp_path))
+    git_init_zets("unchanged")
+    git_add_zets("unchanged", full=True)
+
+    calls = []
+    monkeypatch.setattr(git_commands, "_git", lambda repo, args, **kwargs: calls.append(args))
+
+    # nothing changed through the CLI, git isn't run
+    with open(os.path.join(zet_settings.get_repo_path("unchanged"), "unknown.md"), "w") as file:
+        file.write("not from the CLI\n")
+    assert git_add_zets("unchanged") == b""
+    assert calls == []
@@ -0,0 +1,81 @@
+import datetime
+
+import pytest
+
+from src.zet.ids import (
+    SEQUENCE_LIMIT,
+    IdAllocator,
+    date_bound,
+    format_id,
+    id_folders,
+    id_timestamp,
+)
+
+
+def test_ids_unique_and_sorted():
+    now = datetime.datetime(2022, 6, 1, 12, 1, 0)
+    allocator = IdAllocator(clock=lambda: now)
+
+    ids = allocator.allocate(3) + allocator.allocate(2)
+    assert ids == [
+        "20220601120100",
+        "20220601120100-000001",
+        "20220601120100-000002",
+        "20220601120100-000003",
+        "20220601120100-000004",
+    ]
+
+    now = datetime.datetime(2022, 6, 1, 12, 1, 1)
+    next_id = allocator.allocate()[0]
+    assert next_id == "20220601120101"
+    assert sorted(ids + [next_id]) == ids + [next_id]
+
+
+def test_ids_clock_backwards():
+    times = iter([
+        datetime.datetime(2022, 6, 1, 12, 1, 1),
+        datetime.datetime(2022, 6, 1, 12, 1, 0),
+    ])
+    allocator = IdAllocator(clock=lambda: next(times))
+
+    assert allocator.allocate() == ["20220601120101"]
+    assert allocator.allocate() == ["20220601120101-000001"]
+
+
+def test_ids_sequence_overflow():
+    now = datetime.datetime(2022, 6, 1, 12, 1, 59)
+    allocator = IdAllocator(clock=lambda: now)
+
+    # the last suffixes of a second, then the next second
+    allocator.allocate(SEQUENCE_LIMIT - 2)
+    ids = allocator.allocate(3)
+    assert ids == [
+        "20220601120159-999998",
+        "20220601120159-999999",
+        "20220601120200",
+    ]
+    assert sorted(ids) == ids
+
+    # the clock catches up with the borrowed second
+    now = datetime.datetime(2022, 6, 1, 12, 2, 0)
+    assert allocator.allocate() == ["20220601120200-000001"]
+
+    with pytest.raises(ValueError):
+        format_id("20220601120159", SEQUENCE_LIMIT)
+
+
+def test_id_parts():
+    assert id_folders("20220601120100-000001") == ("2022", "6")
+    assert id_timestamp("20220601120100-000001") == "20220601120100"
+
+
+def test_date_bound():
+    assert date_bound("2022") == "20220000000000"
+    assert date_bound("2022-03") == "20220300000000"
+    assert date_bound("2022-06", end=True) == "20220699999999"
+    assert date_bound("2022-06-01 12:01:00") == "20220601120100"
+
+    with pytest.raises(ValueError):
+        date_bound("2022-3")
+    with pytest.raises(ValueError):
+        date_bound("2022-13")
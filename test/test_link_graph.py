@@ -0,0 +1,54 @@
+import pytest
+
+from src.zet.db import Db
+from src.zet.link_graph import LinkGraph, NodeDoesNotExistException
+from src.zet.zet import Zet
+
+
+@pytest.fixture
+def graph():
+    return LinkGraph.from_edges(
+        [("a", "b"), ("b", "c"), ("c", "d"), ("a", "e"), ("f", "a")],
+        nodes=["lonely"],
+    )
+
+
+def test_graph_csr(graph):
+    assert len(graph) == 7
+    assert graph.edge_count == 5
+    assert len(graph.offsets) == len(graph) + 1
+
+
+def test_graph_neighbors(graph):
+    assert graph.neighbors("a") == {"b": 1, "e": 1}
+    assert graph.neighbors("a", depth=3) == {"b": 1, "e": 1, "c": 2, "d": 3}
+    assert graph.neighbors("a", direction="in") == {"f": 1}
+    assert graph.neighbors("b", depth=2, direction="both") == {"a": 1, "c": 1, "d": 2, "e": 2, "f": 2}
+    assert graph.neighbors("lonely", depth=5) == {}
+
+
+def test_graph_shortest_path(graph):
+    assert graph.shortest_path("a", "d") == ["a", "b", "c", "d"]
+    assert graph.shortest_path("d", "a") is None
+    assert graph.shortest_path("d", "a", direction="in") == ["d", "c", "b", "a"]
+    assert graph.shortest_path("a", "a") == ["a"]
+    assert graph.is_reachable("f", "d")
+    assert not graph.is_reachable("a", "lonely", direction="both")
+
+    with pytest.raises(NodeDoesNotExistException):
+        graph.shortest_path("a", "missing")
+
+
+def test_graph_synced_zets(zet_settings):
+    zets = []
+    for i in range(3):
+        zet = Zet()
+        zet.create(f"graph {i}", "some category", "some, tags")
+        zets.append(zet)
+    zets[0].add_link(zets[1].path)
+    zets[1].add_link(zets[2].path)
+
+    db = Db()
+    db.sync_db()
+    graph = db.link_graph()
+    assert graph.shortest_path(zets[0].path, zets[2].path) == [zet.path for zet in zets]
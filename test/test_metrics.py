@@ -0,0 +1,96 @@
+import json
+
+from src.zet.main import main
+from src.zet.metrics import Metrics, metrics
+
+
+def test_disabled_metrics_record_nothing():
+    registry = Metrics()
+    registry.inc("files_stat_total", 10)
+    registry.observe("sync_seconds", 0.5)
+    assert registry.snapshot() == {"counters": [], "summaries": []}
+
+
+def test_counters_and_summaries():
+    registry = Metrics()
+    registry.enable()
+    registry.inc("files_stat_total", 10)
+    registry.inc("files_stat_total", 5)
+    registry.observe("git_subprocess_seconds", 0.25, command="add")
+    registry.observe("git_subprocess_seconds", 0.75, command="add")
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"] == [{"name": "files_stat_total", "labels": {}, "value": 15}]
+    assert snapshot["summaries"] == [
+        {"name": "git_subprocess_seconds", "labels": {"command": "add"}, "count": 2, "sum": 1.0, "max": 0.75}
+    ]
+
+    totals = Metrics()
+    totals.merge(snapshot)
+    totals.merge(snapshot)
+    assert totals.snapshot()["counters"][0]["value"] == 30
+    assert totals.snapshot()["summaries"][0]["count"] == 4
+
+    prometheus = registry.to_prometheus().splitlines()
+    assert "# TYPE zet_files_stat_total counter" in prometheus
+    assert "zet_files_stat_total 15" in prometheus
+    assert "# TYPE zet_git_subprocess_seconds summary" in prometheus
+    assert 'zet_git_subprocess_seconds_count{command="add"} 2' in prometheus
+    assert "# TYPE zet_git_subprocess_seconds_max gauge" in prometheus
+    assert 'zet_git_subprocess_seconds_max{command="add"} 0.75' in prometheus
+
+
+def test_prometheus_type_lines():
+    registry = Metrics()
+    registry.enable()
+    registry.inc("files_stat_total", 2)
+    registry.observe("git_subprocess_seconds", 0.25, command="add")
+    registry.observe("git_subprocess_seconds", 0.5, command="commit")
+    registry.observe("sync_seconds", 1.5)
+
+    # every sample follows the TYPE line of its own family
+    suffixes = {"counter": [""], "gauge": [""], "summary": ["_count", "_sum"]}
+    family = kind = None
+    types = {}
+    for line in registry.to_prometheus().splitlines():
+        if line.startswith("# TYPE "):
+            family, kind = line.split()[2:]
+            types[family] = kind
+            continue
+        sample = line.split("{")[0].split()[0]
+        assert sample in [family + suffix for suffix in suffixes[kind]]
+
+    assert types == {
+        "zet_files_stat_total": "counter",
+        "zet_git_subprocess_seconds": "summary",
+        "zet_git_subprocess_seconds_max": "gauge",
+        "zet_sync_seconds": "summary",
+        "zet_sync_seconds_max": "gauge",
+    }
+
+
+def test_save_adds_to_metrics_file(tmp_path):
+    path = str(tmp_path / "metrics.json")
+    for _ in range(2):
+        registry = Metrics()
+        registry.enable()
+        registry.path = path
+        registry.inc("zets_created_total", 3)
+        registry.save()
+        assert registry.snapshot()["counters"] == []
+
+    with open(path, "r") as file:
+        saved = json.load(file)
+    assert saved["counters"] == [{"name": "zets_created_total", "labels": {}, "value": 6}]
+
+
+def test_stats_metrics(zet, monkeypatch, capsys):
+    monkeypatch.setattr(metrics, "enabled", True)
+    monkeypatch.setattr(metrics, "path", None)
+    monkeypatch.setattr(metrics, "counters", {})
+    monkeypatch.setattr(metrics, "summaries", {})
+
+    assert main(["list"]) == 0
+    capsys.readouterr()
+    assert main(["stats", "--metrics", "--format", "prometheus"]) == 0
+    assert "zet_zets_listed_total" in capsys.readouterr().out
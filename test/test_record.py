@@ -0,0 +1,40 @@
+from src.zet.frontmatter import parse_lines
+from src.zet.record import ZetRecord
+
+LINES = [
+    "---\n",
+    "path: '/2022/1/some-title-20220101000000'\n",
+    "title: 'some title'\n",
+    "date: '2022-01-01 00:00:00'\n",
+    "category: 'some category'\n",
+    "tags: ['some', 'tags']\n",
+    "links: ['/zets/one.md']\n",
+    "draft: 'yes'\n",
+    "---\n",
+]
+
+
+def test_record_round_trip():
+    metadata = parse_lines(LINES)
+    record = ZetRecord.from_metadata("/zets/some-title.md", "zets", metadata)
+
+    assert record.to_metadata() == metadata
+    assert list(record.to_metadata()) == list(metadata)
+    assert record.tags == ("some", "tags")
+    assert record.get("draft") == "yes"
+    assert record.get("missing", "default") == "default"
+    assert record["title"] == "some title"
+    assert "links" in record
+    assert "missing" not in record
+    assert not hasattr(record, "__dict__")
+
+
+def test_record_strings_are_shared():
+    first = ZetRecord.from_metadata("/zets/one.md", "zets", parse_lines(LINES))
+    second = ZetRecord.from_metadata("/zets/two.md", "zets", parse_lines(LINES))
+
+    assert first == ZetRecord.from_metadata("/zets/one.md", "zets", parse_lines(LINES))
+    assert first != second
+    assert first.category is second.category
+    assert all(a is b for a, b in zip(first.tags, second.tags))
+    assert first.links[0] is second.links[0]
@@ -1,7 +1,15 @@
 import json
 import os
 
-from src.zet.repo import Repo
+import pytest
+
+from src.zet.repo import (
+    Repo,
+    RepoDoesNotExistException,
+    RepoResolver,
+    get_repo_resolver,
+    list_repo_zets,
+)
 from src.zet.settings import ZET_INSTALL_PATH
 
 
@@ -61,3 +69,91 @@ def test_add_repo(zet_settings):
     # * Pytest Assert raises for the new exception already exists
 
 
+def test_repo_resolver():
+    resolver = RepoResolver({
+        "work": {"folder": "/notes/work"},
+        "work2": {"folder": "/notes/work2/"},
+        "nested": {"folder": "/notes/work/nested"},
+    })
+    assert resolver.resolve("/notes/work/2022/6/1/zet-1.md") == "work"
+    assert resolver.resolve("/notes/work2/2022/6/1/zet-1.md") == "work2"
+    assert resolver.resolve("/notes/work/nested/2022/zet-1.md") == "nested"
+    assert resolver.resolve("/notes/work") == "work"
+    assert resolver.resolve("/notes/other/zet-1.md") is None
+    assert resolver.resolve("/notes") is None
+
+
+def test_repo_resolver_follows_settings(zet_settings):
+    resolver = get_repo_resolver()
+    assert get_repo_resolver() is resolver
+
+    zet_path = os.path.join(zet_settings.get_default_repo_path(), "2022/6/1/zet-1.md")
+    assert resolver.resolve(zet_path) == zet_settings.get_default_repo()
+
+    zet_settings.append_setting("zet_repos", {"resolver_repo": {"folder": "/resolver/repo", "template": "default"}})
+    assert get_repo_resolver() is not resolver
+    assert get_repo_resolver().resolve("/resolver/repo/zet-1.md") == "resolver_repo"
+
+
+def test_iter_zets(zet_settings, tmp_path):
+    for folder in ("2022/10/20221001120000", "2022/2/20220201120000", "2022/2/20220201120000/attachments", ".git/objects"):
+        os.makedirs(tmp_path / folder)
+    (tmp_path / "2022/10/20221001120000/october-20221001120000.md").write_text("---\n---\n")
+    (tmp_path / "2022/2/20220201120000/february-20220201120000.md").write_text("---\n---\n")
+    (tmp_path / "2022/2/20220201120000/diagram.png").write_text("")
+    (tmp_path / "2022/2/20220201120000/blob.pdf").write_bytes(b"%PDF-\xff\xfe")
+    (tmp_path / "2022/2/20220201120000/attachments/notes.md").write_text("")
+    (tmp_path / ".git/objects/object").write_text("")
+
+    repo = Repo()
+    zets = list(repo.iter_zets(tmp_path.as_posix()))
+
+    # months are in numeric order
+    assert [zet.name for zet in zets] == ["february-20220201120000.md", "october-20221001120000.md"]
+    assert zets[0].path == (tmp_path / "2022/2/20220201120000/february-20220201120000.md").as_posix()
+    assert zets[0].zet_id == "20220201120000"
+    assert zets[0].stat().st_size == len("---\n---\n")
+
+    assert [zet.name for zet in repo.iter_zets(tmp_path.as_posix(), limit=1)] == ["february-20220201120000.md"]
+    assert repo.list_zets(tmp_path.as_posix(), limit=1) == ["february-20220201120000.md"]
+
+
+def test_iter_zets_missing_repo(zet_settings):
+    with pytest.raises(RepoDoesNotExistException):
+        Repo().iter_zets("/does/not/exist")
+
+
+def test_list_repo_zets(zet_settings, zet_list):
+    assert list_repo_zets(zet_settings.get_default_repo(), limit=2) == zet_list[:2]
+
+
+def test_iter_zets_date_range(zet_settings, tmp_path, monkeypatch):
+    for year in (2021, 2022):
+        for month in range(1, 13):
+            zet_id = f"{year}{month:02d}01120000"
+            os.makedirs(tmp_path / f"{year}/{month}/{zet_id}")
+            (tmp_path / f"{year}/{month}/{zet_id}/zet-{zet_id}.md").write_text("")
+    (tmp_path / "README.md").write_text("")
+
+    scanned = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(os.path.relpath(path, tmp_path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+
+    repo = Repo()
+    zets = repo.list_zets(tmp_path.as_posix(), since="2022-03", until="2022-06")
+    assert zets == [f"zet-2022{month:02d}01120000.md" for month in range(3, 7)]
+
+    scanned.clear()
+    assert repo.list_zets(tmp_path.as_posix(), since="2021-10", until="2021-10") == ["zet-20211001120000.md"]
+    assert scanned == [".", "2021", "2021/10", "2021/10/20211001120000"]
+
+    assert repo.list_zets(tmp_path.as_posix(), since="2022-12-01 12:00") == ["zet-20221201120000.md"]
+    assert len(repo.list_zets(tmp_path.as_posix(), until="2021")) == 12
+
+    with pytest.raises(ValueError):
+        repo.iter_zets(tmp_path.as_posix(), since="March")
@@ -0,0 +1,109 @@
+import os
+
+from src.zet.db import Db
+from src.zet.search import SearchIndex, search_zets, tokenize
+from src.zet.zet import Zet
+
+
+def write_zets(tmp_path, texts):
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"zet-{i}.md"
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+
+def test_tokenize():
+    assert tokenize("Graph-Ein stores NODES, edges") == ["graph", "ein", "stores", "nodes", "edges"]
+
+
+def test_search_terms_ranked(tmp_path):
+    paths = write_zets(tmp_path, [
+        "graph databases store graph data",
+        "a graph of notes",
+        "nothing relevant here",
+    ])
+    index = SearchIndex(tmp_path / "search.db")
+    index.rebuild(paths)
+
+    results = index.search("graph")
+    assert [path for path, _ in results] == paths[:2]
+    assert results[0][1] > results[1][1]
+
+    assert [path for path, _ in index.search("graph notes")] == [paths[1]]
+    assert index.search("missing") == []
+
+
+def test_search_phrase_and_prefix(tmp_path):
+    paths = write_zets(tmp_path, [
+        "the graph database is fast",
+        "a database of graph nodes",
+    ])
+    index = SearchIndex(tmp_path / "search.db")
+    index.rebuild(paths)
+
+    assert [path for path, _ in index.search('"graph database"')] == [paths[0]]
+    assert sorted(path for path, _ in index.search("data*")) == paths
+    assert [path for path, _ in index.search("nod*")] == [paths[1]]
+
+
+def test_search_incremental(tmp_path):
+    paths = write_zets(tmp_path, ["first note", "second note"])
+    index = SearchIndex(tmp_path / "search.db")
+    index.rebuild(paths)
+
+    with open(paths[0], "w") as file:
+        file.write("changed text")
+    index.update([paths[0]])
+    index.remove([paths[1]])
+
+    assert index.search("note") == []
+    assert [path for path, _ in index.search("changed")] == [paths[0]]
+    assert len(index) == 1
+
+
+def test_search_unreadable_files(tmp_path):
+    paths = write_zets(tmp_path, ["first note"])
+    latin = tmp_path / "latin.md"
+    latin.write_bytes("caf\xe9 note".encode("latin-1"))
+    deleted = str(tmp_path / "deleted.md")
+
+    index = SearchIndex(tmp_path / "search.db")
+    index.update([str(latin), deleted] + paths)
+
+    assert sorted(path for path, _ in index.search("note")) == sorted([str(latin), paths[0]])
+    assert [path for path, _ in index.search("first")] == [paths[0]]
+    # the deleted file isn't indexed
+    assert len(index) == 2
+
+
+def test_search_built_marker(tmp_path):
+    paths = write_zets(tmp_path, ["first note"])
+
+    # an index that was opened but never built is rebuilt
+    SearchIndex(tmp_path / "search.db").close()
+    index = SearchIndex(tmp_path / "search.db")
+    assert index.created
+
+    index.rebuild(paths)
+    index.close()
+    assert not SearchIndex(tmp_path / "search.db").created
+
+
+def test_search_before_sync(zet_settings):
+    index_path = zet_settings.install_path / ".env/search.db"
+    if index_path.exists():
+        os.remove(index_path)
+
+    # a query doesn't create the index
+    assert search_zets("anything") == []
+    assert not index_path.exists()
+
+
+def test_search_synced_zets(zet_settings):
+    zet = Zet()
+    zet.create("searchable title", "some category", "some, tags")
+    Db().sync_db()
+
+    assert zet.path in [path for path, _ in search_zets("searchable")]
@@ -1,5 +1,11 @@
+import json
+import os
+
 import pytest
 
+from src.zet.repo import get_repo_resolver
+from src.zet.settings import Settings, get_settings
+
 
 def test_env_generates(zet_settings):
     """Creates local settings.
@@ -52,3 +58,77 @@ def test_settings_update_key_refresh(zet_settings):
     check_settings = zet_settings.refresh().get_setting("defaults")
     assert value == check_settings["editor"]["name"]
 
+
+def test_settings_reload_on_change(zet_settings):
+    """Outside changes to the file are picked up on the next read."""
+    with zet_settings.zet_local_env_path.open("r") as file:
+        data = json.load(file)
+    data["defaults"]["editor"]["command"] = "some-editor"
+    with zet_settings.zet_local_env_path.open("w") as file:
+        json.dump(data, file, indent=4)
+
+    assert zet_settings.get_editor_command() == "some-editor"
+
+
+def test_settings_not_reparsed(zet_settings, monkeypatch):
+    zet_settings.refresh()
+    version = zet_settings.version
+
+    loads = []
+    monkeypatch.setattr(Settings, "load_settings", staticmethod(lambda path: loads.append(path)))
+
+    for _ in range(100):
+        zet_settings.get_default_repo_path()
+    zet_settings.update_setting(["defaults", "editor", "name"], "some editor")
+
+    assert loads == []
+    assert zet_settings.version == version + 1
+
+
+def test_settings_batch_single_write(zet_settings, monkeypatch):
+    writes = []
+    write = Settings._write
+
+    def counting_write(self):
+        writes.append(self._batch_depth)
+        write(self)
+
+    monkeypatch.setattr(Settings, "_write", counting_write)
+
+    with zet_settings.batch():
+        zet_settings.update_setting(["defaults", "editor", "name"], "batched")
+        zet_settings.append_setting("templates", {"batched": "some/path.md"})
+        assert zet_settings.get_template_path("batched") == "some/path.md"
+
+    # two deferred writes and the real one
+    assert writes == [1, 1, 0]
+
+    with zet_settings.zet_local_env_path.open("r") as file:
+        data = json.load(file)
+    assert data["defaults"]["editor"]["name"] == "batched"
+    assert data["templates"]["batched"] == "some/path.md"
+
+
+def test_settings_batch_checked_once(zet_settings, monkeypatch):
+    settings = get_settings()
+    settings_path = str(settings.zet_local_env_path)
+    stats = []
+    stat = os.stat
+
+    def counting_stat(path, *args, **kwargs):
+        if os.fspath(path) == settings_path:
+            stats.append(path)
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", counting_stat)
+
+    with settings.batch():
+        for _ in range(100):
+            get_repo_resolver()
+            settings.get_default_repo_path()
+
+    assert len(stats) == 1
+
+
+def test_shared_settings():
+    assert get_settings() is get_settings()
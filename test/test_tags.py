@@ -0,0 +1,104 @@
+import os
+
+from src.zet.db import Db
+from src.zet.tags import TagIndex, TagIndexReader, filter_zets, to_bitmap
+from src.zet.zet import Zet
+
+
+def sample_index(tmp_path):
+    index = TagIndex(tmp_path / "tags.db")
+    index.update("zets", {
+        "a.md": {"category": "work", "tags": ["python", "graph"]},
+        "b.md": {"category": "work", "tags": ["python"]},
+        "c.md": {"category": "home", "tags": ["graph", "garden"]},
+    })
+    index.update("other", {
+        "d.md": {"category": "home", "tags": ["python", "garden"]},
+    })
+    return index
+
+
+def test_tags_query(tmp_path):
+    index = sample_index(tmp_path)
+
+    assert index.query(tags=["python"]) == ["a.md", "b.md", "d.md"]
+    assert index.query(tags=["python", "graph"]) == ["a.md"]
+    assert index.query(any_tags=["graph", "garden"]) == ["a.md", "c.md", "d.md"]
+    assert index.query(tags=["python"], not_tags=["graph"]) == ["b.md", "d.md"]
+    assert index.query(categories=["home"]) == ["c.md", "d.md"]
+    assert index.query(tags=["garden"], repos=["zets"]) == ["c.md"]
+    assert index.query(tags=["missing"]) == []
+    assert len(index.query()) == 4
+
+
+def test_tags_reader_query(tmp_path):
+    sample_index(tmp_path).save()
+
+    with TagIndexReader(tmp_path / "tags.db") as index:
+        assert index.query(tags=["python"]) == ["a.md", "b.md", "d.md"]
+        assert index.query(tags=["python", "graph"]) == ["a.md"]
+        assert index.query(any_tags=["graph", "garden"]) == ["a.md", "c.md", "d.md"]
+        assert index.query(tags=["python"], not_tags=["graph"]) == ["b.md", "d.md"]
+        assert index.query(categories=["home"]) == ["c.md", "d.md"]
+        assert index.query(tags=["garden"], repos=["zets"]) == ["c.md"]
+        assert index.query(tags=["missing"]) == []
+        assert len(index.query()) == 4
+        # only the keys asked for are read
+        assert index.bitmaps("tags", ["python", "missing"]).keys() == {"python"}
+        assert sorted(index.bitmaps("repos")) == ["other", "zets"]
+
+    # no index before the first sync
+    with TagIndexReader(tmp_path / "missing.db") as index:
+        assert index.query(tags=["python"]) == []
+        assert index.bitmaps("repos") == {}
+    assert not (tmp_path / "missing.db").exists()
+
+
+def test_tags_update_remove_persist(tmp_path):
+    index = sample_index(tmp_path)
+    index.update("zets", {"a.md": {"category": "home", "tags": ["garden"]}})
+    index.remove(["b.md"])
+    index.save()
+
+    index_two = TagIndex(tmp_path / "tags.db")
+    assert len(index_two) == 3
+    assert index_two.query(tags=["python"]) == ["d.md"]
+    assert index_two.query(categories=["home"]) == ["a.md", "c.md", "d.md"]
+
+    # freed IDs are reused
+    index_two.update("zets", {"e.md": {"category": "work", "tags": ["python"]}})
+    assert len(index_two.docs) == 4
+    assert index_two.query(tags=["python"]) == ["e.md", "d.md"]
+
+
+def test_tags_bitmaps_saved(tmp_path):
+    assert to_bitmap([]) == 0
+    assert to_bitmap([9, 0, 3]) == 0b1000001001
+
+    index = sample_index(tmp_path)
+    index.save()
+
+    # a cleared index drops every saved zet and bitmap
+    index.clear()
+    index.update("zets", {"e.md": {"category": "work", "tags": ["python"]}})
+    index.save()
+
+    index_two = TagIndex(tmp_path / "tags.db")
+    assert index_two.query() == ["e.md"]
+    assert index_two.tags == {"python": 1}
+    assert index_two.categories == {"work": 1}
+
+
+def test_tags_synced_zets(zet_settings):
+    zet = Zet()
+    zet.create("tagged title", "tagged category", "first-tag, second-tag")
+    Db().sync_db()
+
+    assert os.path.basename(zet.path) in filter_zets(tag=["first-tag", "second-tag"])
+    assert zet.path in filter_zets(category=["tagged category"], full_path=True)
+    assert zet.path not in filter_zets(tag=["first-tag"], not_tag=["second-tag"], full_path=True)
+
+    # dates come from the zet's ID folder
+    zet_date = os.path.basename(os.path.dirname(zet.path))[:8]
+    assert zet.path in filter_zets(tag=["first-tag"], since=zet_date, until=zet_date, full_path=True)
+    assert filter_zets(tag=["first-tag"], until="2000") == []
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from src.zet.template_engine import (
+    CompiledTemplate,
+    TemplateCache,
+    TemplateDoesNotExistException,
+)
+from src.zet.zet import Zet
+
+
+def test_render_single_pass():
+    template = CompiledTemplate("# templateTitle\n\ntemplateCleanTitle in templateCategory\n")
+    assert template.placeholders == ["templateTitle", "templateCleanTitle", "templateCategory"]
+
+    # values aren't scanned for placeholders again
+    text = template.render({
+        "templateTitle": "about templateCategory",
+        "templateCleanTitle": "about-templatecategory",
+        "templateCategory": "notes",
+    })
+    assert text == "# about templateCategory\n\nabout-templatecategory in notes\n"
+
+
+def test_render_missing_value():
+    template = CompiledTemplate("templateTitle templateTags")
+    assert template.render({"templateTitle": "title"}) == "title templateTags"
+
+
+def test_template_cache_invalidates_changed_template(tmp_path):
+    path = tmp_path / "template.md"
+    path.write_text("# templateTitle\n")
+
+    cache = TemplateCache()
+    template = cache.get(path.as_posix())
+    assert cache.get(path.as_posix()) is template
+
+    path.write_text("## templateTitle, edited\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert cache.get(path.as_posix()).render({"templateTitle": "title"}) == "## title, edited\n"
+
+    with pytest.raises(TemplateDoesNotExistException):
+        cache.get((tmp_path / "missing.md").as_posix())
+
+
+def test_create_renders_template(zet_settings):
+    zet = Zet()
+    zet.create(
+        title="templateCategory title",
+        category="some category",
+        tags="some, tags",
+    )
+    metadata = Zet(zet.path).metadata
+    assert metadata["title"] == "templateCategory title"
+    assert metadata["category"] == "some category"
+
+    with open(zet.path, "r") as file:
+        assert file.read().endswith("# templateCategory title\n")
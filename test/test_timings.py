@@ -0,0 +1,35 @@
+import time
+
+from src.zet.timings import Timings
+
+
+def test_disabled_timings_record_nothing():
+    timings = Timings()
+    with timings.span("phase"):
+        pass
+    assert timings.results() == []
+
+
+def test_nested_spans():
+    timings = Timings()
+    timings.enable()
+    with timings.span("sync"):
+        for _ in range(3):
+            with timings.span("parse"):
+                time.sleep(0.001)
+        timings.add("git", 0.5)
+
+    results = {name: (depth, count, seconds) for name, depth, count, seconds in timings.results()}
+    assert [name for name, *_ in timings.results()] == ["sync", "parse", "git"]
+    assert results["parse"][:2] == (1, 3)
+    assert results["parse"][2] >= 0.003
+    assert results["git"] == (1, 1, 0.5)
+    assert results["sync"][0] == 0
+    assert results["sync"][2] >= results["parse"][2]
+
+    report = timings.report().splitlines()
+    assert report[0].split() == ["phase", "calls", "total", "(ms)"]
+    assert report[2].startswith("  parse")
+
+    timings.reset()
+    assert timings.results() == []
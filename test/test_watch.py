@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from src.zet.watch import InotifyWatcher, PollingWatcher, WatchUnavailableException
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(text)
+
+
+def test_polling_watcher(zet_settings, tmp_path):
+    repo = tmp_path / "repo"
+    zet_path = (repo / "2022/6/20220601120100/zet-20220601120100.md").as_posix()
+    write(zet_path, "---\n---\n")
+
+    watcher = PollingWatcher([repo.as_posix()], interval=0.01)
+    assert watcher.changes(timeout=0.05) == set()
+
+    write(zet_path, "---\ntitle: 'changed'\n---\n")
+    other_path = (repo / "2022/6/20220601120200/zet-20220601120200.md").as_posix()
+    write(other_path, "---\n---\n")
+    assert watcher.changes(timeout=1) == {zet_path, other_path}
+
+    os.remove(other_path)
+    assert watcher.changes(timeout=1) == {other_path}
+    watcher.close()
+
+
+def test_inotify_watcher(zet_settings, tmp_path):
+    repo = tmp_path / "repo"
+    os.makedirs(repo / "2022/6")
+    try:
+        watcher = InotifyWatcher([repo.as_posix()])
+    except WatchUnavailableException:
+        pytest.skip("inotify isn't available")
+
+    assert watcher.changes(timeout=0.05) == set()
+
+    # new folders are watched as they're created
+    zet_folder = (repo / "2022/6/20220601120100").as_posix()
+    os.makedirs(zet_folder)
+    assert zet_folder in watcher.changes(timeout=1)
+
+    zet_path = os.path.join(zet_folder, "zet-20220601120100.md")
+    write(zet_path, "---\n---\n")
+    assert zet_path in watcher.changes(timeout=1)
+
+    os.remove(zet_path)
+    assert zet_path in watcher.changes(timeout=1)
+    watcher.close()
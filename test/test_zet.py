@@ -1,9 +1,12 @@
 import os
+import tempfile
 import time
+from pathlib import Path
 
 import pytest
 
-from src.zet.zet import Zet, bulk_import_zets
+from src.zet.backlinks import BacklinkIndex
+from src.zet.zet import Zet, bulk_import_zets, link_zets
 
 
 def test_zet_exists(zet_settings):
@@ -45,6 +48,98 @@ def test_zet_add_delete_link(zet_settings):
     assert zet.metadata["links"] == []
 
 
+def test_zet_record_is_kept(zet_settings, zet):
+    new_zet = Zet(zet)
+    record = new_zet.record
+    assert new_zet.record is record
+    assert record.repo_name == "zets"
+    assert record.tags == ("some", "tags")
+
+    # edits made outside the instance aren't seen
+    Zet(zet).add_link("other.md")
+    assert new_zet.record is record
+
+    new_zet.add_link("something.md")
+    assert new_zet.record is not record
+    assert new_zet.metadata["links"] == ["other.md", "something.md"]
+
+
+def test_zet_update_links(zet_settings, zet):
+    with open(zet, "r") as file:
+        body = file.read().partition("---\n# ")[2]
+
+    links = Zet(zet).update_links(add=["one.md", "two.md", "three.md"])
+    assert links == ["one.md", "two.md", "three.md"]
+
+    links = Zet(zet).update_links(add=["one.md", "four.md"], remove=["two.md", "missing.md"])
+    assert links == ["one.md", "three.md", "four.md"]
+    assert Zet(zet).metadata["links"] == links
+
+    # only the links line changed
+    with open(zet, "r") as file:
+        assert file.read().partition("---\n# ")[2] == body
+    assert not [name for name in os.listdir(os.path.dirname(zet)) if name.endswith(".tmp")]
+
+    # the backlink index stores links as written
+    with BacklinkIndex(Path(zet_settings.install_path / ".env/backlinks.db")) as index:
+        assert index.backlinks("four.md") == [zet]
+        assert index.backlinks("two.md") == []
+
+
+def test_zet_update_links_failure_keeps_zet(zet_settings, zet, monkeypatch):
+    with open(zet, "r") as file:
+        before = file.read()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("src.zet.zet.shutil.copyfileobj", fail)
+    with pytest.raises(OSError):
+        Zet(zet).update_links(add=["one.md"])
+
+    with open(zet, "r") as file:
+        assert file.read() == before
+    assert not [name for name in os.listdir(os.path.dirname(zet)) if name.endswith(".tmp")]
+
+
+def test_zet_update_links_open_failure(zet_settings, zet, monkeypatch):
+    tmp_fds = []
+    real_mkstemp = tempfile.mkstemp
+
+    def mkstemp(*args, **kwargs):
+        tmp_fd, tmp_path = real_mkstemp(*args, **kwargs)
+        tmp_fds.append(tmp_fd)
+        return tmp_fd, tmp_path
+
+    def fail(*args, **kwargs):
+        raise PermissionError("zet can't be read")
+
+    monkeypatch.setattr("src.zet.zet.tempfile.mkstemp", mkstemp)
+    monkeypatch.setattr("src.zet.zet.open", fail, raising=False)
+    with pytest.raises(PermissionError):
+        Zet(zet).update_links(add=["one.md"])
+
+    # the temp file is closed and removed
+    assert len(tmp_fds) == 1
+    with pytest.raises(OSError):
+        os.fstat(tmp_fds[0])
+    assert not [name for name in os.listdir(os.path.dirname(zet)) if name.endswith(".tmp")]
+
+
+def test_zet_update_links_without_links_line(zet_settings, tmp_path):
+    path = tmp_path / "zet.md"
+    path.write_text("---\ntitle: 'some title'\n---\n\nlinks: not metadata\n")
+
+    assert Zet(path.as_posix()).update_links(add=["one.md"]) == ["one.md"]
+    assert path.read_text() == "---\ntitle: 'some title'\nlinks: ['one.md']\n---\n\nlinks: not metadata\n"
+
+
+def test_link_zets(zet_settings, zet):
+    other = os.path.relpath(zet)
+    assert link_zets(zet, add=[other]) == [zet]
+    assert link_zets(zet, remove=[other]) == []
+
+
 def test_unique_zets(zet_settings):
 
     zet_one = Zet()
@@ -66,6 +161,17 @@ def test_unique_zets(zet_settings):
     assert os.path.exists(zet_two.path)
 
 
+def test_unique_zets_same_second(zet_settings):
+    zets = []
+    for i in range(3):
+        zet = Zet()
+        zet.create("same second", "some category", "some, tags")
+        zets.append(zet.path)
+
+    assert len(set(zets)) == 3
+    assert all(os.path.exists(path) for path in zets)
+
+
 def test_zet_metadata(zet_settings):
     zet = Zet()
     zet.create(
@@ -97,6 +203,8 @@ def test_bulk_create_zets(tmp_path, zet_settings):
         p.write_text("some test text")
 
     zet_list = bulk_import_zets(tmp_path)
+    assert len(zet_list) == 5
+    assert len({zet["zet_folder_path"] for zet in zet_list}) == 5
 
     for zet in zet_list:
         assert os.path.exists(zet["existing_path"])